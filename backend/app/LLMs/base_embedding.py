@@ -1,49 +1,253 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from chromadb.api.models.Collection import Collection
+from datetime import datetime, timezone
+import hashlib
+from typing import Iterator, List, Optional
+from app.handlers.vector_store import VectorStore
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EMBED_REQUEST_SIZE = 64  # Contents sent to the embedding provider per request
 
 class BaseEmbedding(ABC):
     """Base class for embedding providers."""
     
-    def __init__(self, collection: Collection, default_model: str):
+    def __init__(self, collection: VectorStore, default_model: str):
         """Initialize embedding provider with collection and model."""
         self.collection = collection
         self.model = default_model
 
     @abstractmethod
-    def create_embedding(self, content: str) -> bool:
+    def create_embedding(self, content: str, metadata: Optional[dict] = None) -> bool:
         """Create embedding for single content."""
         pass
 
     @abstractmethod
-    def create_embeddings_batch(self, contents: List[str]) -> bool:
+    def create_embeddings_batch(self, contents: List[str], metadatas: Optional[List[dict]] = None) -> bool:
         """Create embeddings for multiple contents."""
         pass
 
     @abstractmethod
-    def search(self, query: str, top_k: int = 2) -> List[str]:
-        """Search for relevant documents."""
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """Embed documents with this provider's model, EMBED_REQUEST_SIZE per request, without storing them."""
+        pass
+
+    @abstractmethod
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query with this provider's model."""
+        pass
+
+    def warm_up(self, keep_alive: Optional[str] = None):
+        """Load the embedding model by embedding a short text; `keep_alive` is used by providers that unload models."""
+        self.embed_query("warm-up")
+
+    @abstractmethod
+    def search(self, query: str, top_k: int = 2, where: Optional[dict] = None) -> List[str]:
+        """Search for relevant documents, optionally restricted by a metadata filter."""
         pass
 
-    def list_documents(self) -> list:
-        """List all documents in collection."""
+    def build_metadata(self, metadata: Optional[dict] = None, ingested_at: Optional[str] = None) -> dict:
+        """
+        Build the metadata stored alongside a chunk.
+
+        Drops empty values (ChromaDB rejects None) and stamps the ingestion
+        time and the embedding model used for the chunk.
+
+        Args:
+            metadata (dict, optional): Caller supplied fields (source, page, section, tags)
+            ingested_at (str, optional): ISO timestamp shared by a batch
+
+        Returns:
+            dict: Metadata ready to be stored in the collection
+        """
+        prepared = {
+            key: value for key, value in (metadata or {}).items()
+            if value is not None and value != [] and value != ""
+        }
+        prepared['ingested_at'] = ingested_at or datetime.now(timezone.utc).isoformat()
+        prepared['embedding_model'] = self.model
+        return prepared
+
+    def chunk_id(self, content: str, source: Optional[str] = None) -> str:
+        """
+        Derive a stable chunk ID from the chunk's source and content hash.
+
+        Identical text from the same source always maps to the same ID, which
+        lets a re-indexed document keep its unchanged chunks.
+
+        Args:
+            content (str): Chunk text
+            source (str, optional): Source document the chunk belongs to
+
+        Returns:
+            str: The chunk ID
+        """
+        digest = hashlib.sha256(f"{source or ''}\0{content.strip()}".encode('utf-8')).hexdigest()
+        return f"doc_{digest[:32]}"
+
+    def delete_document(self, source: str) -> int:
+        """
+        Delete every chunk belonging to a source document.
+
+        Args:
+            source (str): Source document name
+
+        Returns:
+            int: Number of chunks deleted
+        """
+        existing = self.collection.get(where={'source': source}, include=[])
+        if existing['ids']:
+            self.collection.delete(where={'source': source})
+        logger.info(f"Deleted {len(existing['ids'])} chunks of {source}")
+        return len(existing['ids'])
+
+    def replace_document(self, source: str, contents: List[str], metadatas: Optional[List[dict]] = None) -> dict:
+        """
+        Incrementally re-index a source document.
+
+        Chunks are diffed by their content-hash ID: only new chunks are embedded,
+        chunks no longer present are deleted and unchanged chunks keep their
+        vectors but take the new version's metadata (e.g. a page they moved to).
+        New chunks are stored before stale ones are removed, so a failed
+        embedding call leaves the previous version searchable.
+
+        Args:
+            source (str): Source document name
+            contents (List[str]): Chunks of the new document version
+            metadatas (List[dict], optional): Per-chunk metadata, aligned with contents
+
+        Returns:
+            dict: Counts of 'added', 'removed' and 'unchanged' chunks
+        """
+        existing = self.collection.get(where={'source': source}, include=['metadatas'])
+        existing_metadatas = dict(zip(existing['ids'], existing['metadatas']))
+        existing_ids = set(existing_metadatas)
+
+        new_contents = []
+        new_metadatas = []
+        unchanged_ids = []
+        unchanged_metadatas = []
+        current_ids = set()
+        ingested_at = datetime.now(timezone.utc).isoformat()
+        for idx, content in enumerate(contents):
+            if not content.strip():
+                continue
+            doc_id = self.chunk_id(content, source)
+            if doc_id in current_ids:
+                continue  # Repeated chunk within the document
+            current_ids.add(doc_id)
+            metadata = dict(metadatas[idx]) if metadatas else {}
+            metadata['source'] = source
+            if doc_id not in existing_ids:
+                new_contents.append(content)
+                new_metadatas.append(metadata)
+                continue
+            metadata = self.build_metadata(metadata, ingested_at)
+            # Fields the new version no longer has (e.g. a section) are removed
+            metadata.update({key: None for key in existing_metadatas[doc_id] or {} if key not in metadata})
+            unchanged_ids.append(doc_id)
+            unchanged_metadatas.append(metadata)
+
+        if new_contents and not self.create_embeddings_batch(new_contents, metadatas=new_metadatas):
+            raise Exception(f"Failed to embed new chunks of {source}")
+        if unchanged_ids:
+            self.collection.update(ids=unchanged_ids, metadatas=unchanged_metadatas)
+
+        stale_ids = list(existing_ids - current_ids)
+        if stale_ids:
+            self.collection.delete(ids=stale_ids)
+
+        stats = {
+            'added': len(new_contents),
+            'removed': len(stale_ids),
+            'unchanged': len(current_ids & existing_ids),
+        }
+        logger.info(f"Re-indexed {source}: {stats}")
+        return stats
+
+    def list_documents(self, limit: Optional[int] = None, offset: int = 0,
+                       include_content: bool = True, max_content_chars: Optional[int] = None,
+                       include_metadata: bool = False) -> list:
+        """
+        List one page of documents in the collection.
+
+        Only the requested fields are fetched from ChromaDB, so an IDs-only
+        listing never loads document text.
+
+        Args:
+            limit (int, optional): Maximum number of documents to return. None returns all.
+            offset (int): Number of documents to skip.
+            include_content (bool): Whether to return document text.
+            max_content_chars (int, optional): Truncate returned text to this many characters.
+            include_metadata (bool): Whether to return chunk metadata.
+
+        Returns:
+            list: A list of dictionaries containing document IDs and the projected fields.
+
+        Raises:
+            Exception: If the collection cannot be read, so a failure is not mistaken for an empty page
+        """
         try:
-            results = self.collection.get()
-            return [
-                {'id': doc_id, 'content': content}
-                for doc_id, content in zip(results['ids'], results['documents'])
-            ]
+            include = []
+            if include_content:
+                include.append('documents')
+            if include_metadata:
+                include.append('metadatas')
+
+            results = self.collection.get(limit=limit, offset=offset, include=include)
+
+            documents = []
+            for idx, doc_id in enumerate(results['ids']):
+                document = {'id': doc_id}
+                if include_content:
+                    content = results['documents'][idx]
+                    if max_content_chars is not None and content:
+                        content = content[:max_content_chars]
+                    document['content'] = content
+                if include_metadata:
+                    document['metadata'] = results['metadatas'][idx]
+                documents.append(document)
+
+            logger.debug(f"Retrieved {len(documents)} documents from collection (offset {offset})")
+            return documents
         except Exception as e:
-            return []
+            logger.error(f"Error listing documents: {str(e)}")
+            raise
+
+    def iter_documents(self, batch_size: int = 500, **projection) -> Iterator[dict]:
+        """
+        Lazily iterate over every document in the collection.
+
+        Reads the collection in `batch_size` pages so memory use stays bounded
+        by one page regardless of collection size.
+
+        Args:
+            batch_size (int): Number of documents fetched per read.
+            **projection: Field projection passed through to list_documents.
+
+        Yields:
+            dict: One document at a time.
+
+        Raises:
+            Exception: If a page cannot be read; the documents already yielded are incomplete
+        """
+        offset = 0
+        while True:
+            page = self.list_documents(limit=batch_size, offset=offset, **projection)
+            yield from page
+            if len(page) < batch_size:
+                break
+            offset += batch_size
 
     @abstractmethod
-    def get_relevant_context(self, queries: List[str], top_k: int = 5) -> List[str]:
+    def get_relevant_context(self, queries: List[str], top_k: int = 5, where: Optional[dict] = None) -> List[str]:
         """
         Get relevant context from multiple queries.
         
         Args:
             queries (List[str]): List of search queries
             top_k (int): Number of top results to return per query
+            where (dict, optional): ChromaDB metadata filter applied to every query
             
         Returns:
             List[str]: List of relevant document contexts
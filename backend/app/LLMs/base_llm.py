@@ -14,4 +14,8 @@ class BaseLLM(ABC):
     def generate_autocomplete(self, partial_prompt: str, max_tokens: int = 50, 
                             model: str = None) -> str:
         """Generate autocomplete suggestions."""
-        pass
\ No newline at end of file
+        pass
+
+    def warm_up(self, keep_alive: Optional[str] = None):
+        """Prepare the provider before the first request; creating the client is enough for hosted APIs."""
+        pass
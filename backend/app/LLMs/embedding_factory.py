@@ -1,40 +1,46 @@
 import os
-from app.LLMs.gemini_embedding import GeminiEmbeddings
-from app.LLMs.ollama_embedding import OllamaEmbeddings
+from app.utils.lazy_registry import LazyRegistry
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Provider modules import their SDK, so each is only imported once requested
+EMBEDDING_PROVIDERS = LazyRegistry("embedding provider", {
+    "ollama": "app.LLMs.ollama_embedding:OllamaEmbeddings",
+    "gemini": "app.LLMs.gemini_embedding:GeminiEmbeddings",
+})
+
 class EmbeddingFactory:
     """Factory class for creating embedding providers."""
     
     @staticmethod
-    def create_embedder(provider: str = None, collection=None):
-        """Create embedding provider instance."""
+    def default_model(provider: str = None) -> str:
+        """Configured embedding model of a provider."""
+        if not provider:
+            provider = os.getenv('DEFAULT_EMBEDDING_PROVIDER', 'gemini')
+        if provider.lower() == 'gemini':
+            return os.getenv('GEMINI_EMBEDDING_MODEL', 'models/text-embedding-004')
+        return os.getenv('OLLAMA_EMBEDDING_MODEL')
+
+    @staticmethod
+    def create_embedder(provider: str = None, collection=None, model: str = None):
+        """Create embedding provider instance, using `model` instead of the provider's configured model if given."""
         if not provider:
             provider = os.getenv('DEFAULT_EMBEDDING_PROVIDER', 'gemini')
             
+        provider = provider.lower()
+        if provider not in EMBEDDING_PROVIDERS.names():
+            logger.warning(f"Unknown provider {provider}, falling back to Ollama")
+            provider = 'ollama'
         try:
-            if provider.lower() == 'gemini':
-                return GeminiEmbeddings(
-                    collection=collection,
-                    default_model=os.getenv('GEMINI_EMBEDDING_MODEL', 'models/text-embedding-004')
-                )
-            elif provider.lower() == 'ollama':
-                return OllamaEmbeddings(
-                    collection=collection,
-                    default_model=os.getenv('OLLAMA_EMBEDDING_MODEL')
-                )
-            else:
-                logger.warning(f"Unknown provider {provider}, falling back to Ollama")
-                return OllamaEmbeddings(
-                    collection=collection,
-                    default_model=os.getenv('OLLAMA_EMBEDDING_MODEL')
-                )
+            return EMBEDDING_PROVIDERS.resolve(provider)(
+                collection=collection,
+                default_model=model or EmbeddingFactory.default_model(provider)
+            )
         except Exception as e:
             logger.error(f"Error creating embedder: {str(e)}")
             # Fallback to Ollama
-            return OllamaEmbeddings(
+            return EMBEDDING_PROVIDERS.resolve('ollama')(
                 collection=collection,
-                default_model=os.getenv('OLLAMA_EMBEDDING_MODEL')
-            )
\ No newline at end of file
+                default_model=model or EmbeddingFactory.default_model('ollama')
+            )
@@ -1,7 +1,8 @@
 import os
 import google.generativeai as genai
-from typing import List
-from app.LLMs.base_embedding import BaseEmbedding
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.LLMs.base_embedding import EMBED_REQUEST_SIZE, BaseEmbedding
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,7 +14,7 @@ class GeminiEmbeddings(BaseEmbedding):
         super().__init__(collection, default_model)
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-    def create_embedding(self, content: str) -> bool:
+    def create_embedding(self, content: str, metadata: Optional[dict] = None) -> bool:
         try:
             if not content.strip():
                 return False
@@ -23,10 +24,12 @@ class GeminiEmbeddings(BaseEmbedding):
                 content=content
             )
             
-            doc_id = f"doc_{self.collection.count()}"
+            chunk_metadata = self.build_metadata(metadata)
+            doc_id = self.chunk_id(content, chunk_metadata.get('source'))
             self.collection.add(
                 embeddings=[result['embedding']],
                 documents=[content.strip()],
+                metadatas=[chunk_metadata],
                 ids=[doc_id]
             )
             return True
@@ -34,26 +37,41 @@ class GeminiEmbeddings(BaseEmbedding):
             logger.error(f"Error creating embedding: {str(e)}")
             return False
 
-    def create_embeddings_batch(self, contents: List[str]) -> bool:
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        embeddings = []
+        for start in range(0, len(documents), EMBED_REQUEST_SIZE):
+            # A list of contents is embedded in one request
+            batch = documents[start:start + EMBED_REQUEST_SIZE]
+            embeddings.extend(genai.embed_content(model=self.model, content=batch)['embedding'])
+        return embeddings
+
+    def create_embeddings_batch(self, contents: List[str], metadatas: Optional[List[dict]] = None) -> bool:
         try:
-            embeddings = []
             documents = []
+            chunk_metadatas = []
             ids = []
+            ingested_at = datetime.now(timezone.utc).isoformat()
+            seen_ids = set()
             
             for idx, content in enumerate(contents):
                 if content.strip():
-                    result = genai.embed_content(
-                        model=self.model,
-                        content=content
+                    chunk_metadata = self.build_metadata(
+                        metadatas[idx] if metadatas else None, ingested_at
                     )
-                    embeddings.append(result['embedding'])
+                    doc_id = self.chunk_id(content, chunk_metadata.get('source'))
+                    if doc_id in seen_ids:
+                        continue  # Identical chunk already in this batch
+                    seen_ids.add(doc_id)
                     documents.append(content.strip())
-                    ids.append(f"doc_{self.collection.count() + idx}")
+                    chunk_metadatas.append(chunk_metadata)
+                    ids.append(doc_id)
             
             if documents:
+                embeddings = self.embed_documents(documents)
                 self.collection.add(
                     embeddings=embeddings,
                     documents=documents,
+                    metadatas=chunk_metadatas,
                     ids=ids
                 )
                 return True
@@ -62,16 +80,15 @@ class GeminiEmbeddings(BaseEmbedding):
             logger.error(f"Error creating batch embeddings: {str(e)}")
             return False
 
-    def search(self, query: str, top_k: int = 2) -> List[str]:
+    def embed_query(self, query: str) -> List[float]:
+        return genai.embed_content(model=self.model, content=query)['embedding']
+
+    def search(self, query: str, top_k: int = 2, where: Optional[dict] = None) -> List[str]:
         try:
-            result = genai.embed_content(
-                model=self.model,
-                content=query
-            )
-            
             results = self.collection.query(
-                query_embeddings=[result['embedding']],
-                n_results=top_k
+                query_embeddings=[self.embed_query(query)],
+                n_results=top_k,
+                where=where
             )
             
             return results['documents'][0] if results['documents'][0] else []
@@ -79,28 +96,29 @@ class GeminiEmbeddings(BaseEmbedding):
             logger.error(f"Error in search: {str(e)}")
             return []
 
-    def get_relevant_context(self, queries: List[str], top_k: int = 5) -> List[str]:
+    def get_relevant_context(self, queries: List[str], top_k: int = 5, where: Optional[dict] = None) -> List[str]:
         """
         Get relevant context from multiple queries.
         
         Args:
             queries (List[str]): List of search queries
             top_k (int): Number of top results to return per query
+            where (dict, optional): ChromaDB metadata filter applied to every query
             
         Returns:
-            List[str]: List of relevant document contexts
+            List[str]: Unique relevant document contexts, in order of first appearance
         """
         try:
-            all_contexts = set()  # Use set to avoid duplicates
+            all_contexts = {}  # Dict keys avoid duplicates and keep the order contexts were found in
             
             for query in queries:
-                contexts = self.search(query, top_k=top_k)
+                contexts = self.search(query, top_k=top_k, where=where)
                 if isinstance(contexts, list):
-                    all_contexts.update(contexts)
+                    all_contexts.update(dict.fromkeys(contexts))
                 else:
                     logger.warning(f"Unexpected search result type for query: {query}")
             
-            return list(all_contexts)  # Convert back to list
+            return list(all_contexts)
             
         except Exception as e:
             logger.error(f"Error getting relevant context: {str(e)}")
@@ -0,0 +1,221 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Generator, Optional
+from app.LLMs.base_llm import BaseLLM
+from app.LLMs.ollama_pool import percentile
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def hedging_enabled(requested: Optional[bool] = None) -> bool:
+    """Whether a request is hedged: its own `hedge` field, or HEDGE_REQUESTS when unset."""
+    if requested is not None:
+        return requested
+    return os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'
+
+class HedgeStats:
+    """First-chunk latencies and hedging outcomes of one provider, which set its hedge delay."""
+
+    def __init__(self, fraction: float = 0.95, min_samples: int = 20, default_delay: float = 2.0, window: int = 200):
+        """
+        Initialize the HedgeStats.
+
+        Args:
+            fraction (float): Percentile of first-chunk latency after which a request is hedged
+            min_samples (int): Latencies needed before the percentile replaces `default_delay`
+            default_delay (float): Hedge delay in seconds until enough latencies are recorded
+            window (int): Recent latencies kept
+        """
+        self.fraction = fraction
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.latencies = deque(maxlen=window)
+        self.counts = {'requests': 0, 'hedged': 0, 'primary_wins': 0, 'secondary_wins': 0, 'failed': 0}
+        self.secondary: Optional[str] = None  # Where duplicates go: 'host', 'provider', or None when not hedged
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HedgeStats":
+        return cls(
+            fraction=float(os.getenv('HEDGE_PERCENTILE', '95')) / 100,
+            min_samples=int(os.getenv('HEDGE_MIN_SAMPLES', '20')),
+            default_delay=float(os.getenv('HEDGE_DELAY_MS', '2000')) / 1000
+        )
+
+    def delay(self) -> float:
+        """Seconds to wait for a first chunk before sending the duplicate request."""
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return self.default_delay
+            return percentile(list(self.latencies), self.fraction)
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def count(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def summary(self) -> dict:
+        """Hedge rate, wins and latencies (milliseconds)."""
+        with self._lock:
+            latencies = list(self.latencies)
+            counts = dict(self.counts)
+        delay = self.delay()
+        return {
+            **counts,
+            'secondary': self.secondary,
+            'hedge_rate': round(counts['hedged'] / counts['requests'], 3) if counts['requests'] else 0.0,
+            'delay_ms': round(delay * 1000, 1),
+            'first_chunk_ms': {
+                'p50': None if not latencies else round(percentile(latencies, 0.5) * 1000, 1),
+                'p95': None if not latencies else round(percentile(latencies, 0.95) * 1000, 1),
+            },
+        }
+
+_hedge_stats: Dict[str, HedgeStats] = {}
+_hedge_stats_lock = threading.Lock()
+
+def hedge_stats(provider: str) -> HedgeStats:
+    """The process-wide hedging stats of a provider name ('auto' included)."""
+    with _hedge_stats_lock:
+        if provider not in _hedge_stats:
+            _hedge_stats[provider] = HedgeStats.from_env()
+        return _hedge_stats[provider]
+
+def all_hedge_stats() -> Dict[str, dict]:
+    """Summary of every provider's hedging stats."""
+    with _hedge_stats_lock:
+        stats = dict(_hedge_stats)
+    return {provider: entry.summary() for provider, entry in stats.items()}
+
+class _Attempt(threading.Thread):
+    """One copy of a hedged request, streaming its chunks into the shared queue until cancelled."""
+
+    def __init__(self, role: str, handler: BaseLLM, request: dict, events: queue.Queue, stats: HedgeStats):
+        super().__init__(name=f"hedge-{role}", daemon=True)
+        self.role = role
+        self.handler = handler
+        self.request = request
+        self.events = events
+        self.stats = stats
+        self.cancelled = threading.Event()
+
+    def run(self):
+        started = time.perf_counter()
+        chunks = None
+        first = True
+        try:
+            if hasattr(self.handler, 'generate_streaming_response'):
+                chunks = self.handler.generate_streaming_response(**self.request)
+            else:
+                chunks = iter([self.handler.generate_response(**self.request)])
+            for chunk in chunks:
+                if first:
+                    first = False
+                    self.stats.record_latency(time.perf_counter() - started)
+                if self.cancelled.is_set():
+                    break
+                self.events.put(('chunk', self, chunk))
+            self.events.put(('done', self, None))
+        except Exception as e:
+            self.events.put(('error', self, e))
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()  # Ends the upstream generation of a cancelled stream
+
+class HedgedLLM(BaseLLM):
+    """
+    Chat provider that sends a duplicate request when the first one is slow.
+
+    The primary request starts at once. If no chunk has arrived after the
+    provider's hedge delay (a percentile of recent first-chunk latencies),
+    the same request goes to the secondary handler; whichever produces a
+    chunk first answers and the other is cancelled at its next chunk. A copy
+    that fails before answering leaves the request to the other copy.
+    """
+
+    def __init__(self, primary: BaseLLM, secondary: BaseLLM, stats: HedgeStats):
+        """
+        Initialize the HedgedLLM.
+
+        Args:
+            primary (BaseLLM): Handler sent every request
+            secondary (BaseLLM): Handler sent the duplicate; may be the primary when it spreads requests itself
+            stats (HedgeStats): Latencies and outcomes of the provider
+        """
+        self.primary = primary
+        self.secondary = secondary
+        self.stats = stats
+        self.provider = getattr(primary, 'provider', None) or type(primary).__name__.replace('Chat', '').lower()
+        self.model = primary.model
+
+    def generate_streaming_response(self, prompt: str, system_prompt: str = None, model: str = None,
+                                    max_tokens: int = None) -> Generator[str, None, None]:
+        """Stream the response of whichever copy of the request answers first."""
+        request = {'prompt': prompt, 'system_prompt': system_prompt, 'model': model, 'max_tokens': max_tokens}
+        events = queue.Queue()
+        attempts = [_Attempt('primary', self.primary, request, events, self.stats)]
+        attempts[0].start()
+        self.stats.count('requests')
+        deadline = time.monotonic() + self.stats.delay()
+        winner = None
+        failed = 0
+        try:
+            while True:
+                try:
+                    timeout = max(0.0, deadline - time.monotonic()) if len(attempts) == 1 else None
+                    kind, attempt, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    self._hedge(attempts, request, events)
+                    continue
+                if winner is None and kind == 'error':
+                    failed += 1
+                    if failed == len(attempts) == 2:
+                        self.stats.count('failed')
+                        raise payload
+                    if len(attempts) == 1:
+                        logger.warning(f"Primary {self.provider} request failed, sending it to the secondary: {payload}")
+                        self._hedge(attempts, request, events)
+                    continue
+                if winner is None:
+                    winner = attempt
+                    for other in attempts:
+                        if other is not winner:
+                            other.cancelled.set()
+                    self.stats.count(f"{winner.role}_wins")
+                    self.provider = getattr(winner.handler, 'provider', None) or self.provider
+                    self.model = winner.handler.model
+                if attempt is not winner:
+                    continue  # Late output of the cancelled copy
+                if kind == 'chunk':
+                    yield payload
+                elif kind == 'done':
+                    return
+                else:
+                    raise payload
+        finally:
+            for attempt in attempts:
+                attempt.cancelled.set()  # Also stops the winner when the caller stops reading
+
+    def _hedge(self, attempts: list, request: dict, events: queue.Queue):
+        """Start the duplicate request."""
+        attempts.append(_Attempt('secondary', self.secondary, request, events, self.stats))
+        attempts[-1].start()
+        self.stats.count('hedged')
+
+    def generate_response(self, prompt: str, system_prompt: str = None,
+                          model: str = None, max_tokens: int = None) -> str:
+        """Generate a response, streamed internally so the losing copy can be cancelled early."""
+        return "".join(self.generate_streaming_response(prompt, system_prompt=system_prompt, model=model, max_tokens=max_tokens))
+
+    def generate_autocomplete(self, partial_prompt: str, max_tokens: int = 50, model: str = None) -> str:
+        """Autocomplete is not hedged."""
+        return self.primary.generate_autocomplete(partial_prompt, max_tokens=max_tokens, model=model)
+
+    def warm_up(self, keep_alive: Optional[str] = None):
+        self.primary.warm_up(keep_alive=keep_alive)
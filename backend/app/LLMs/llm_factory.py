@@ -1,7 +1,6 @@
-from app.LLMs.ollama_chat import OllamaChat
-from app.LLMs.gemini_chat import GeminiChat
-from app.LLMs.openai_chat import OpenAIChat
-from app.LLMs.groq_chat import GroqChat
+from app.LLMs.hedging import HedgedLLM, hedge_stats
+from app.LLMs.provider_router import ProviderRouter, RoutedLLM, default_router
+from app.utils.lazy_registry import LazyRegistry
 from app.utils.logger import get_logger
 import os
 from dotenv import load_dotenv
@@ -9,6 +8,14 @@ from dotenv import load_dotenv
 load_dotenv()
 logger = get_logger(__name__)
 
+# Provider modules import their SDK, so each is only imported once requested
+LLM_PROVIDERS = LazyRegistry("LLM provider", {
+    "ollama": "app.LLMs.ollama_chat:OllamaChat",
+    "gemini": "app.LLMs.gemini_chat:GeminiChat",
+    "openai": "app.LLMs.openai_chat:OpenAIChat",
+    "groq": "app.LLMs.groq_chat:GroqChat",
+})
+
 class LLMFactory:
     """Factory class for creating LLM providers with defaults from environment variables."""
     
@@ -17,13 +24,14 @@ class LLMFactory:
     DEFAULT_AUTOCOMPLETE_PROVIDER = os.getenv('DEFAULT_AUTOCOMPLETE_PROVIDER', 'ollama')
     
     @staticmethod
-    def create_llm(provider: str = None, operation: str = "chat"):
+    def create_llm(provider: str = None, operation: str = "chat", hedge: bool = False):
         """
         Create and return an LLM provider instance based on env configuration.
         
         Args:
-            provider (str): The LLM provider to use ('ollama' or 'gemini')
+            provider (str): The LLM provider to use, a name in LLM_PROVIDERS, or 'auto' for the fastest healthy one
             operation (str): The operation type ('chat' or 'autocomplete')
+            hedge (bool): Send a duplicate request when the first one is slow (see HedgedLLM)
             
         Returns:
             BaseLLM: An instance of the specified LLM provider
@@ -34,24 +42,56 @@ class LLMFactory:
                           else LLMFactory.DEFAULT_AUTOCOMPLETE_PROVIDER)
             
             provider = provider.lower()
+            if hedge:
+                return LLMFactory.hedged(provider, LLMFactory.create_llm(provider, operation))
+            if provider == "auto":
+                return RoutedLLM(default_router(LLM_PROVIDERS.resolve))
             try:
-                if provider == "ollama":
-                    return OllamaChat()
-                elif provider == "gemini":
-                    return GeminiChat()
-                elif provider == "openai":
-                    return OpenAIChat()
-                elif provider == "groq":
-                    return GroqChat()
-                else:
-                    raise ValueError(f"Unsupported LLM provider: {provider}")
-            except ValueError as e:
-                # If primary provider fails, fallback to Ollama
+                return LLM_PROVIDERS.resolve(provider)()
+            except (ValueError, ImportError) as e:
+                # If primary provider fails (or its SDK is not installed), fallback to Ollama
                 if provider in ["gemini", "openai", "groq"]:
                     logger.warning(f"{provider.capitalize()} initialization failed: {str(e)}. Falling back to Ollama.")
-                    return OllamaChat()
+                    return LLM_PROVIDERS.resolve("ollama")()
                 raise
                 
         except Exception as e:
             logger.error(f"Error creating LLM provider: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def hedged(provider: str, llm, router: ProviderRouter = None):
+        """
+        Wrap a chat provider so slow requests are duplicated to a secondary.
+
+        With provider=auto the duplicate prefers the second fastest provider.
+        Ollama with several hosts sends it to the same handler, whose pool
+        picks another host. Any other provider sends it to the fastest other
+        provider of the router; with no other provider the request is not
+        hedged, as a duplicate to the same endpoint would meet the same delay.
+        The choice is reported as `secondary` in the hedging stats.
+
+        Args:
+            provider (str): Requested provider name, which keys the hedging stats
+            llm (BaseLLM): Handler returned by create_llm for that provider
+            router (ProviderRouter): Router over the other providers (default: the provider=auto router)
+
+        Returns:
+            BaseLLM: The hedged handler, or `llm` if hedging cannot help
+        """
+        stats = hedge_stats(provider)
+        if isinstance(llm, RoutedLLM):
+            stats.secondary = 'provider'
+            return HedgedLLM(llm, RoutedLLM(llm.router, prefer=1), stats)
+        hosts = getattr(getattr(llm, 'client', None), 'hosts', None)  # Set for Ollama, whose client is the host pool
+        if hosts is not None and len(hosts) > 1:
+            stats.secondary = 'host'
+            return HedgedLLM(llm, llm, stats)
+        router = router or default_router(LLM_PROVIDERS.resolve)
+        primary = getattr(llm, 'provider', None) or type(llm).__name__.replace('Chat', '').lower()  # After a fallback too
+        if any(name != primary for name in router.providers):
+            stats.secondary = 'provider'
+            return HedgedLLM(llm, RoutedLLM(router, exclude=(primary,)), stats)
+        stats.secondary = None
+        logger.debug(f"Not hedging {provider}: no other host or provider")
+        return llm
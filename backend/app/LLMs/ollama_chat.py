@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-import ollama  # Import Ollama for chat completions
+from app.LLMs.ollama_pool import default_pool  # Ollama hosts shared by every chat and embedding request
 from app.utils.logger import get_logger  # Add this import
 from app.LLMs.base_llm import BaseLLM  # Add this import
 from typing import Generator
@@ -20,6 +20,7 @@ class OllamaChat(BaseLLM):
             default_model (str): The default model to use.
         """
         self.model = default_model  # Store the model name
+        self.client = default_pool()  # Spreads requests over the configured Ollama hosts
         logger.info(f"Initialized OllamaChat with model: {self.model}")
 
     def generate_response(self, prompt: str, system_prompt: str = None, model: str = None, max_tokens: int = None) -> str:
@@ -65,7 +66,7 @@ class OllamaChat(BaseLLM):
             })
 
             logger.debug(f"Sending request to Ollama with {len(messages)} messages")
-            response = ollama.chat(
+            response = self.client.chat(
                 model=model_name,
                 messages=messages,
                 stream=False
@@ -124,7 +125,7 @@ class OllamaChat(BaseLLM):
             logger.debug(f"Sending streaming request to Ollama with {len(messages)} messages")
             
             # Use streaming mode
-            stream = ollama.chat(
+            stream = self.client.chat(
                 model=model_name,
                 messages=messages,
                 stream=True
@@ -168,7 +169,7 @@ class OllamaChat(BaseLLM):
             Instead, focus on completing the current sentence or thought in a way that makes sense given the context.
             Keep the continuation concise and natural. Respond only with the continuation text, no explanations or additional formatting."""
 
-            response = ollama.generate(
+            response = self.client.generate(
                 model=model_name,
                 prompt=partial_prompt,
                 system=system_prompt,  # Add system prompt
@@ -183,5 +184,14 @@ class OllamaChat(BaseLLM):
 
         except Exception as e:
             logger.error(f"Failed to generate autocomplete: {str(e)}")
-            raise Exception(f"Error generating autocomplete with model {model_name}: {str(e)}") 
-        
\ No newline at end of file
+            raise Exception(f"Error generating autocomplete with model {model_name}: {str(e)}")
+
+    def warm_up(self, keep_alive: str = None):
+        """
+        Load the chat model into Ollama without generating anything.
+
+        Args:
+            keep_alive (str, optional): How long Ollama keeps the model loaded, e.g. "30m". Defaults to Ollama's default.
+        """
+        self.client.generate(model=self.model, prompt="", keep_alive=keep_alive)
+        logger.info(f"Loaded chat model {self.model}")
@@ -1,12 +1,13 @@
-import chromadb  # Import chromadb for vector database operations
 import json
 import os  # Import os for environment variables
-import ollama  # Import ollama for embedding
+from datetime import datetime, timezone
+from typing import Optional
+from app.LLMs.ollama_pool import default_pool  # Ollama hosts shared by every chat and embedding request
 from dotenv import load_dotenv  # Import dotenv to load environment variables
-from chromadb.api.models.Collection import Collection  # Correct import for Collection type
+from app.handlers.vector_store import VectorStore  # Interface of the collection embeddings are stored in
 from app.LLMs.llm_factory import LLMFactory  # Update import
 from app.utils.logger import get_logger  # Add this import
-from app.LLMs.base_embedding import BaseEmbedding
+from app.LLMs.base_embedding import EMBED_REQUEST_SIZE, BaseEmbedding
 
 load_dotenv()  # Load environment variables from .env file
 
@@ -15,31 +16,34 @@ logger = get_logger(__name__)  # Initialize logger for this module
 class OllamaEmbeddings(BaseEmbedding):
     """Class to handle embedding creation using Ollama."""
 
-    def __init__(self, collection: Collection, default_model: str):
+    def __init__(self, collection: VectorStore, default_model: str):
         super().__init__(collection, default_model)
-        self.client = ollama
+        self.client = default_pool()
         self.chat_handler = LLMFactory.create_llm(os.getenv('DEFAULT_CHAT_PROVIDER'))
         logger.info(f"Initialized OllamaEmbeddings with model: {self.model}")
 
-    def create_embedding(self, content: str) -> bool:
+    def create_embedding(self, content: str, metadata: Optional[dict] = None) -> bool:
         """
         Generate an embedding for the given content and add it to the ChromaDB collection.
 
         Args:
             content (str): The text content to embed and store.
+            metadata (dict, optional): Chunk metadata (source, page, section, tags).
 
         Returns:
             bool: True if embedding was created and stored successfully, False otherwise.
         """
         try:
             if content.strip():  # Skip empty content
-                embedding = self.client.embeddings(model=self.model, prompt=content)["embedding"]  # Generate embedding
-                doc_id = f"doc_{self.collection.count()}"  # Generate unique ID based on current count
+                embedding = self.embed_documents([content])[0]  # Same endpoint as queries and batches
+                chunk_metadata = self.build_metadata(metadata)
+                doc_id = self.chunk_id(content, chunk_metadata.get('source'))  # Stable ID from source and content hash
                 
                 # Add single document with its embedding to the collection
                 self.collection.add(
                     embeddings=[embedding],  # List of embeddings (single item)
                     documents=[content.strip()],  # List of documents (single item)
+                    metadatas=[chunk_metadata],  # List of metadata (single item)
                     ids=[doc_id]  # List of IDs (single item)
                 )
                 return True  # Return True if successful
@@ -48,58 +52,99 @@ class OllamaEmbeddings(BaseEmbedding):
             print(f"Error creating embedding: {str(e)}")  # Log error for debugging
             return False  # Return False if any error occurred
 
-    def search(self, query: str, top_k: int = 2) -> list:
+    def embed_query(self, query: str) -> list:
+        """Embed a search query with the Ollama model, through /api/embed like stored documents."""
+        return self.client.embed(model=self.model, input=query)["embeddings"][0]
+
+    def warm_up(self, keep_alive: Optional[str] = None):
+        """Load the model into Ollama and keep it loaded for `keep_alive` (Ollama's default if None)."""
+        self.client.embed(model=self.model, input="warm-up", keep_alive=keep_alive)
+
+    def search(self, query: str, top_k: int = 2, where: Optional[dict] = None) -> list:
         """
         Search the vector database for the most relevant documents based on the query.
 
         Args:
             query (str): The search query.
             top_k (int, optional): The number of top results to retrieve. Defaults to 2.
+            where (dict, optional): ChromaDB metadata filter narrowing the candidates.
 
         Returns:
             list: A list of relevant context documents.
         """
         logger.debug(f"Searching for: {query}")  # Changed to debug level
-        query_embedding = self.client.embeddings(model=self.model, prompt=query)["embedding"]  # Get query embedding
+        query_embedding = self.embed_query(query)  # Get query embedding
         
         results = self.collection.query(
             query_embeddings=[query_embedding],  # Provide the query embedding
-            n_results=top_k  # Number of results to retrieve
+            n_results=top_k,  # Number of results to retrieve
+            where=where  # Metadata filter pushed down to the index
         )
         
         if results['documents'][0]:  # Check if there are any documents
             return results['documents'][0]  # Return the retrieved documents
         return []  # Return empty list if no documents found 
     
-    def create_embeddings_batch(self, contents: list) -> bool:
+    def embed_documents(self, documents: list) -> list:
+        """
+        Embed documents without storing them, EMBED_REQUEST_SIZE per Ollama request.
+
+        Every Ollama embedding (documents, single chunks and queries) goes through
+        /api/embed, which returns normalized vectors, so stored and query vectors
+        always come from the same endpoint.
+
+        Args:
+            documents (list): Texts to embed.
+
+        Returns:
+            list: One embedding vector per document.
+        """
+        embeddings = []
+        for start in range(0, len(documents), EMBED_REQUEST_SIZE):
+            batch = documents[start:start + EMBED_REQUEST_SIZE]
+            embeddings.extend(self.client.embed(model=self.model, input=batch)["embeddings"])
+        return embeddings
+
+    def create_embeddings_batch(self, contents: list, metadatas: Optional[list] = None) -> bool:
         """
         Generate embeddings for multiple documents and add them to the ChromaDB collection in batch.
+        Contents are sent to Ollama EMBED_REQUEST_SIZE at a time rather than one request each.
 
         Args:
             contents (list): List of text contents to embed and store.
+            metadatas (list, optional): Per-content metadata, aligned with contents.
 
         Returns:
             bool: True if embeddings were created and stored successfully, False otherwise.
         """
         try:
             logger.debug(f"Creating embeddings for {len(contents)} documents")
-            embeddings = []
             ids = []
             documents = []
+            chunk_metadatas = []
+            ingested_at = datetime.now(timezone.utc).isoformat()  # Shared by the whole batch
+            seen_ids = set()
             
             for idx, content in enumerate(contents):
                 if content.strip():# Skip empty content
-                    logger.debug(f"Processing document {idx+1}/{len(contents)}")
-                    embedding = self.client.embeddings(model=self.model, prompt=content)["embedding"]
-                    embeddings.append(embedding)
-                    ids.append(f"doc_{self.collection.count() + idx}")  # Generate unique IDs
+                    chunk_metadata = self.build_metadata(
+                        metadatas[idx] if metadatas else None, ingested_at
+                    )
+                    doc_id = self.chunk_id(content, chunk_metadata.get('source'))  # Stable ID from source and content hash
+                    if doc_id in seen_ids:
+                        continue  # Identical chunk already in this batch
+                    seen_ids.add(doc_id)
+                    ids.append(doc_id)
                     documents.append(content.strip())
+                    chunk_metadatas.append(chunk_metadata)
             
             if documents:  # Only add if we have valid documents
+                embeddings = self.embed_documents(documents)
                 logger.info(f"Adding {len(documents)} embeddings to collection")
                 self.collection.add(
                     embeddings=embeddings,
                     documents=documents,
+                    metadatas=chunk_metadatas,
                     ids=ids
                 )
                 return True
@@ -136,13 +181,14 @@ class OllamaEmbeddings(BaseEmbedding):
         queries = [q.strip() for q in response.split('\n') if q.strip()]
         return queries
     
-    def get_relevant_context(self, queries: list, top_k: int = 2) -> list:
+    def get_relevant_context(self, queries: list, top_k: int = 2, where: Optional[dict] = None) -> list:
         """
         Get relevant context using multiple queries.
 
         Args:
             queries (list): List of search queries.
             top_k (int, optional): Number of top results per query. Defaults to 2.
+            where (dict, optional): ChromaDB metadata filter applied to every query.
 
         Returns:
             list: List of unique relevant contexts.
@@ -150,7 +196,7 @@ class OllamaEmbeddings(BaseEmbedding):
         all_contexts = []
         
         for query in queries:
-            contexts = self.search(query, top_k)  # Use existing search method
+            contexts = self.search(query, top_k, where=where)  # Use existing search method
             all_contexts.extend(contexts)
         
         # Remove duplicates while preserving order
@@ -201,30 +247,4 @@ class OllamaEmbeddings(BaseEmbedding):
             
         except Exception as e:
             logger.error(f"Error analyzing context: {str(e)}")
-            return "Error analyzing context", [] 
-    
-    def list_documents(self) -> list:
-        """
-        List all documents stored in the ChromaDB collection.
-
-        Returns:
-            list: A list of dictionaries containing document IDs and their content.
-        """
-        try:
-            # Get all documents from the collection
-            results = self.collection.get()
-            
-            # Format the results into a list of dictionaries
-            documents = []
-            for doc_id, content in zip(results['ids'], results['documents']):
-                documents.append({
-                    'id': doc_id,
-                    'content': content
-                })
-            
-            logger.info(f"Retrieved {len(documents)} documents from collection")
-            return documents
-            
-        except Exception as e:
-            logger.error(f"Error listing documents: {str(e)}")
-            return [] 
\ No newline at end of file
+            return "Error analyzing context", []
@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterator, List, Optional
+import httpx
+import ollama
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+LATENCY_WINDOW = 256  # Recent latencies kept per host for percentiles
+LATENCY_SMOOTHING = 0.2  # Weight of the newest latency in the moving average
+HOST_ERRORS = (ConnectionError, httpx.TransportError)  # Failures of the host rather than of the request
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class OllamaHost:
+    """One Ollama server: a persistent client plus its load, health and latency."""
+
+    def __init__(self, url: str, client=None):
+        """
+        Initialize the OllamaHost.
+
+        Args:
+            url (str): Base URL of the server
+            client (optional): Client to use instead of an ollama.Client for `url`
+        """
+        self.url = url
+        self.client = client or ollama.Client(host=url)  # Keeps its HTTP connections open between requests
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.probing = False
+        self.latency_ewma: Optional[float] = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until == 0.0
+
+    def stats(self) -> dict:
+        """Load, health and latency (milliseconds) of the host."""
+        latencies = list(self.latencies)
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'errors': self.errors,
+            'latency_ms': {
+                'ewma': None if self.latency_ewma is None else round(self.latency_ewma * 1000, 1),
+                'p50': None if not latencies else round(percentile(latencies, 0.5) * 1000, 1),
+                'p95': None if not latencies else round(percentile(latencies, 0.95) * 1000, 1),
+            },
+        }
+
+class OllamaPool:
+    """
+    Spreads Ollama requests over several servers.
+
+    Offers the chat, generate, embeddings and embed calls of the ollama
+    module, so it can replace it as an embedder's or chat provider's client.
+    Each request goes to the healthy host with the fewest requests in flight.
+    A host failing `max_failures` connections in a row is ejected; once
+    `eject_seconds` have passed it is probed in the background and rejoins
+    when the probe succeeds. Requests failing to connect are retried on
+    another host.
+    """
+
+    def __init__(self, hosts: List[OllamaHost], max_failures: int = 3, eject_seconds: float = 30.0):
+        """
+        Initialize the OllamaPool.
+
+        Args:
+            hosts (List[OllamaHost]): Servers of the pool
+            max_failures (int): Consecutive connection failures that eject a host
+            eject_seconds (float): Time before an ejected host is probed again
+        """
+        if not hosts:
+            raise ValueError("An Ollama pool needs at least one host")
+        self.hosts = hosts
+        self.max_failures = max(1, max_failures)
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "OllamaPool":
+        """Create a pool of OLLAMA_HOSTS (comma-separated), or of OLLAMA_HOST alone."""
+        urls = [url.strip() for url in os.getenv('OLLAMA_HOSTS', '').split(',') if url.strip()]
+        return cls(
+            [OllamaHost(url) for url in urls or [os.getenv('OLLAMA_HOST') or DEFAULT_OLLAMA_HOST]],
+            max_failures=int(os.getenv('OLLAMA_MAX_FAILURES', '3')),
+            eject_seconds=float(os.getenv('OLLAMA_EJECT_SECONDS', '30'))
+        )
+
+    def stats(self) -> List[dict]:
+        """Stats of every host."""
+        return [host.stats() for host in self.hosts]
+
+    def chat(self, **kwargs):
+        return self._request('chat', kwargs)
+
+    def generate(self, **kwargs):
+        return self._request('generate', kwargs)
+
+    def embeddings(self, **kwargs):
+        return self._request('embeddings', kwargs)
+
+    def embed(self, **kwargs):
+        return self._request('embed', kwargs)
+
+    def _request(self, method: str, kwargs: dict):
+        if kwargs.get('stream'):
+            return self._stream(method, kwargs)
+        tried = set()
+        while True:
+            host = self._acquire(tried)
+            started = time.perf_counter()
+            try:
+                response = getattr(host.client, method)(**kwargs)
+            except HOST_ERRORS as e:
+                self._release(host, failed=True)
+                tried.add(host.url)
+                if len(tried) == len(self.hosts):
+                    raise
+                logger.warning(f"Ollama host {host.url} failed ({e}), retrying {method} on another host")
+                continue
+            except Exception:
+                self._release(host, time.perf_counter() - started)  # The request was rejected, the host is fine
+                raise
+            self._release(host, time.perf_counter() - started)
+            return response
+
+    def _stream(self, method: str, kwargs: dict) -> Iterator:
+        """
+        Stream from one host, holding its slot until the stream ends; retried elsewhere until the first chunk.
+
+        The host's latency is the time to the first chunk: the length of a
+        generation says nothing about how loaded the host is.
+        """
+        tried = set()
+        while True:
+            host = self._acquire(tried)
+            started = time.perf_counter()
+            first_chunk = None
+            failed = False
+            try:
+                for chunk in getattr(host.client, method)(**kwargs):
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                    yield chunk
+                return
+            except HOST_ERRORS as e:
+                failed = True
+                tried.add(host.url)
+                if first_chunk is not None or len(tried) == len(self.hosts):
+                    raise
+                logger.warning(f"Ollama host {host.url} failed ({e}), retrying {method} on another host")
+            finally:
+                self._release(host, first_chunk, failed=failed)
+
+    def _acquire(self, tried: set) -> OllamaHost:
+        """Pick the host with the fewest requests in flight, preferring healthy hosts not tried yet."""
+        now = time.monotonic()
+        with self._lock:
+            for host in self.hosts:
+                if not host.healthy and not host.probing and now >= host.ejected_until:
+                    host.probing = True
+                    threading.Thread(target=self._probe, args=(host,), name="ollama-probe", daemon=True).start()
+            candidates = [host for host in self.hosts if host.url not in tried] or self.hosts
+            healthy = [host for host in candidates if host.healthy]
+            if healthy:
+                host = min(healthy, key=lambda host: (host.outstanding, host.latency_ewma or 0.0))
+            else:
+                host = min(candidates, key=lambda host: host.ejected_until)  # All ejected: try the likeliest to recover
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def _release(self, host: OllamaHost, latency: Optional[float] = None, failed: bool = False):
+        """Return the host's slot and record the request's latency (seconds, if known) or failure."""
+        with self._lock:
+            host.outstanding -= 1
+            if failed:
+                host.errors += 1
+                host.consecutive_failures += 1
+                if host.healthy and host.consecutive_failures >= self.max_failures:
+                    host.ejected_until = time.monotonic() + self.eject_seconds
+                    logger.warning(f"Ejected Ollama host {host.url} after {host.consecutive_failures} failures")
+                return
+            host.consecutive_failures = 0
+            if latency is None:
+                return
+            host.latencies.append(latency)
+            host.latency_ewma = latency if host.latency_ewma is None else (
+                LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * host.latency_ewma
+            )
+
+    def _probe(self, host: OllamaHost):
+        """Check an ejected host and let it rejoin the pool if it answers."""
+        try:
+            host.client.list()
+        except Exception as e:
+            with self._lock:
+                host.ejected_until = time.monotonic() + self.eject_seconds
+                host.probing = False
+            logger.info(f"Ollama host {host.url} still unavailable: {e}")
+            return
+        with self._lock:
+            host.ejected_until = 0.0
+            host.consecutive_failures = 0
+            host.probing = False
+        logger.info(f"Ollama host {host.url} is back in the pool")
+
+_default_pool: Optional[OllamaPool] = None
+_default_pool_lock = threading.Lock()
+
+def default_pool() -> OllamaPool:
+    """The process-wide pool of the configured Ollama hosts, created on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = OllamaPool.from_env()
+            logger.info(f"Ollama pool of {[host.url for host in _default_pool.hosts]}")
+        return _default_pool
@@ -0,0 +1,348 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Generator, List, Optional, Tuple
+from app.LLMs.base_llm import BaseLLM
+from app.LLMs.ollama_pool import percentile
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_AUTO_PROVIDERS = "ollama,gemini,openai,groq"
+
+class CircuitBreaker:
+    """
+    Stops routing to a provider that keeps failing.
+
+    Opens after `failure_threshold` consecutive failures, or when at least
+    `min_samples` recent requests failed at `max_error_rate` or more. After
+    `open_seconds` one trial request is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, max_error_rate: float = 0.5,
+                 min_samples: int = 10, open_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def available(self) -> bool:
+        """Whether a request could be sent now."""
+        if self.state == 'open':
+            return time.monotonic() - self.opened_at >= self.open_seconds
+        return self.state == 'closed' or not self._trial_running
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the single trial of a half-open circuit."""
+        if not self.available():
+            return False
+        if self.state != 'closed':
+            self.state = 'half_open'
+            self._trial_running = True
+        return True
+
+    def release(self):
+        """Give back a trial claimed by `allow` without sending a request."""
+        self._trial_running = False
+
+    def record(self, ok: bool, error_rate: float, samples: int):
+        """Update the state after a request, given the provider's recent error rate."""
+        self._trial_running = False
+        if ok:
+            self.consecutive_failures = 0
+            if self.state != 'closed':
+                self.state = 'closed'
+            return
+        self.consecutive_failures += 1
+        if (self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold
+                or (samples >= self.min_samples and error_rate >= self.max_error_rate)):
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+class ProviderStats:
+    """Rolling latency and error rate of one provider."""
+
+    def __init__(self, window: int = 50):
+        self.samples = deque(maxlen=window)  # (seconds, ok) of recent requests
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, seconds: float, ok: bool):
+        self.samples.append((seconds, ok))
+        self.requests += 1
+        self.errors += 0 if ok else 1
+
+    @property
+    def error_rate(self) -> float:
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples) if self.samples else 0.0
+
+    def latency(self, fraction: float) -> Optional[float]:
+        """Percentile of the recent successful latencies, or None if there are none."""
+        return percentile([seconds for seconds, ok in self.samples if ok], fraction)
+
+class ProviderRouter:
+    """
+    Tracks each provider's latency and errors and orders providers for a request.
+
+    Providers are created once through `factory` and reused. Healthy providers
+    are ranked fastest first by rolling median latency; providers without
+    measurements yet are tried first so every provider gets measured.
+    Providers whose circuit is open are skipped.
+    """
+
+    def __init__(self, providers: List[str], factory: Callable[[str], Callable[[], BaseLLM]],
+                 window: int = 50, failure_threshold: int = 3, max_error_rate: float = 0.5,
+                 open_seconds: float = 30.0):
+        """
+        Initialize the ProviderRouter.
+
+        Args:
+            providers (List[str]): Provider names, in order of preference before any are measured
+            factory (callable): Returns the class of a provider name, e.g. LLM_PROVIDERS.resolve
+            window (int): Recent requests per provider used for latency and error rate
+            failure_threshold (int): Consecutive failures that open a circuit
+            max_error_rate (float): Recent error rate that opens a circuit
+            open_seconds (float): Time an open circuit waits before a trial request
+        """
+        if not providers:
+            raise ValueError("The provider router needs at least one provider")
+        self.providers = providers
+        self.factory = factory
+        self.window = window
+        self.breaker_settings = {
+            'failure_threshold': failure_threshold, 'max_error_rate': max_error_rate,
+            'min_samples': min(10, window), 'open_seconds': open_seconds,
+        }
+        self._handlers = {}
+        self._stats = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, factory: Callable[[str], Callable[[], BaseLLM]]) -> "ProviderRouter":
+        """Create a router over LLM_AUTO_PROVIDERS configured with the ROUTER_* variables."""
+        return cls(
+            [name.strip().lower() for name in os.getenv('LLM_AUTO_PROVIDERS', DEFAULT_AUTO_PROVIDERS).split(',') if name.strip()],
+            factory,
+            window=int(os.getenv('ROUTER_WINDOW', '50')),
+            failure_threshold=int(os.getenv('ROUTER_FAILURE_THRESHOLD', '3')),
+            max_error_rate=float(os.getenv('ROUTER_MAX_ERROR_RATE', '0.5')),
+            open_seconds=float(os.getenv('ROUTER_OPEN_SECONDS', '30'))
+        )
+
+    def _entry(self, provider: str):
+        """Stats and circuit of a provider; its handler, and so its model, never changes once created."""
+        if provider not in self._stats:
+            self._stats[provider] = ProviderStats(self.window)
+            self._breakers[provider] = CircuitBreaker(**self.breaker_settings)
+        return self._stats[provider], self._breakers[provider]
+
+    def ranked(self) -> List[str]:
+        """
+        Providers a request may use now: unmeasured ones first, then fastest first, then those only failing.
+
+        Nothing is claimed: claim each provider with `claim` just before trying it.
+
+        Returns:
+            List[str]: Provider names in the order to try them
+        """
+        with self._lock:
+            usable = []
+            for index, provider in enumerate(self.providers):
+                stats, breaker = self._entry(provider)
+                if breaker.available():
+                    median = stats.latency(0.5)
+                    tier = 0 if not stats.samples else 1 if median is not None else 2
+                    usable.append((tier, median or 0.0, index, provider))
+            return [provider for *_, provider in sorted(usable)]
+
+    def claim(self, provider: str) -> bool:
+        """Whether a request may be sent to `provider` now; claims the trial of its half-open circuit."""
+        with self._lock:
+            return self._entry(provider)[1].allow()
+
+    def release(self, provider: str):
+        """Give back a trial claimed with `claim` when no request was sent after all."""
+        with self._lock:
+            self._entry(provider)[1].release()
+
+    def handler(self, provider: str) -> BaseLLM:
+        """The provider's chat handler, created on first use."""
+        if provider not in self._handlers:
+            handler = self.factory(provider)()
+            with self._lock:
+                self._handlers.setdefault(provider, handler)
+        return self._handlers[provider]
+
+    def record(self, provider: str, seconds: float, ok: bool):
+        """Record the outcome of a request sent to `provider`."""
+        with self._lock:
+            stats, breaker = self._entry(provider)
+            stats.record(seconds, ok)
+            was_open = breaker.state == 'open'
+            breaker.record(ok, stats.error_rate, len(stats.samples))
+            if breaker.state == 'open' and not was_open:
+                logger.warning(f"Opened circuit of {provider}: error rate {stats.error_rate:.0%}")
+
+    def stats(self) -> List[dict]:
+        """Latency, error rate and circuit state per provider, with the model of its handler once created."""
+        with self._lock:
+            return [
+                {
+                    'provider': provider,
+                    'model': getattr(self._handlers.get(provider), 'model', None),
+                    'circuit': self._breakers[provider].state,
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'error_rate': round(stats.error_rate, 3),
+                    'latency_ms': {
+                        'p50': None if stats.latency(0.5) is None else round(stats.latency(0.5) * 1000, 1),
+                        'p95': None if stats.latency(0.95) is None else round(stats.latency(0.95) * 1000, 1),
+                    },
+                }
+                for provider, stats in self._stats.items() if stats.requests
+            ]
+
+class RoutedLLM(BaseLLM):
+    """
+    Chat provider that sends each request to the fastest healthy provider of a router.
+
+    A request failing on one provider is retried on the next; a streamed
+    response is only retried until its first chunk. `provider` and `model`
+    name the provider that answered the last request.
+    """
+
+    def __init__(self, router: ProviderRouter, prefer: int = 0, exclude: Tuple[str, ...] = ()):
+        """
+        Initialize the RoutedLLM.
+
+        Args:
+            router (ProviderRouter): Router ranking the providers
+            prefer (int): Rank of the provider tried first, e.g. 1 for the second fastest; the others follow in order
+            exclude (tuple): Providers never sent a request, e.g. the one a hedged request's primary uses
+        """
+        self.router = router
+        self.prefer = prefer
+        self.exclude = exclude
+        self.provider: Optional[str] = next(iter(self._rotated(router.ranked())), None)  # Expected to answer
+        self.model: Optional[str] = None
+
+    def _rotated(self, providers: List[str]) -> List[str]:
+        providers = [provider for provider in providers if provider not in self.exclude]
+        offset = self.prefer % len(providers) if providers else 0
+        return providers[offset:] + providers[:offset]
+
+    def _candidates(self) -> List[str]:
+        providers = self._rotated(self.router.ranked())
+        if not providers:
+            raise RuntimeError("No healthy LLM provider: every circuit is open")
+        return providers
+
+    def _unavailable(self, errors: List[str]) -> RuntimeError:
+        if not errors:  # Every half-open trial was taken by another request
+            return RuntimeError("No healthy LLM provider: every circuit is open")
+        return RuntimeError(f"Every LLM provider failed: {'; '.join(errors)}")
+
+    def _routed(self, call: Callable[[BaseLLM], object]):
+        """Run `call` on the ranked providers until one succeeds, claiming each just before trying it."""
+        errors = []
+        for provider in self._candidates():
+            if not self.router.claim(provider):
+                continue  # Another request is probing its half-open circuit
+            started = time.perf_counter()
+            try:
+                handler = self.router.handler(provider)
+                result = call(handler)
+            except Exception as e:
+                self.router.record(provider, time.perf_counter() - started, ok=False)
+                errors.append(f"{provider}: {e}")
+                logger.warning(f"Provider {provider} failed, trying the next one: {e}")
+                continue
+            except BaseException:
+                self.router.release(provider)
+                raise
+            self.router.record(provider, time.perf_counter() - started, ok=True)
+            self.provider, self.model = provider, handler.model
+            return result
+        raise self._unavailable(errors)
+
+    def generate_response(self, prompt: str, system_prompt: str = None,
+                          model: str = None, max_tokens: int = None) -> str:
+        """Generate a response with the fastest healthy provider; `model` is ignored as it names one provider's model."""
+        return self._routed(lambda handler: handler.generate_response(
+            prompt=prompt, system_prompt=system_prompt, max_tokens=max_tokens
+        ))
+
+    def generate_autocomplete(self, partial_prompt: str, max_tokens: int = 50, model: str = None) -> str:
+        """Complete a partial prompt with the fastest healthy provider; `model` is ignored."""
+        return self._routed(lambda handler: handler.generate_autocomplete(
+            partial_prompt=partial_prompt, max_tokens=max_tokens
+        ))
+
+    def generate_streaming_response(self, prompt: str, system_prompt: str = None, model: str = None,
+                                    max_tokens: int = None) -> Generator[str, None, None]:
+        """
+        Stream a response from the fastest healthy provider.
+
+        The latency recorded for a stream is the time to its first chunk.
+        Providers without streaming answer in one chunk.
+        """
+        errors = []
+        for provider in self._candidates():
+            if not self.router.claim(provider):
+                continue  # Another request is probing its half-open circuit
+            started = time.perf_counter()
+            streamed = False
+            try:
+                handler = self.router.handler(provider)
+                if hasattr(handler, 'generate_streaming_response'):
+                    chunks = handler.generate_streaming_response(prompt, system_prompt=system_prompt, max_tokens=max_tokens)
+                else:
+                    chunks = iter([handler.generate_response(prompt, system_prompt=system_prompt, max_tokens=max_tokens)])
+                for chunk in chunks:
+                    if not streamed:
+                        streamed = True
+                        self._answered(provider, handler, started)
+                    yield chunk
+            except Exception as e:
+                self.router.record(provider, time.perf_counter() - started, ok=False)
+                if streamed:
+                    raise
+                errors.append(f"{provider}: {e}")
+                logger.warning(f"Provider {provider} failed before streaming, trying the next one: {e}")
+                continue
+            except BaseException:
+                if not streamed:
+                    self.router.release(provider)  # Closed by the caller before an answer: nothing to record
+                raise
+            if not streamed:  # An empty response still counts as an answer
+                self._answered(provider, handler, started)
+            return
+        raise self._unavailable(errors)
+
+    def _answered(self, provider: str, handler: BaseLLM, started: float):
+        """Record a stream's first answer, which also ends a half-open trial."""
+        self.router.record(provider, time.perf_counter() - started, ok=True)
+        self.provider, self.model = provider, handler.model
+
+    def warm_up(self, keep_alive: Optional[str] = None):
+        """Create and warm up the preferred provider."""
+        self._routed(lambda handler: handler.warm_up(keep_alive=keep_alive))
+
+_default_router: Optional[ProviderRouter] = None
+_default_router_lock = threading.Lock()
+
+def default_router(factory: Callable[[str], Callable[[], BaseLLM]]) -> ProviderRouter:
+    """The process-wide router used by provider=auto, created on first use with `factory`."""
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = ProviderRouter.from_env(factory)
+            logger.info(f"Routing provider=auto over {_default_router.providers}")
+        return _default_router
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException  # Import necessary FastAPI components
 from typing import Optional  # Add this import at the top
 from pydantic import BaseModel  # Import BaseModel for request validation
+from app.LLMs.hedging import hedging_enabled
 from app.LLMs.llm_factory import LLMFactory  # Add this import
 from app.utils.logger import get_logger  # Add this import
 
@@ -17,6 +18,7 @@ class ChatRequest(BaseModel):
     model: Optional[str] = None  # Optional model override
     max_tokens: Optional[int] = None  # Optional max tokens override
     provider: Optional[str] = None  # Remove default to use factory default
+    hedge: Optional[bool] = None  # Duplicate a slow request to a secondary (default: HEDGE_REQUESTS)
 
 class ChatResponse(BaseModel):
     response: str  # The generated chat response
@@ -43,7 +45,7 @@ def chat_response(request: ChatRequest):
     """
     try:
         # Get LLM provider with chat defaults
-        llm = LLMFactory.create_llm(request.provider, operation="chat")
+        llm = LLMFactory.create_llm(request.provider, operation="chat", hedge=hedging_enabled(request.hedge))
         logger.debug(f"Using provider: {type(llm).__name__} for chat")
         
         response = llm.generate_response(
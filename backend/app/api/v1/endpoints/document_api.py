@@ -1,12 +1,22 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Tuple
 from pydantic import BaseModel
-import fitz  # PyMuPDF
-import PyPDF2
-import io
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
 import os
-from app.models import Document  # Your Document model
-from app.api.v1.endpoints.ollama_embedding_api import embedder  # Import the existing embedder
+import tempfile
+import time
+from app.models import Document, IngestionRecord  # Your Document model
+from app.dependencies import get_embedder, get_registry
+from app.handlers.corpus_ingester import CorpusIngester
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.utils.uploads import (
+    ARCHIVE_EXTENSIONS, InvalidArchiveError, UploadTooLargeError, extract_archive, remove_spool_file, spool_upload
+)
+from app.utils.document_extraction import PDF_EXTENSIONS, TEXT_EXTENSIONS, extract_text_from_pdf
+from app.utils.simhash import MAX_HAMMING_DISTANCE, get_near_duplicate_distance
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,182 +26,632 @@ router = APIRouter(
     tags=["documents"]  # Tagging for documentation purposes
 )
 
+CHUNKING_STRATEGIES = ("structured", "fixed")
+
 class PDFUploadResponse(BaseModel):
     success: bool
     message: str
     chunks_processed: int
     total_pages: int
+    duplicate: bool = False  # True when the file was already ingested and skipped
+    ingestion: Optional[IngestionRecord] = None  # Registry record of the file
+    chunk_stats: Optional[dict] = None  # Chunk count and size statistics
+    near_duplicates_dropped: int = 0  # Chunks skipped as near-duplicates of stored chunks
+
+class ArchiveFileResult(BaseModel):
+    source: str  # Path of the file inside the archive
+    status: Literal["ingested", "skipped", "failed"]  # 'skipped' if the file was already ingested
+    chunks_processed: int = 0
+    near_duplicates_dropped: int = 0
+    total_pages: int = 0
+    error: Optional[str] = None
+
+class ArchiveUploadResponse(BaseModel):
+    success: bool
+    message: str
+    files: List[ArchiveFileResult]  # Per-file results, in archive order
+    files_ingested: int
+    files_skipped: int
+    files_failed: int
+    chunks_processed: int
+    tokens_processed: int
+    elapsed_seconds: float
+    chunks_per_second: float
+    tokens_per_second: float
+
+class DocumentDeleteResponse(BaseModel):
+    success: bool
+    source: str
+    chunks_deleted: int
+
+class DocumentReplaceResponse(BaseModel):
+    success: bool
+    message: str
+    source: str
+    chunks_added: int
+    chunks_removed: int
+    chunks_unchanged: int
+    total_pages: int
+    chunk_stats: Optional[dict] = None  # Chunk count and size statistics
+    near_duplicates_dropped: int = 0  # Chunks skipped as near-duplicates of stored chunks
 
-@router.get("/", response_model=List[Document])
-async def list_documents():
+@router.get("/", response_model=List[Document], response_model_exclude_none=True)
+async def list_documents(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of documents to return"),
+    offset: int = Query(0, ge=0, description="Number of documents to skip (use X-Next-Offset to continue)"),
+    fields: Literal["full", "ids"] = Query("full", description="'ids' returns document IDs only"),
+    max_chars: Optional[int] = Query(None, ge=1, description="Truncate returned content to this many characters"),
+    include_metadata: bool = Query(False, description="Include chunk metadata"),
+    embedder=Depends(get_embedder)
+):
     """
-    Retrieve all documents from the ChromaDB collection.
+    Retrieve one page of documents from the ChromaDB collection.
+
+    The offset of the next page is returned in the X-Next-Offset header
+    (absent on the last page) and the collection size in X-Total-Count.
 
     Returns:
-        List[Document]: A list of Document objects containing IDs and content.
+        List[Document]: A list of Document objects containing IDs and the projected fields.
     """
     try:
-        documents = embedder.list_documents()  # Fetch documents using the existing embedder
-        return documents  # Return the list of documents
+        documents = embedder.list_documents(
+            limit=limit,
+            offset=offset,
+            include_content=fields == "full",
+            max_content_chars=max_chars,
+            include_metadata=include_metadata
+        )  # Fetch one page using the existing embedder
+        total = embedder.collection.count()
+        response.headers["X-Total-Count"] = str(total)
+        if offset + len(documents) < total:
+            response.headers["X-Next-Offset"] = str(offset + len(documents))
+        return documents  # Return the page of documents
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))  # Raise HTTP exception on error
 
+@router.get("/export")
+async def export_documents(
+    batch_size: int = Query(500, ge=1, le=5000, description="Documents read from the collection per batch"),
+    fields: Literal["full", "ids"] = Query("full", description="'ids' exports document IDs only"),
+    max_chars: Optional[int] = Query(None, ge=1, description="Truncate exported content to this many characters"),
+    include_metadata: bool = Query(True, description="Include chunk metadata"),
+    embedder=Depends(get_embedder)
+):
+    """
+    Stream every document in the collection as newline-delimited JSON.
+
+    The collection is read incrementally in `batch_size` pages, so memory use
+    stays bounded by one batch regardless of collection size. A collection that
+    cannot be read returns a 500; a read failing after the first batch aborts
+    the stream, so a truncated export is never mistaken for a complete one.
+
+    Returns:
+        StreamingResponse: One JSON document per line (application/x-ndjson)
+    """
+    documents = embedder.iter_documents(
+        batch_size=batch_size,
+        include_content=fields == "full",
+        max_content_chars=max_chars,
+        include_metadata=include_metadata
+    )
+    try:
+        first = next(documents, None)  # Read the first batch before the 200 is sent
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def generate_lines():
+        if first is None:
+            return
+        yield json.dumps(first) + "\n"
+        try:
+            for document in documents:
+                yield json.dumps(document) + "\n"
+        except Exception as e:
+            logger.error(f"Aborting document export: {str(e)}")
+            raise
+
+    return StreamingResponse(
+        generate_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="documents.ndjson"'}
+    )
+
 @router.post("/upload-pdf", response_model=PDFUploadResponse)
 async def upload_pdf(
     file: UploadFile = File(...),
-    chunk_size: Optional[int] = Form(1000),  # Characters per chunk
-    overlap: Optional[int] = Form(200)  # Overlap between chunks
+    chunk_size: Optional[int] = Form(1000),  # Characters per chunk (fixed chunking)
+    overlap: Optional[int] = Form(200),  # Overlap between chunks (fixed chunking)
+    tags: Optional[str] = Form(None),  # Comma-separated tags stored with each chunk
+    chunking: Optional[str] = Form("structured"),  # 'structured' or 'fixed'
+    max_tokens: Optional[int] = Form(256),  # Token budget per chunk (structured chunking)
+    overlap_tokens: Optional[int] = Form(0),  # Overlap within a split section (structured chunking)
+    dedup_distance: Optional[int] = Form(None),  # Near-duplicate SimHash distance in bits; negative disables
+    embedder=Depends(get_embedder),
+    registry: IngestionRegistry = Depends(get_registry)
 ):
     """
     Upload and process a PDF file, extracting text and creating embeddings.
+    Each chunk is stored with its source filename, page number and section heading.
+    Files whose SHA-256 is already in the ingestion registry are not processed again,
+    and chunks that are near-duplicates of chunks already in the collection are skipped.
+    The upload is streamed to a temporary spool file, so memory use does not grow with file size.
     
     Args:
         file: The PDF file to upload
-        chunk_size: Number of characters per text chunk
-        overlap: Number of characters to overlap between chunks
+        chunk_size: Number of characters per text chunk (fixed chunking)
+        overlap: Number of characters to overlap between chunks (fixed chunking)
+        tags: Optional comma-separated tags stored with each chunk
+        chunking: 'structured' (layout-aware, token-sized) or 'fixed' (character windows)
+        max_tokens: Token budget per chunk (structured chunking)
+        overlap_tokens: Tokens repeated when a section spans chunks (structured chunking)
+        dedup_distance: Largest SimHash distance (0-7 bits) at which a chunk counts as a
+            near-duplicate; defaults to NEAR_DUPLICATE_MAX_DISTANCE, negative disables
         
     Returns:
         PDFUploadResponse: Processing results
     """
+    pdf_path = None
     try:
-        # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="File must be a PDF")
-        
-        # Read file content
-        content = await file.read()
-        logger.info(f"Processing PDF: {file.filename}, size: {len(content)} bytes")
+        pdf_path, size_bytes, sha256 = await spool_pdf_upload(file)
         
-        # Extract text from PDF
-        text_chunks = extract_text_from_pdf(content, chunk_size, overlap)
+        def ingest() -> PDFUploadResponse:
+            # Short-circuit files that were already ingested into this collection
+            existing = registry.get(sha256, embedder.collection.name)
+            if existing:
+                logger.info(f"Skipping {file.filename}: identical to {existing['source']} ingested at {existing['ingested_at']}")
+                return PDFUploadResponse(
+                    success=True,
+                    message=f"File already ingested as {existing['source']}",
+                    chunks_processed=existing['chunks'],
+                    total_pages=existing['total_pages'],
+                    duplicate=True,
+                    ingestion=IngestionRecord(**existing)
+                )
         
-        if not text_chunks:
-            raise HTTPException(status_code=400, detail="No text could be extracted from PDF")
+            text_chunks, chunk_metadatas, total_pages, chunk_stats = extract_upload_chunks(
+                pdf_path, chunk_size, overlap, tags, source=file.filename,
+                chunking=chunking, max_tokens=max_tokens, overlap_tokens=overlap_tokens
+            )
+            text_chunks, chunk_metadatas, fingerprints, dropped = drop_near_duplicates(
+                embedder, registry, text_chunks, chunk_metadatas, file.filename, dedup_distance
+            )
         
-        # Create embeddings for each chunk
-        success = embedder.create_embeddings_batch(text_chunks)
+            # Create embeddings for each chunk
+            if text_chunks:
+                success = embedder.create_embeddings_batch(text_chunks, metadatas=chunk_metadatas)
+            
+                if not success:
+                    raise HTTPException(status_code=500, detail="Failed to create embeddings")
+                registry.add_fingerprints(embedder.collection.name, file.filename, fingerprints)
         
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to create embeddings")
+            logger.info(f"Successfully processed {len(text_chunks)} chunks from PDF ({dropped} near-duplicates dropped)")
         
-        logger.info(f"Successfully processed {len(text_chunks)} chunks from PDF")
+            record = registry.record(
+                sha256=sha256,
+                collection=embedder.collection.name,
+                source=file.filename,
+                size_bytes=size_bytes,
+                chunks=len(text_chunks),
+                total_pages=total_pages,
+                embedding_model=embedder.model
+            )
         
-        return PDFUploadResponse(
-            success=True,
-            message=f"Successfully processed PDF with {len(text_chunks)} chunks",
-            chunks_processed=len(text_chunks),
-            total_pages=len(text_chunks)  # Approximate page count
-        )
+            return PDFUploadResponse(
+                success=True,
+                message=f"Successfully processed PDF with {len(text_chunks)} chunks ({dropped} near-duplicates dropped)",
+                chunks_processed=len(text_chunks),
+                total_pages=total_pages,
+                ingestion=IngestionRecord(**record),
+                chunk_stats=chunk_stats,
+                near_duplicates_dropped=dropped
+            )
+
+        # Extraction and embedding block, so they run off the event loop
+        return await asyncio.to_thread(ingest)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spool_file(pdf_path)
 
-def extract_text_from_pdf(pdf_content: bytes, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+@router.post("/upload-archive", response_model=ArchiveUploadResponse)
+async def upload_archive(
+    file: UploadFile = File(...),
+    workers: Optional[int] = Form(None),  # Files processed concurrently (default ARCHIVE_WORKERS)
+    tags: Optional[str] = Form(None),  # Comma-separated tags stored with each chunk
+    chunking: Optional[str] = Form("structured"),  # 'structured' or 'fixed' (PDFs)
+    chunk_size: Optional[int] = Form(1000),  # Characters per chunk (fixed chunking)
+    overlap: Optional[int] = Form(200),  # Overlap between chunks (fixed chunking)
+    max_tokens: Optional[int] = Form(256),  # Token budget per chunk (structured chunking)
+    overlap_tokens: Optional[int] = Form(0),  # Overlap within a split section (structured chunking)
+    dedup_distance: Optional[int] = Form(None),  # Near-duplicate SimHash distance in bits; negative disables
+    embedder=Depends(get_embedder),
+    registry: IngestionRegistry = Depends(get_registry)
+):
     """
-    Extract text from PDF content and split into chunks.
+    Upload a zip or tar archive and ingest the PDF, text and Markdown files it contains.
+    Files are processed concurrently by a bounded number of workers, each file's chunks
+    are embedded in batches, and files already in the ingestion registry are skipped.
+    Chunks are stored with the file's path inside the archive as their source.
     
     Args:
-        pdf_content: Raw PDF file content
-        chunk_size: Number of characters per chunk
-        overlap: Number of characters to overlap between chunks
+        file: The .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz archive
+        workers: Number of files processed concurrently (1-16)
+        tags: Optional comma-separated tags stored with each chunk
+        chunking: 'structured' (layout-aware, token-sized) or 'fixed' (character windows)
+        chunk_size: Number of characters per text chunk (fixed chunking)
+        overlap: Number of characters to overlap between chunks (fixed chunking)
+        max_tokens: Token budget per chunk (structured chunking)
+        overlap_tokens: Tokens repeated when a section spans chunks (structured chunking)
+        dedup_distance: Largest SimHash distance (0-7 bits) at which a chunk counts as a
+            near-duplicate; defaults to NEAR_DUPLICATE_MAX_DISTANCE, negative disables
         
     Returns:
-        List of text chunks
+        ArchiveUploadResponse: Per-file results and aggregate throughput
     """
+    if not file.filename.lower().endswith(ARCHIVE_EXTENSIONS):
+        raise HTTPException(status_code=400, detail=f"File must be an archive ({', '.join(ARCHIVE_EXTENSIONS)})")
+    if chunking not in CHUNKING_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"chunking must be one of {CHUNKING_STRATEGIES}")
+    workers = workers or int(os.getenv('ARCHIVE_WORKERS', '4'))
+    if not 1 <= workers <= 16:
+        raise HTTPException(status_code=400, detail="workers must be between 1 and 16")
+    dedup_distance = get_near_duplicate_distance() if dedup_distance is None else dedup_distance
+    if dedup_distance > MAX_HAMMING_DISTANCE:
+        raise HTTPException(status_code=400, detail=f"dedup_distance must be at most {MAX_HAMMING_DISTANCE}")
+    
+    archive_path = None
     try:
-        # Try PyMuPDF first (better text extraction)
         try:
-            doc = fitz.open(stream=pdf_content, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-        except Exception as e:
-            logger.warning(f"PyMuPDF failed, trying PyPDF2: {str(e)}")
-            # Fallback to PyPDF2
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+            archive_path, size_bytes, _sha256 = await spool_upload(file, suffix=os.path.splitext(file.filename)[1])
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        logger.info(f"Processing archive: {file.filename}, size: {size_bytes} bytes")
         
-        # Clean and normalize text
-        text = clean_text(text)
-        
-        if not text.strip():
-            logger.warning("No text extracted from PDF")
-            return []
+        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()] if tags else []
+        started = time.perf_counter()
+        results, ingester_stats = await asyncio.to_thread(
+            ingest_archive, embedder, registry, archive_path, workers,
+            dedup_distance=dedup_distance, tags=tag_list, strategy=chunking,
+            chunk_size=chunk_size, overlap=overlap, max_tokens=max_tokens, overlap_tokens=overlap_tokens
+        )
+        elapsed = time.perf_counter() - started
         
-        # Split text into chunks
-        chunks = split_text_into_chunks(text, chunk_size, overlap)
+        counts = {status: sum(1 for result in results if result.status == status)
+                  for status in ("ingested", "skipped", "failed")}
+        return ArchiveUploadResponse(
+            success=counts["failed"] == 0,
+            message=f"Ingested {counts['ingested']} files ({counts['skipped']} already ingested, {counts['failed']} failed)",
+            files=results,
+            files_ingested=counts["ingested"],
+            files_skipped=counts["skipped"],
+            files_failed=counts["failed"],
+            chunks_processed=ingester_stats['chunks'],
+            tokens_processed=ingester_stats['tokens'],
+            elapsed_seconds=round(elapsed, 3),
+            chunks_per_second=round(ingester_stats['chunks'] / elapsed, 1) if elapsed else 0.0,
+            tokens_per_second=round(ingester_stats['tokens'] / elapsed, 1) if elapsed else 0.0
+        )
         
-        logger.info(f"Extracted {len(chunks)} chunks from PDF")
-        return chunks
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing archive: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spool_file(archive_path)
+
+@router.delete("/sources/{source:path}", response_model=DocumentDeleteResponse)
+async def delete_document(
+    source: str,
+    embedder=Depends(get_embedder),
+    registry: IngestionRegistry = Depends(get_registry)
+):
+    """
+    Delete every chunk of a source document.
+    
+    Args:
+        source: Source document name (the uploaded filename)
         
+    Returns:
+        DocumentDeleteResponse: Number of chunks deleted
+    """
+    try:
+        chunks_deleted = embedder.delete_document(source)
+        registry.remove_source(source, embedder.collection.name)
+        if not chunks_deleted:
+            raise HTTPException(status_code=404, detail=f"No chunks found for source: {source}")
+        return DocumentDeleteResponse(success=True, source=source, chunks_deleted=chunks_deleted)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error extracting text from PDF: {str(e)}")
-        return []
+        logger.error(f"Error deleting document {source}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-def clean_text(text: str) -> str:
+@router.put("/sources/{source:path}", response_model=DocumentReplaceResponse)
+async def replace_document(
+    source: str,
+    file: UploadFile = File(...),
+    chunk_size: Optional[int] = Form(1000),  # Characters per chunk (fixed chunking)
+    overlap: Optional[int] = Form(200),  # Overlap between chunks (fixed chunking)
+    tags: Optional[str] = Form(None),  # Comma-separated tags stored with each new chunk
+    chunking: Optional[str] = Form("structured"),  # 'structured' or 'fixed'
+    max_tokens: Optional[int] = Form(256),  # Token budget per chunk (structured chunking)
+    overlap_tokens: Optional[int] = Form(0),  # Overlap within a split section (structured chunking)
+    dedup_distance: Optional[int] = Form(None),  # Near-duplicate SimHash distance in bits; negative disables
+    embedder=Depends(get_embedder),
+    registry: IngestionRegistry = Depends(get_registry)
+):
     """
-    Clean and normalize extracted text.
+    Replace a source document with a new PDF revision, re-indexing incrementally.
+    Only chunks whose content changed are embedded; unchanged chunks are kept
+    and chunks missing from the new revision are deleted.
     
     Args:
-        text: Raw extracted text
+        source: Source document name to replace
+        file: The new PDF revision
+        chunk_size: Number of characters per text chunk (fixed chunking)
+        overlap: Number of characters to overlap between chunks (fixed chunking)
+        tags: Optional comma-separated tags stored with each new chunk
+        chunking: 'structured' (layout-aware, token-sized) or 'fixed' (character windows)
+        max_tokens: Token budget per chunk (structured chunking)
+        overlap_tokens: Tokens repeated when a section spans chunks (structured chunking)
+        dedup_distance: Largest SimHash distance (0-7 bits) at which a chunk counts as a
+            near-duplicate; defaults to NEAR_DUPLICATE_MAX_DISTANCE, negative disables
         
     Returns:
-        Cleaned text
+        DocumentReplaceResponse: Re-index statistics
     """
-    # Remove excessive whitespace
-    text = ' '.join(text.split())
+    pdf_path = None
+    try:
+        pdf_path, size_bytes, sha256 = await spool_pdf_upload(file)
+        def reindex() -> DocumentReplaceResponse:
+            text_chunks, chunk_metadatas, total_pages, chunk_stats = extract_upload_chunks(
+                pdf_path, chunk_size, overlap, tags, source=source,
+                chunking=chunking, max_tokens=max_tokens, overlap_tokens=overlap_tokens
+            )
+            # Chunks of the revision being replaced do not count as duplicates
+            text_chunks, chunk_metadatas, fingerprints, dropped = drop_near_duplicates(
+                embedder, registry, text_chunks, chunk_metadatas, source, dedup_distance, exclude_source=source
+            )
+        
+            stats = embedder.replace_document(source, text_chunks, metadatas=chunk_metadatas)
+        
+            # The registry now points at the new revision only
+            registry.remove_source(source, embedder.collection.name)
+            registry.add_fingerprints(embedder.collection.name, source, fingerprints)
+            registry.record(
+                sha256=sha256,
+                collection=embedder.collection.name,
+                source=source,
+                size_bytes=size_bytes,
+                chunks=len(text_chunks),
+                total_pages=total_pages,
+                embedding_model=embedder.model
+            )
+        
+            return DocumentReplaceResponse(
+                success=True,
+                message=f"Re-indexed {source}: {stats['added']} added, {stats['removed']} removed, {stats['unchanged']} unchanged",
+                source=source,
+                chunks_added=stats['added'],
+                chunks_removed=stats['removed'],
+                chunks_unchanged=stats['unchanged'],
+                total_pages=total_pages,
+                chunk_stats=chunk_stats,
+                near_duplicates_dropped=dropped
+            )
+
+        # Extraction and embedding block, so they run off the event loop
+        return await asyncio.to_thread(reindex)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error replacing document {source}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        remove_spool_file(pdf_path)
+
+@router.get("/ingestions", response_model=List[IngestionRecord])
+async def list_ingestions(
+    source: Optional[str] = Query(None, description="Only return ingestions of this source document"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+    embedder=Depends(get_embedder),
+    registry: IngestionRegistry = Depends(get_registry)
+):
+    """
+    List ingested files from the ingestion registry, newest first.
     
-    # Remove common PDF artifacts
-    text = text.replace('\x00', '')  # Remove null bytes
-    text = text.replace('\r', ' ')   # Replace carriage returns
-    text = text.replace('\n', ' ')   # Replace newlines with spaces
+    Returns:
+        List[IngestionRecord]: Ingestion records of the current collection
+    """
+    try:
+        return registry.list_records(source=source, collection=embedder.collection.name, limit=limit, offset=offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingestions/{sha256}", response_model=IngestionRecord)
+async def get_ingestion(
+    sha256: str,
+    embedder=Depends(get_embedder),
+    registry: IngestionRegistry = Depends(get_registry)
+):
+    """
+    Look up a file's ingestion record by its SHA-256 fingerprint.
     
-    # Remove multiple spaces
-    import re
-    text = re.sub(r'\s+', ' ', text)
+    Returns:
+        IngestionRecord: The ingestion record
+    """
+    record = registry.get(sha256.lower(), embedder.collection.name)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"No ingestion found for {sha256}")
+    return record
+
+@router.get("/watcher")
+async def get_watcher_status(request: Request):
+    """
+    Report the state of the watched-directory ingestion (enabled with WATCH_DIRECTORY).
     
-    return text.strip()
+    Returns:
+        dict: Watched directory, whether it is running, sync count and the last sync's result
+    """
+    watcher = getattr(request.app.state, "watcher", None)
+    if watcher is None:
+        raise HTTPException(status_code=404, detail="Directory watching is not enabled (set WATCH_DIRECTORY)")
+    return watcher.status
 
-def split_text_into_chunks(text: str, chunk_size: int, overlap: int) -> List[str]:
+async def spool_pdf_upload(file: UploadFile) -> Tuple[str, int, str]:
     """
-    Split text into overlapping chunks.
+    Validate an uploaded PDF and stream it to a temporary spool file.
     
     Args:
-        text: Text to split
-        chunk_size: Size of each chunk
-        overlap: Overlap between chunks
+        file: The uploaded PDF file
         
     Returns:
-        List of text chunks
+        Tuple of (spool file path, size in bytes, hex SHA-256); the caller deletes the file
+        
+    Raises:
+        HTTPException: 400 if the file is not a PDF, 413 if it exceeds MAX_UPLOAD_SIZE_MB
     """
-    if len(text) <= chunk_size:
-        return [text] if text.strip() else []
+    # Validate file type
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
     
-    chunks = []
-    start = 0
+    try:
+        pdf_path, size_bytes, sha256 = await spool_upload(file, suffix='.pdf')
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    logger.info(f"Processing PDF: {file.filename}, size: {size_bytes} bytes")
+    return pdf_path, size_bytes, sha256
+
+def ingest_archive(embedder, registry: IngestionRegistry, archive_path: str, workers: int,
+                   **ingest_options) -> Tuple[List[ArchiveFileResult], dict]:
+    """
+    Extract an archive into a temporary directory and ingest its files concurrently.
     
-    while start < len(text):
-        end = start + chunk_size
+    Args:
+        embedder: Embedding provider storing the chunks
+        registry: Ingestion registry recording the files
+        archive_path: Path of the spooled archive
+        workers: Number of files processed concurrently
+        **ingest_options: Options passed to CorpusIngester
+        
+    Returns:
+        Tuple of (per-file results in archive order, ingester statistics)
+    """
+    with tempfile.TemporaryDirectory(prefix="archive_", dir=os.getenv('UPLOAD_SPOOL_DIR') or None) as directory:
+        sources = extract_archive(archive_path, directory, PDF_EXTENSIONS + TEXT_EXTENSIONS)
+        with ThreadPoolExecutor(workers) as extract_pool, \
+                ThreadPoolExecutor(workers) as embed_pool, \
+                ThreadPoolExecutor(workers) as file_pool:
+            ingester = CorpusIngester(embedder, registry, extract_pool, embed_pool, **ingest_options)
+            futures = [
+                file_pool.submit(ingester.ingest_file, os.path.join(directory, *source.split('/')), source)
+                for source in sources
+            ]
+            results = []
+            for source, future in zip(sources, futures):
+                try:
+                    outcome = future.result()
+                    results.append(ArchiveFileResult(
+                        source=source,
+                        status=outcome['status'],
+                        chunks_processed=outcome.get('chunks', 0),
+                        near_duplicates_dropped=outcome.get('near_duplicates', 0),
+                        total_pages=outcome.get('total_pages', 0)
+                    ))
+                except Exception as e:
+                    logger.error(f"Failed to ingest {source} from archive: {str(e)}")
+                    results.append(ArchiveFileResult(source=source, status="failed", error=str(e)))
+    return results, ingester.stats
+
+def extract_upload_chunks(pdf_path: str, chunk_size: int, overlap: int,
+                          tags: Optional[str], source: str, chunking: str = "structured",
+                          max_tokens: int = 256, overlap_tokens: int = 0) -> Tuple[List[str], List[dict], int, dict]:
+    """
+    Extract the chunks of an uploaded PDF together with their metadata.
+    
+    Args:
+        pdf_path: Path of the spooled PDF file
+        chunk_size: Number of characters per chunk (fixed chunking)
+        overlap: Number of characters to overlap between chunks (fixed chunking)
+        tags: Optional comma-separated tags stored with each chunk
+        source: Source name stored in the chunk metadata
+        chunking: 'structured' or 'fixed'
+        max_tokens: Token budget per chunk (structured chunking)
+        overlap_tokens: Tokens repeated when a section spans chunks (structured chunking)
+        
+    Returns:
+        Tuple of (text chunks, per-chunk metadata, total page count, chunk statistics)
         
-        # Try to break at word boundary
-        if end < len(text):
-            # Look for the last space before the end
-            last_space = text.rfind(' ', start, end)
-            if last_space > start:
-                end = last_space
+    Raises:
+        HTTPException: If the chunking strategy is unknown or the PDF contains no text
+    """
+    if chunking not in CHUNKING_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"chunking must be one of {CHUNKING_STRATEGIES}")
+    
+    # Extract text from PDF
+    text_chunks, chunk_metadatas, total_pages, chunk_stats = extract_text_from_pdf(
+        pdf_path, chunk_size, overlap, source=source,
+        strategy=chunking, max_tokens=max_tokens, overlap_tokens=overlap_tokens
+    )
+    
+    if not text_chunks:
+        raise HTTPException(status_code=400, detail="No text could be extracted from PDF")
+    
+    # Attach upload tags to every chunk
+    tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()] if tags else []
+    for metadata in chunk_metadatas:
+        metadata['tags'] = tag_list
+    
+    return text_chunks, chunk_metadatas, total_pages, chunk_stats
+
+def drop_near_duplicates(embedder, registry: IngestionRegistry, text_chunks: List[str],
+                         chunk_metadatas: List[dict], source: str, max_distance: Optional[int] = None,
+                         exclude_source: Optional[str] = None) -> Tuple[List[str], List[dict], List[Tuple[str, int]], int]:
+    """
+    Skip chunks that are near-duplicates of chunks already in the collection or earlier in the upload.
+    
+    Chunks are compared by 64-bit SimHash over word shingles; a chunk within
+    `max_distance` bits of a stored chunk (looked up in the ingestion registry
+    across the whole collection) or of a chunk kept earlier in this upload is
+    dropped, so repeated boilerplate such as safety notes is embedded once.
+    
+    Args:
+        embedder: Embedding provider the chunks will be stored with
+        registry: Ingestion registry holding the stored fingerprints
+        text_chunks: Extracted chunks
+        chunk_metadatas: Per-chunk metadata, aligned with text_chunks
+        source: Source name the chunks will be stored under
+        max_distance: Largest Hamming distance counted as a duplicate. Defaults to
+            NEAR_DUPLICATE_MAX_DISTANCE; negative disables dropping.
+        exclude_source: Ignore stored chunks of this source
         
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
+    Returns:
+        Tuple of (kept chunks, kept metadata, (chunk ID, fingerprint) of kept chunks, number dropped)
         
-        # Move start position with overlap
-        start = end - overlap
-        if start >= len(text):
-            break
+    Raises:
+        HTTPException: 400 if max_distance exceeds what the fingerprint index can search
+    """
+    max_distance = get_near_duplicate_distance() if max_distance is None else max_distance
+    if max_distance > MAX_HAMMING_DISTANCE:
+        raise HTTPException(status_code=400, detail=f"dedup_distance must be at most {MAX_HAMMING_DISTANCE}")
     
-    return chunks
\ No newline at end of file
+    kept = registry.filter_near_duplicates(
+        embedder.collection.name, text_chunks, max_distance, exclude_source=exclude_source
+    )
+    kept_chunks = [text_chunks[index] for index, _ in kept]
+    kept_metadatas = [chunk_metadatas[index] for index, _ in kept]
+    fingerprints = [(embedder.chunk_id(text_chunks[index], source), fingerprint) for index, fingerprint in kept]
+    return kept_chunks, kept_metadatas, fingerprints, len(text_chunks) - len(kept)
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from app.LLMs.hedging import hedging_enabled
 from app.LLMs.llm_factory import LLMFactory
-from app.LLMs.embedding_factory import EmbeddingFactory
-from app.handlers.db_handler import DatabaseHandler
+from app.dependencies import AppResources, get_resources
 from app.utils.logger import get_logger
-import os
 from dotenv import load_dotenv
 from app.handlers.context_handler import ContextHandler
+from app.models import MetadataFilter
+from app.utils.streaming import GenerationCancelled, iterate_in_thread, stream_stats, watch_disconnect
+import asyncio
 import json
+import threading
 
 load_dotenv()
 logger = get_logger(__name__)
@@ -19,32 +22,35 @@ router = APIRouter(
     tags=["document-chat"]
 )
 
-# Initialize handlers
-try:
-    db_handler = DatabaseHandler()
-    # Use LLMFactory instead of direct OllamaChat instantiation
-    chat_handler = LLMFactory.create_llm(os.getenv('DEFAULT_CHAT_PROVIDER'))
-    embedder = EmbeddingFactory.create_embedder(
-        provider=os.getenv('DEFAULT_EMBEDDING_PROVIDER'),
-        collection=db_handler.collection
-    )
-except Exception as e:
-    logger.error(f"Error initializing handlers: {str(e)}")
-    raise
-
 class DocumentChatRequest(BaseModel):
     messages: List[dict]  # Chat history
     top_k: Optional[int] = 5  # Number of relevant contexts to retrieve
     model: Optional[str] = None  # Optional model override
     provider: Optional[str] = None  # Add provider field
+    filters: Optional[MetadataFilter] = None  # Optional metadata filter (document, page range, tags)
+    collections: Optional[List[str]] = None  # Named collections searched together ("default" is the main one)
+    hedge: Optional[bool] = None  # Duplicate a slow request to a secondary (default: HEDGE_REQUESTS)
 
 class DocumentChatResponse(BaseModel):
     response: str  # The generated chat response
     contexts: List[str]  # The relevant document contexts used
     provider: str  # Add provider field to show which LLM was used
 
+def provider_name(chat_handler) -> str:
+    """Provider reported to the client; a routed handler names the provider it chose."""
+    return getattr(chat_handler, 'provider', None) or type(chat_handler).__name__.replace('Chat', '').lower()
+
+def get_searcher(request: DocumentChatRequest, resources: AppResources):
+    """Searcher of the request's collections; 404 for an unknown collection, 400 for an invalid name."""
+    try:
+        return resources.searcher_for(collections=request.collections)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/document-chat", response_model=DocumentChatResponse)
-async def document_chat(request: DocumentChatRequest):
+async def document_chat(request: DocumentChatRequest, resources: AppResources = Depends(get_resources)):
     """
     Generate a chat response based on document context and chat history.
     Uses a multi-query approach with context analysis for better results.
@@ -55,9 +61,10 @@ async def document_chat(request: DocumentChatRequest):
     Returns:
         DocumentChatResponse: AI response, relevant document contexts, and provider used
     """
+    embedder = get_searcher(request, resources)
     try:
         # Get chat handler for requested provider or use default
-        chat_handler = LLMFactory.create_llm(request.provider, operation="chat")
+        chat_handler = LLMFactory.create_llm(request.provider, operation="chat", hedge=hedging_enabled(request.hedge))
         logger.info(f"Using provider: {type(chat_handler).__name__}")
 
         # Get the latest user message
@@ -70,7 +77,8 @@ async def document_chat(request: DocumentChatRequest):
         # Get relevant context
         relevant_context = context_handler.get_document_context(
             query=current_query,
-            top_k=request.top_k
+            top_k=request.top_k,
+            where=request.filters.to_where() if request.filters else None
         )
         
         # Enhanced system prompt for user manual RAG experience
@@ -105,7 +113,7 @@ Remember: You are helping users understand and operate the GrandMA3 console safe
         return DocumentChatResponse(
             response=response,
             contexts=relevant_context,
-            provider=type(chat_handler).__name__.replace('Chat', '').lower()  # Extract provider name
+            provider=provider_name(chat_handler)  # Extract provider name
         )
 
     except Exception as e:
@@ -117,19 +125,28 @@ Remember: You are helping users understand and operate the GrandMA3 console safe
 
 @router.get("/document-chat/stream")
 async def document_chat_stream_get(
+    http_request: Request,
     messages: str = Query(..., description="JSON string of messages"),
     top_k: int = Query(5, description="Number of relevant contexts to retrieve"),
     model: Optional[str] = Query(None, description="Optional model override"),
-    provider: Optional[str] = Query(None, description="Optional provider override")
+    provider: Optional[str] = Query(None, description="Optional provider override"),
+    filters: Optional[str] = Query(None, description="Optional JSON string of metadata filters"),
+    collections: Optional[List[str]] = Query(None, description="Named collections searched together"),
+    hedge: Optional[bool] = Query(None, description="Duplicate a slow request to a secondary provider or host"),
+    resources: AppResources = Depends(get_resources)
 ):
     """
     GET endpoint for streaming chat response using EventSource.
     
     Args:
+        http_request: The HTTP request, watched for the client disconnecting
         messages: JSON string of chat messages
         top_k: Number of relevant contexts to retrieve
         model: Optional model override
         provider: Optional provider override
+        filters: Optional JSON string of metadata filters
+        collections: Named collections searched together (repeat the parameter)
+        hedge: Duplicate a slow request to a secondary provider or host (default: HEDGE_REQUESTS)
     
     Returns:
         StreamingResponse: Server-Sent Events stream of response tokens
@@ -137,23 +154,35 @@ async def document_chat_stream_get(
     try:
         # Parse messages from JSON string
         parsed_messages = json.loads(messages)
+        parsed_filters = MetadataFilter.model_validate(json.loads(filters)) if filters else None
         
         # Create request object
         request = DocumentChatRequest(
             messages=parsed_messages,
             top_k=top_k,
             model=model,
-            provider=provider
+            provider=provider,
+            filters=parsed_filters,
+            collections=collections,
+            hedge=hedge
         )
         
         # Use the same streaming logic as POST endpoint
-        return await document_chat_stream_post(request)
+        return await document_chat_stream_post(request, http_request, resources)
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         logger.error(f"Error parsing messages JSON: {str(e)}")
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid JSON in messages parameter: {str(e)}"
+            detail=f"Invalid JSON in messages or filters parameter: {str(e)}"
+        )
+    except ValidationError as e:
+        logger.error(f"Invalid messages or filters parameter: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid messages or filters parameter: {str(e)}"
         )
     except Exception as e:
         logger.error(f"Document chat streaming GET error: {str(e)}")
@@ -163,21 +192,32 @@ async def document_chat_stream_get(
         )
 
 @router.post("/document-chat/stream")
-async def document_chat_stream_post(request: DocumentChatRequest):
+async def document_chat_stream_post(request: DocumentChatRequest, http_request: Request,
+                                    resources: AppResources = Depends(get_resources)):
     """
     Generate a streaming chat response based on document context and chat history.
     Uses Server-Sent Events (SSE) to stream the response tokens.
+
+    When the client disconnects, pending retrieval stops before its next search
+    and the upstream generation is closed at its next token.
     
     Args:
         request (DocumentChatRequest): Contains messages history, search parameters, and provider
+        http_request (Request): The HTTP request, watched for the client disconnecting
     
     Returns:
         StreamingResponse: Server-Sent Events stream of response tokens
     """
+    embedder = get_searcher(request, resources)
+
     async def generate_stream():
+        cancelled = threading.Event()
+        watcher = asyncio.create_task(watch_disconnect(http_request, cancelled))
+        stage = 'retrieval'
+        stream_stats.count('started')
         try:
             # Get chat handler for requested provider or use default
-            chat_handler = LLMFactory.create_llm(request.provider, operation="chat")
+            chat_handler = LLMFactory.create_llm(request.provider, operation="chat", hedge=hedging_enabled(request.hedge))
             logger.info(f"Using provider: {type(chat_handler).__name__}")
 
             # Get the latest user message
@@ -187,10 +227,13 @@ async def document_chat_stream_post(request: DocumentChatRequest):
             # Initialize context handler
             context_handler = ContextHandler(embedder)
             
-            # Get relevant context
-            relevant_context = context_handler.get_document_context(
+            # Get relevant context off the event loop, so disconnects are noticed meanwhile
+            relevant_context = await asyncio.to_thread(
+                context_handler.get_document_context,
                 query=current_query,
-                top_k=request.top_k
+                top_k=request.top_k,
+                where=request.filters.to_where() if request.filters else None,
+                cancelled=cancelled
             )
             
             # Enhanced system prompt for user manual RAG experience
@@ -216,34 +259,53 @@ RESPONSE FORMAT:
 Remember: You are helping users understand and operate the GrandMA3 console safely and effectively."""
 
             # Send initial context data
-            yield f"data: {json.dumps({'type': 'context', 'contexts': relevant_context, 'provider': type(chat_handler).__name__.replace('Chat', '').lower()})}\n\n"
+            yield f"data: {json.dumps({'type': 'context', 'contexts': relevant_context, 'provider': provider_name(chat_handler)})}\n\n"
+            stage = 'generation'
 
             # Check if the chat handler supports streaming
             if hasattr(chat_handler, 'generate_streaming_response'):
-                # Generate streaming response
-                for chunk in chat_handler.generate_streaming_response(
-                    prompt=current_query,
-                    system_prompt=system_prompt,
-                    model=request.model
-                ):
-                    if chunk and chunk.strip():  # Only send non-empty chunks
-                        yield f"data: {json.dumps({'type': 'token', 'content': chunk})}\n\n"
+                def chunks():
+                    return chat_handler.generate_streaming_response(
+                        prompt=current_query,
+                        system_prompt=system_prompt,
+                        model=request.model
+                    )
             else:
                 # Fallback to non-streaming if streaming is not supported
-                response = chat_handler.generate_response(
-                    prompt=current_query,
-                    system_prompt=system_prompt,
-                    model=request.model
-                )
-                yield f"data: {json.dumps({'type': 'token', 'content': response})}\n\n"
+                def chunks():
+                    return iter([chat_handler.generate_response(
+                        prompt=current_query,
+                        system_prompt=system_prompt,
+                        model=request.model
+                    )])
+
+            # Generate in a worker thread, which closes the upstream stream once cancelled
+            async for chunk in iterate_in_thread(chunks, cancelled):
+                if chunk and chunk.strip():  # Only send non-empty chunks
+                    yield f"data: {json.dumps({'type': 'token', 'content': chunk})}\n\n"
+            if cancelled.is_set():
+                raise GenerationCancelled("Generation cancelled")
 
             # Send completion signal
             yield f"data: {json.dumps({'type': 'done'})}\n\n"
             yield "data: [DONE]\n\n"
+            stream_stats.count('completed')
 
+        except GenerationCancelled:
+            stream_stats.cancel(stage)
+            logger.info(f"Client disconnected, cancelled document chat stream during {stage}")
+        except (asyncio.CancelledError, GeneratorExit):
+            # The server abandoned the response, e.g. on disconnect or shutdown
+            stream_stats.cancel(stage)
+            logger.info(f"Document chat stream abandoned during {stage}")
+            raise
         except Exception as e:
+            stream_stats.count('failed')
             logger.error(f"Document chat streaming error: {str(e)}")
             yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        finally:
+            cancelled.set()  # Stops retrieval or generation still running in a worker thread
+            watcher.cancel()
 
     return StreamingResponse(
         generate_stream(),
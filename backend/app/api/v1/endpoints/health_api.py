@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from app.LLMs.hedging import all_hedge_stats
+from app.LLMs.llm_factory import LLM_PROVIDERS
+from app.LLMs.ollama_pool import default_pool
+from app.LLMs.provider_router import default_router
+from app.utils.logger import get_logger
+from app.utils.streaming import stream_stats
+
+logger = get_logger(__name__)
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["health"]
+)
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """
+    Report whether the app is ready to serve traffic.
+
+    Returns 503 until the startup warm-up has finished, so a load balancer
+    or orchestrator only routes requests once the index and models are loaded.
+
+    Returns:
+        JSONResponse: 'ready' and the warm-up status (null when warm-up is disabled)
+    """
+    warmup = getattr(request.app.state, "warmup", None)
+    ready = warmup is None or warmup.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "warmup": warmup.status if warmup else None}
+    )
+
+@router.get("/ollama/hosts")
+async def ollama_hosts():
+    """
+    Report the load, health and latency of every Ollama host in the pool.
+
+    Returns:
+        dict: Per-host 'url', 'healthy', 'outstanding', 'requests', 'errors' and 'latency_ms' (ewma, p50, p95)
+    """
+    return {"hosts": default_pool().stats()}
+
+@router.get("/llm/providers")
+async def llm_providers():
+    """
+    Report the rolling latency, error rate and circuit state of the providers used by provider=auto.
+
+    Returns:
+        dict: The providers in routing order and per provider and model 'circuit', 'requests', 'errors',
+        'error_rate' and 'latency_ms' (p50, p95)
+    """
+    router = default_router(LLM_PROVIDERS.resolve)
+    return {"routing_order": router.ranked(), "providers": router.stats()}
+
+@router.get("/llm/hedging")
+async def llm_hedging():
+    """
+    Report how often hedged requests sent a duplicate and which copy answered, per requested provider.
+
+    Returns:
+        dict: Per provider 'requests', 'hedged', 'hedge_rate', 'primary_wins', 'secondary_wins', 'failed',
+        where duplicates go ('secondary': 'host', 'provider', or None when not hedged), the current
+        'delay_ms' and the 'first_chunk_ms' percentiles
+    """
+    return {"providers": all_hedge_stats()}
+
+@router.get("/llm/streams")
+async def llm_streams():
+    """
+    Report how streamed chat responses ended, including those cancelled because the client disconnected.
+
+    Returns:
+        dict: 'started', 'completed', 'failed' and 'cancelled' streams, and 'cancelled_during'
+        'retrieval' or 'generation'
+    """
+    return stream_stats.summary()
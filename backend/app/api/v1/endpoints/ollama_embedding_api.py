@@ -1,11 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import os
-from app.LLMs.embedding_factory import EmbeddingFactory
-from app.handlers.db_handler import DatabaseHandler
+import asyncio
+from app.dependencies import AppResources, get_resources
 from app.handlers.context_handler import ContextHandler
+from app.handlers.db_handler import DEFAULT_COLLECTION
+from app.models import MetadataFilter
 
 load_dotenv()
 
@@ -14,21 +15,13 @@ router = APIRouter(
     tags=["ollama-embeddings"]
 )
 
-# Initialize handlers with error handling
-try:
-    db_handler = DatabaseHandler()  # Initialize with default path
-    embedder = EmbeddingFactory.create_embedder(
-        provider=os.getenv('DEFAULT_EMBEDDING_PROVIDER'),
-        collection=db_handler.collection
-    )
-except Exception as e:
-    print(f"Error initializing handlers: {str(e)}")
-    raise
-
 class EmbeddingRequest(BaseModel):
     """Request model for embedding creation."""
     contents: List[str]  # List of texts to embed
     model: Optional[str] = None  # Optional model override
+    source: Optional[str] = None  # Optional source document name stored with each chunk
+    tags: Optional[List[str]] = None  # Optional tags stored with each chunk
+    collection: Optional[str] = None  # Optional named collection (created if needed), e.g. one manual
 
 class SearchRequest(BaseModel):
     """Request model for document search."""
@@ -36,6 +29,28 @@ class SearchRequest(BaseModel):
     top_k: Optional[int] = 5  # Number of results to return (increased default)
     model: Optional[str] = None  # Optional model override
     enhanced_search: Optional[bool] = True  # Enable enhanced search features
+    filters: Optional[MetadataFilter] = None  # Optional metadata filter (document, page range, tags)
+    collections: Optional[List[str]] = None  # Named collections searched together ("default" is the main one)
+
+class HNSWSettings(BaseModel):
+    """HNSW index parameters of a collection; unset values use the HNSW_* defaults."""
+    max_neighbors: Optional[int] = None  # Graph degree (M), fixed when the collection is created
+    ef_construction: Optional[int] = None  # Build-time candidate list size, fixed when the collection is created
+    ef_search: Optional[int] = None  # Query-time candidate list size, changeable at any time
+
+class StorageSettings(BaseModel):
+    """Vector storage of a numpy collection; unset values use the VECTOR_STORAGE_* defaults."""
+    dtype: Optional[str] = None  # "float32", "float16" or "int8"
+    dimensions: Optional[int] = None  # Leading dimensions kept (Matryoshka models); 0 keeps all
+    rescore: Optional[int] = None  # Candidates re-scored exactly per result; 0 disables and drops full vectors
+
+class ReembedRequest(BaseModel):
+    """Request model for re-embedding the collection with another model."""
+    model: str  # Embedding model of the new collection
+    batch_size: Optional[int] = 64  # Chunks embedded per batch
+    activate: Optional[bool] = True  # Make the model the default once the collection is built
+    hnsw: Optional[HNSWSettings] = None  # Index parameters of the new collection
+    storage: Optional[StorageSettings] = None  # Vector storage of the new collection (numpy store only)
 
 class EmbeddingResponse(BaseModel):
     """Response model for embedding operations."""
@@ -49,8 +64,8 @@ class SearchResponse(BaseModel):
     search_metadata: dict
 
 @router.post("/embed", response_model=EmbeddingResponse)
-async def create_embeddings(request: EmbeddingRequest):
-    """Create embeddings for provided contents and store in database."""
+async def create_embeddings(request: EmbeddingRequest, resources: AppResources = Depends(get_resources)):
+    """Create embeddings for provided contents and store them in the collection of the selected model."""
     try:
         if not request.contents:
             return EmbeddingResponse(
@@ -58,15 +73,22 @@ async def create_embeddings(request: EmbeddingRequest):
                 message="Successfully embedded 0 documents"
             )
 
-        if request.model:
-            embedder.model = request.model
+        embedder = resources.embedder_for(request.model, collection=request.collection)  # Never mutate the shared default embedder
 
-        # Use single document embedding for single items
-        if len(request.contents) == 1:
-            success = embedder.create_embedding(request.contents[0])
-        # Use batch processing for multiple documents
-        else:
-            success = embedder.create_embeddings_batch(request.contents)
+        metadata = {"source": request.source, "tags": request.tags}
+
+        def embed():
+            # Use single document embedding for single items
+            if len(request.contents) == 1:
+                return embedder.create_embedding(request.contents[0], metadata=metadata)
+            # Use batch processing for multiple documents
+            return embedder.create_embeddings_batch(
+                request.contents,
+                metadatas=[metadata] * len(request.contents)
+            )
+
+        # Embedding and the buffered add block; off the event loop, concurrent requests share a group commit
+        success = await asyncio.to_thread(embed)
         
         if success:
             return EmbeddingResponse(
@@ -78,13 +100,17 @@ async def create_embeddings(request: EmbeddingRequest):
                 success=False,
                 message="Failed to embed documents"
             )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/search", response_model=SearchResponse)
-async def search_documents(request: SearchRequest):
+async def search_documents(request: SearchRequest, resources: AppResources = Depends(get_resources)):
     """
     Enhanced search for relevant documents using embeddings with context analysis.
+    A request selecting a model searches that model's collections only. Several
+    named collections are searched in parallel and their results merged by score.
 
     Args:
         request (SearchRequest): The search request containing query and parameters.
@@ -93,16 +119,21 @@ async def search_documents(request: SearchRequest):
         SearchResponse: Enhanced search results with metadata.
     """
     try:
-        # Update model if provided
-        if request.model:
-            embedder.model = request.model
+        embedder = resources.searcher_for(request.model, request.collections)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        where = request.filters.to_where() if request.filters else None
 
         if request.enhanced_search:
             # Use enhanced context handler for better results
             context_handler = ContextHandler(embedder)
             contexts = context_handler.get_document_context(
                 query=request.query,
-                top_k=request.top_k
+                top_k=request.top_k,
+                where=where
             )
             
             # Get query variations for transparency
@@ -119,13 +150,16 @@ async def search_documents(request: SearchRequest):
                 "query_variations_count": len(query_variations),
                 "context_analysis": analysis,
                 "total_results": len(contexts),
-                "search_type": "enhanced"
+                "search_type": "enhanced",
+                "filters": where,
+                "collections": request.collections or [DEFAULT_COLLECTION]
             }
         else:
             # Fallback to basic search
             contexts = embedder.search(
                 query=request.query,
-                top_k=request.top_k
+                top_k=request.top_k,
+                where=where
             )
             query_variations = [request.query]
             search_metadata = {
@@ -133,7 +167,9 @@ async def search_documents(request: SearchRequest):
                 "query_variations_count": 1,
                 "context_analysis": "basic_search",
                 "total_results": len(contexts),
-                "search_type": "basic"
+                "search_type": "basic",
+                "filters": where,
+                "collections": request.collections or [DEFAULT_COLLECTION]
             }
 
         return SearchResponse(
@@ -143,4 +179,129 @@ async def search_documents(request: SearchRequest):
         )
     except Exception as e:
         print(f"Error in search: {str(e)}")  # Log the error
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.get("/models")
+async def list_models(resources: AppResources = Depends(get_resources)):
+    """
+    List the embedding models that have a collection, with their sizes.
+    
+    Returns:
+        dict: The default model and each model's collection and chunk count
+    """
+    try:
+        return {
+            "default_model": resources.default_model,
+            "collections": resources.db_handler.list_model_collections()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/models/{model:path}/hnsw")
+async def update_hnsw(model: str, settings: HNSWSettings, resources: AppResources = Depends(get_resources)):
+    """
+    Change the query-time HNSW parameter of a model's collection.
+    Only ef_search can change after creation; it is stored with the collection and
+    applies once the index is reloaded (after a restart). Use scripts.tune_hnsw to pick a value.
+    
+    Args:
+        model: Embedding model whose collection is tuned
+        settings (HNSWSettings): New ef_search
+    
+    Returns:
+        dict: The collection's HNSW parameters after the change
+    """
+    if settings.max_neighbors is not None or settings.ef_construction is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="max_neighbors and ef_construction are fixed when a collection is created (set them on /reembed)"
+        )
+    if settings.ef_search is None:
+        raise HTTPException(status_code=400, detail="ef_search is required")
+    if model not in {entry['model'] for entry in resources.db_handler.list_model_collections()}:
+        raise HTTPException(status_code=404, detail=f"No collection for model {model}")
+    try:
+        collection = resources.embedder_for(model).collection
+        return resources.db_handler.set_search_ef(collection, settings.ef_search)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/models/{model:path}/storage")
+async def update_storage(model: str, settings: StorageSettings, resources: AppResources = Depends(get_resources)):
+    """
+    Re-encode a model's numpy collection with quantized or truncated vectors.
+    Needs VECTOR_STORE=numpy and the collection's full-precision vectors; use
+    scripts.vector_storage_report to see the memory saved and recall lost first.
+    
+    Args:
+        model: Embedding model whose collection is converted
+        settings (StorageSettings): Settings to change
+    
+    Returns:
+        dict: The collection's storage settings after the change
+    """
+    if model not in {entry['model'] for entry in resources.db_handler.list_model_collections()}:
+        raise HTTPException(status_code=404, detail=f"No collection for model {model}")
+    try:
+        collection = resources.embedder_for(model).collection
+        return resources.db_handler.set_storage(collection, settings.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/reembed")
+async def start_reembed(request: ReembedRequest, resources: AppResources = Depends(get_resources)):
+    """
+    Re-embed the default model's collection with another model in the background.
+    Queries keep using the current collection until the new one is complete;
+    with activate, the new model then becomes the default.
+    
+    Args:
+        request (ReembedRequest): Target model, batch size and whether to activate it
+    
+    Returns:
+        dict: Status of the started job
+    """
+    if request.batch_size is not None and request.batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be at least 1")
+    try:
+        job = resources.start_reembed(
+            request.model, batch_size=request.batch_size or 64, activate=request.activate,
+            hnsw=request.hnsw.model_dump() if request.hnsw else None,
+            storage=request.storage.model_dump() if request.storage else None
+        )
+        return job.status
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/reembed")
+async def get_reembed_status(resources: AppResources = Depends(get_resources)):
+    """
+    Report the progress of the last re-embed job.
+    
+    Returns:
+        dict: Models, collections, state and counts of the job
+    """
+    if resources.reembed_job is None:
+        raise HTTPException(status_code=404, detail="No re-embed job has been started")
+    return resources.reembed_job.status
+
+@router.delete("/reembed")
+async def cancel_reembed(resources: AppResources = Depends(get_resources)):
+    """
+    Cancel the running re-embed job; chunks embedded so far are kept and a new job resumes from them.
+    
+    Returns:
+        dict: Status of the job
+    """
+    if resources.reembed_job is None or not resources.reembed_job.running:
+        raise HTTPException(status_code=404, detail="No re-embed job is running")
+    resources.reembed_job.cancel()
+    return resources.reembed_job.status
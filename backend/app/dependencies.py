@@ -0,0 +1,205 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from fastapi import HTTPException, Query, Request
+from app.handlers.db_handler import DEFAULT_COLLECTION, DatabaseHandler
+from app.handlers.federated_search import FederatedSearch
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.handlers.reembedder import ReembedJob
+from app.LLMs.embedding_factory import EmbeddingFactory
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class AppResources:
+    """Class holding the process-wide vector store, embedders and ingestion registry."""
+
+    def __init__(self, db_handler: DatabaseHandler, embedder, registry: IngestionRegistry, provider: Optional[str] = None):
+        """
+        Initialize AppResources from already created handlers.
+
+        Args:
+            db_handler (DatabaseHandler): The ChromaDB client and collections
+            embedder: Embedder of the default model, bound to that model's collection
+            registry (IngestionRegistry): Registry of ingested files
+            provider (str, optional): Embedding provider used for other models. Defaults to DEFAULT_EMBEDDING_PROVIDER.
+        """
+        self.db_handler = db_handler
+        self.registry = registry
+        self.provider = provider
+        self.default_model = embedder.model
+        self.reembed_job: Optional[ReembedJob] = None
+        self._reembed_thread: Optional[threading.Thread] = None
+        self._default_model_listeners = []
+        # One embedder per (model, named collection), never re-pointed at another collection
+        self._embedders = {(embedder.model, None): embedder}
+        self._search_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, db_path: str = "./vector_db", provider: Optional[str] = None,
+               registry_path: Optional[str] = None) -> "AppResources":
+        """
+        Open the vector store and registry and create the default model's embedder.
+
+        Args:
+            db_path (str): ChromaDB storage path
+            provider (str, optional): Embedding provider. Defaults to DEFAULT_EMBEDDING_PROVIDER.
+            registry_path (str, optional): Ingestion registry path. Defaults to the registry's own default.
+
+        Returns:
+            AppResources: The shared resources
+        """
+        db_handler = DatabaseHandler(db_path)
+        provider = provider or os.getenv('DEFAULT_EMBEDDING_PROVIDER')
+        model = EmbeddingFactory.default_model(provider)
+        embedder = EmbeddingFactory.create_embedder(
+            provider=provider,
+            collection=db_handler.collection_for_model(model),
+            model=model
+        )
+        logger.info(f"Opened vector store at {db_path} with {type(embedder).__name__} ({embedder.collection.name})")
+        return cls(db_handler, embedder, IngestionRegistry(registry_path), provider=provider)
+
+    @property
+    def embedder(self):
+        """Embedder of the default model."""
+        return self.embedder_for(None)
+
+    def embedder_for(self, model: Optional[str] = None, hnsw: Optional[dict] = None, storage: Optional[dict] = None,
+                     collection: Optional[str] = None, create: bool = True):
+        """
+        Get the embedder of a model, bound to that model's own collection or one of its named collections.
+
+        Embedders are cached per model and collection and never modified, so a
+        request selecting a model or collection cannot change the ones used by
+        other requests.
+
+        Args:
+            model (str, optional): Embedding model. Defaults to the default model.
+            hnsw (dict, optional): HNSW parameters if the model's collection is created
+            storage (dict, optional): Numpy storage settings if the model's collection is created
+            collection (str, optional): Named collection. Defaults to the model's main collection.
+            create (bool): Create a named collection that does not exist yet
+
+        Returns:
+            The embedder
+
+        Raises:
+            ValueError: If the collection name is invalid
+            LookupError: If the named collection does not exist and `create` is False
+        """
+        model = model or self.default_model
+        collection = None if collection == DEFAULT_COLLECTION else collection
+        with self._lock:
+            if (model, collection) not in self._embedders:
+                self._embedders[(model, collection)] = EmbeddingFactory.create_embedder(
+                    provider=self.provider,
+                    collection=self.db_handler.named_collection(model, collection, hnsw=hnsw, storage=storage, create=create),
+                    model=model
+                )
+                logger.info(f"Created embedder for {model} ({self._embedders[(model, collection)].collection.name})")
+            return self._embedders[(model, collection)]
+
+    def searcher_for(self, model: Optional[str] = None, collections: Optional[List[str]] = None):
+        """
+        Get what searches one or several existing collections of a model.
+
+        Args:
+            model (str, optional): Embedding model. Defaults to the default model.
+            collections (List[str], optional): Collection names. Defaults to the main collection.
+
+        Returns:
+            The collection's embedder, or a FederatedSearch over several collections
+
+        Raises:
+            ValueError: If a collection name is invalid
+            LookupError: If a named collection does not exist
+        """
+        names = list(dict.fromkeys(collections or [DEFAULT_COLLECTION]))
+        embedders = {name: self.embedder_for(model, collection=name, create=False) for name in names}
+        if len(embedders) == 1:
+            return embedders[names[0]]
+        with self._lock:
+            if self._search_executor is None:
+                self._search_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('SEARCH_WORKERS', '8')), thread_name_prefix="search"
+                )
+        return FederatedSearch(embedders, self._search_executor)
+
+    def set_default_model(self, model: str):
+        """Serve requests that do not select a model from `model`'s collection."""
+        embedder = self.embedder_for(model)
+        self.default_model = model
+        for listener in self._default_model_listeners:
+            listener(embedder)
+        logger.info(f"Default embedding model is now {model}")
+
+    def on_default_model_change(self, listener: Callable):
+        """Call `listener` with the new default embedder whenever the default model changes."""
+        self._default_model_listeners.append(listener)
+
+    def start_reembed(self, model: str, batch_size: int = 64, activate: bool = True,
+                      hnsw: Optional[dict] = None, storage: Optional[dict] = None) -> ReembedJob:
+        """
+        Start re-embedding the default model's collection with another model in a background thread.
+
+        Args:
+            model (str): Model of the new collection
+            batch_size (int): Chunks embedded per batch
+            activate (bool): Make `model` the default once the job completes
+            hnsw (dict, optional): HNSW parameters of the new collection (ignored if it already exists)
+            storage (dict, optional): Numpy storage settings of the new collection (ignored if it already exists)
+
+        Returns:
+            ReembedJob: The started job
+
+        Raises:
+            RuntimeError: If a re-embed job is already running
+            ValueError: If `model` already is the default model
+        """
+        if self.reembed_job and self.reembed_job.running:
+            raise RuntimeError(f"Already re-embedding with {self.reembed_job.status['target_model']}")
+        if model == self.default_model:
+            raise ValueError(f"{model} is already the default embedding model")
+        job = ReembedJob(
+            self.embedder, self.embedder_for(model, hnsw=hnsw, storage=storage), self.registry, batch_size=batch_size,
+            on_complete=(lambda done: self.set_default_model(done.target.model)) if activate else None
+        )
+        self.reembed_job = job
+        self._reembed_thread = threading.Thread(target=job.run, name="reembed", daemon=True)
+        self._reembed_thread.start()
+        return job
+
+    def close(self):
+        """Stop a running re-embed, write anything still buffered and release the registry connection."""
+        if self.reembed_job:
+            self.reembed_job.cancel()
+            self._reembed_thread.join()
+        if self._search_executor:
+            self._search_executor.shutdown(wait=True)
+        self.db_handler.close()
+        self.registry.close()
+
+def get_resources(request: Request) -> AppResources:
+    """FastAPI dependency returning the resources created in the app lifespan."""
+    return request.app.state.resources
+
+def get_embedder(request: Request, collection: Optional[str] = Query(None, description="Named collection (default: the main one)")):
+    """
+    FastAPI dependency returning the default model's embedder, bound to the selected named collection.
+
+    Requests adding documents (POST and PUT) may create the named collection; any other request,
+    such as a GET or a DELETE with a mistyped name, gets a 404 for an unknown one.
+    """
+    try:
+        return get_resources(request).embedder_for(collection=collection, create=request.method in ("POST", "PUT"))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def get_registry(request: Request) -> IngestionRegistry:
+    """FastAPI dependency returning the shared ingestion registry."""
+    return get_resources(request).registry
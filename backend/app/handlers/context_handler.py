@@ -1,6 +1,8 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from app.utils.logger import get_logger
+from app.utils.streaming import GenerationCancelled
 import re
+import threading
 
 logger = get_logger(__name__)
 
@@ -19,25 +21,28 @@ class ContextHandler:
         """
         self.embedder = embedder
 
-    def get_document_context(self, query: str, top_k: int = 5) -> List[str]:
+    def get_document_context(self, query: str, top_k: int = 5, where: Optional[dict] = None,
+                             cancelled: Optional[threading.Event] = None) -> List[str]:
         """
         Retrieves relevant document context using multi-query approach.
         
         Args:
             query (str): User's input query
             top_k (int): Number of top contexts to retrieve
+            where (dict, optional): ChromaDB metadata filter narrowing the search
+            cancelled (threading.Event, optional): Abandons the retrieval between searches when set
             
         Returns:
             List[str]: List of relevant context passages
+
+        Raises:
+            GenerationCancelled: If `cancelled` was set before the retrieval finished
         """
         logger.debug("Generating search queries...")
         queries = self.get_multiple_queries(query)
         
         # Get initial context
-        relevant_context = self.embedder.get_relevant_context(
-            queries=queries,
-            top_k=top_k
-        )
+        relevant_context = self.get_relevant_context(queries, top_k, where, cancelled)
         
         # Analyze and expand context if needed
         if relevant_context:
@@ -50,14 +55,33 @@ class ContextHandler:
             
             # If context is insufficient and we have additional queries, get more context
             if additional_queries:
-                additional_context = self.embedder.get_relevant_context(
-                    queries=additional_queries,
-                    top_k=top_k
-                )
+                additional_context = self.get_relevant_context(additional_queries, top_k, where, cancelled)
                 relevant_context.extend(additional_context)
         
         return relevant_context
 
+    def get_relevant_context(self, queries: List[str], top_k: int, where: Optional[dict] = None,
+                             cancelled: Optional[threading.Event] = None) -> List[str]:
+        """
+        Get the embedder's relevant context for several queries, checking `cancelled` before each search.
+
+        Searching one query at a time returns the same contexts as one call with
+        every query, since every embedder deduplicates contexts in order of
+        first appearance.
+
+        Raises:
+            GenerationCancelled: If `cancelled` is set before a search
+        """
+        if cancelled is None:
+            return self.embedder.get_relevant_context(queries=queries, top_k=top_k, where=where)
+        contexts = []
+        for query in queries:
+            if cancelled.is_set():
+                raise GenerationCancelled("Retrieval cancelled")
+            contexts.extend(self.embedder.get_relevant_context(queries=[query], top_k=top_k, where=where))
+        seen = set()
+        return [context for context in contexts if not (context in seen or seen.add(context))]
+
     def get_multiple_queries(self, query: str) -> List[str]:
         """
         Generates multiple search queries from a single user query for user manual searches.
@@ -0,0 +1,179 @@
+"""
+Concurrent, resumable ingestion of PDF and text files from disk.
+
+Used by the bulk ingestion command and the directory watcher. Extraction
+runs in one pool and embedding batches in another, so one file's extraction
+overlaps other files' embedding. A file is checkpointed in the ingestion
+registry under its SHA-256 once all of its chunks are stored; chunks stored
+before an interruption are recognised by their content-hash ID and not
+embedded again, and chunks of an earlier version of a file are deleted.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Executor
+from typing import Iterator, List, Optional
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.utils.document_extraction import PDF_EXTENSIONS, TEXT_EXTENSIONS, extract_document
+from app.utils.simhash import get_near_duplicate_distance
+from app.utils.text_chunker import estimate_tokens
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024  # Bytes read per iteration when fingerprinting a file
+
+def iter_corpus_files(root: str) -> Iterator[str]:
+    """Yield the supported files under a directory in a stable order."""
+    extensions = PDF_EXTENSIONS + TEXT_EXTENSIONS
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                yield os.path.join(directory, filename)
+
+def file_sha256(path: str) -> str:
+    """Hash a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for block in iter(lambda: infile.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CorpusIngester:
+    """Class to run the concurrent extract, deduplicate, embed and checkpoint pipeline."""
+
+    def __init__(self, embedder, registry: IngestionRegistry, extract_pool: Executor, embed_pool: Executor,
+                 batch_size: int = 64, dedup_distance: Optional[int] = None, tags: Optional[List[str]] = None,
+                 **extract_options):
+        """
+        Initialize the CorpusIngester.
+
+        Args:
+            embedder: Embedding provider whose collection receives the chunks
+            registry (IngestionRegistry): Registry used for checkpoints and near-duplicate fingerprints
+            extract_pool (Executor): Pool that runs extraction (a process pool for CPU parallelism)
+            embed_pool (Executor): Pool that runs embedding batches
+            batch_size (int): Chunks per embedding batch
+            dedup_distance (int, optional): Near-duplicate SimHash distance; defaults to
+                NEAR_DUPLICATE_MAX_DISTANCE, negative disables
+            tags (List[str], optional): Tags stored with every chunk
+            **extract_options: Chunking options passed to extract_document
+                (strategy, chunk_size, overlap, max_tokens, overlap_tokens)
+        """
+        self.embedder = embedder
+        self.registry = registry
+        self.collection_name = embedder.collection.name
+        self.extract_pool = extract_pool
+        self.embed_pool = embed_pool
+        self.batch_size = batch_size
+        self.dedup_distance = get_near_duplicate_distance() if dedup_distance is None else dedup_distance
+        self.tags = tags or []
+        self.extract_options = extract_options
+        self._dedup_lock = threading.Lock()  # Files are deduplicated one at a time against each other
+        self._stats_lock = threading.Lock()
+        self.stats = {'files': 0, 'skipped': 0, 'failed': 0, 'chunks': 0, 'tokens': 0,
+                      'already_stored': 0, 'near_duplicates': 0, 'removed': 0}
+
+    def count(self, **increments):
+        """Add to the run statistics (thread-safe)."""
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _embed_batch(self, contents: List[str], metadatas: List[dict]):
+        if not self.embedder.create_embeddings_batch(contents, metadatas=metadatas):
+            raise RuntimeError("Embedding batch failed")
+        self.count(chunks=len(contents), tokens=sum(estimate_tokens(content) for content in contents))
+
+    def ingest_file(self, path: str, source: str, sha256: Optional[str] = None) -> dict:
+        """
+        Ingest one file and checkpoint it.
+
+        Args:
+            path: Path of the file
+            source: Source name stored with its chunks
+            sha256: Hex SHA-256 of the file, if already computed
+
+        Returns:
+            dict: 'source', 'status' ('ingested' or 'skipped') and, for ingested files, chunk counts
+                ('chunks', 'embedded', 'already_stored', 'near_duplicates', 'removed') and 'total_pages'
+        """
+        size_bytes = os.path.getsize(path)
+        sha256 = sha256 or file_sha256(path)
+        if self.registry.get(sha256, self.collection_name):
+            self.count(skipped=1)
+            return {'source': source, 'status': 'skipped'}
+
+        chunks, metadatas, total_pages = self.extract_pool.submit(
+            extract_document, path, source, **self.extract_options
+        ).result()
+
+        with self._dedup_lock:
+            kept = self.registry.filter_near_duplicates(
+                self.collection_name, chunks, self.dedup_distance, exclude_source=source
+            )
+            fingerprints = [(self.embedder.chunk_id(chunks[index], source), fingerprint) for index, fingerprint in kept]
+            self.registry.remove_source(source, self.collection_name)  # Fingerprints of an earlier version
+            self.registry.add_fingerprints(self.collection_name, source, fingerprints)
+        dropped = len(chunks) - len(kept)
+
+        try:
+            # Chunks stored by an interrupted run are not embedded again
+            existing_ids = set(self.embedder.collection.get(where={'source': source}, include=[])['ids'])
+            pending_contents = []
+            pending_metadatas = []
+            for (index, _), (chunk_id, _) in zip(kept, fingerprints):
+                if chunk_id not in existing_ids:
+                    pending_contents.append(chunks[index])
+                    pending_metadatas.append({**metadatas[index], 'tags': self.tags})
+
+            futures = [
+                self.embed_pool.submit(
+                    self._embed_batch,
+                    pending_contents[start:start + self.batch_size],
+                    pending_metadatas[start:start + self.batch_size]
+                )
+                for start in range(0, len(pending_contents), self.batch_size)
+            ]
+            for future in futures:
+                future.result()
+
+            # Chunks of an earlier version of the file
+            stale_ids = list(existing_ids - {chunk_id for chunk_id, _ in fingerprints})
+            if stale_ids:
+                self.embedder.collection.delete(ids=stale_ids)
+        except BaseException:
+            self.registry.remove_source(source, self.collection_name)
+            raise
+
+        # Checkpoint: the file is complete
+        self.registry.record(
+            sha256=sha256,
+            collection=self.collection_name,
+            source=source,
+            size_bytes=size_bytes,
+            chunks=len(kept),
+            total_pages=total_pages,
+            embedding_model=self.embedder.model
+        )
+        already_stored = len(kept) - len(pending_contents)
+        self.count(files=1, already_stored=already_stored, near_duplicates=dropped, removed=len(stale_ids))
+        return {
+            'source': source,
+            'status': 'ingested',
+            'chunks': len(kept),
+            'embedded': len(pending_contents),
+            'already_stored': already_stored,
+            'near_duplicates': dropped,
+            'removed': len(stale_ids),
+            'total_pages': total_pages,
+        }
+
+def describe_result(result: dict) -> str:
+    """Format an ingest_file result as a one-line summary."""
+    if result['status'] == 'skipped':
+        return f"{result['source']}: already ingested"
+    return (f"{result['source']}: {result['embedded']} chunks embedded, {result['already_stored']} already stored, "
+            f"{result['near_duplicates']} near-duplicates dropped, {result['removed']} stale removed")
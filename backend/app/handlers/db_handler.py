@@ -1,35 +1,376 @@
+import os
+import re
+import threading
+from typing import List, Optional
 import chromadb  # Import chromadb for vector database operations
-from chromadb.api.models.Collection import Collection  # Correct import for Collection type
+from app.handlers.vector_store import STORAGE_DTYPES, ChromaVectorStore, NumpyVectorStore, VectorStore
+from app.handlers.write_buffer import BufferedCollection, WriteBuffer
+
+COLLECTION_NAME = "vault_embeddings"  # Collection of the first embedding model used
+HNSW_PARAMETERS = ("max_neighbors", "ef_construction", "ef_search")  # ef_search is the only one changeable after creation
+VECTOR_STORES = ("chroma", "numpy")
+FLAT_INDEX_DIR = "flat"  # Subdirectory of the database path holding numpy stores
+NUMPY_MAX_BATCH_SIZE = 5000  # Records per write-buffer batch for numpy stores
+STORAGE_PARAMETERS = ("dtype", "dimensions", "rescore")
+DEFAULT_COLLECTION = "default"  # Request-level name of a model's main collection
+COLLECTION_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9_-]{0,62}$')
+
+def hnsw_configuration(overrides: Optional[dict] = None) -> dict:
+    """
+    HNSW index configuration for a new collection.
+
+    Parameters not given in `overrides` come from HNSW_MAX_NEIGHBORS,
+    HNSW_EF_CONSTRUCTION and HNSW_EF_SEARCH, or ChromaDB's defaults when unset.
+    Higher values raise recall at the cost of slower inserts (max_neighbors,
+    ef_construction) or queries (ef_search).
+
+    Args:
+        overrides (dict, optional): Values for some of HNSW_PARAMETERS
+
+    Returns:
+        dict: The "hnsw" section of a ChromaDB collection configuration
+
+    Raises:
+        ValueError: If a parameter is unknown or not a positive integer
+    """
+    configuration = {"space": "cosine"}
+    for parameter in HNSW_PARAMETERS:
+        value = os.getenv(f"HNSW_{parameter.upper()}")
+        if value:
+            configuration[parameter] = int(value)
+    for parameter, value in (overrides or {}).items():
+        if parameter not in HNSW_PARAMETERS:
+            raise ValueError(f"Unknown HNSW parameter {parameter} (expected one of {HNSW_PARAMETERS})")
+        if value is not None:
+            configuration[parameter] = value
+    for parameter in HNSW_PARAMETERS:
+        if parameter in configuration and (not isinstance(configuration[parameter], int) or configuration[parameter] < 1):
+            raise ValueError(f"HNSW {parameter} must be a positive integer")
+    return configuration
+
+def storage_configuration(overrides: Optional[dict] = None) -> dict:
+    """
+    Vector storage settings for a new numpy collection.
+
+    Settings not given in `overrides` come from VECTOR_STORAGE_DTYPE,
+    VECTOR_STORAGE_DIMENSIONS and VECTOR_RESCORE_FACTOR. float16 halves and
+    int8 quarters the memory scanned per query; truncating to `dimensions`
+    (only meaningful for Matryoshka embedding models) shrinks it further.
+    With a rescore factor, full vectors stay on disk and the top
+    rescore x n_results candidates are re-ranked exactly.
+
+    Args:
+        overrides (dict, optional): Values for some of STORAGE_PARAMETERS
+
+    Returns:
+        dict: 'dtype', 'dimensions' (None keeps all; 0 in overrides clears it) and 'rescore' (0 disables)
+
+    Raises:
+        ValueError: If a setting is unknown or invalid
+    """
+    configuration = {
+        "dtype": os.getenv('VECTOR_STORAGE_DTYPE', 'float32'),
+        "dimensions": int(os.getenv('VECTOR_STORAGE_DIMENSIONS', '0')) or None,
+        "rescore": int(os.getenv('VECTOR_RESCORE_FACTOR', '4')),
+    }
+    for parameter, value in (overrides or {}).items():
+        if parameter not in STORAGE_PARAMETERS:
+            raise ValueError(f"Unknown storage parameter {parameter} (expected one of {STORAGE_PARAMETERS})")
+        if value is not None:
+            configuration[parameter] = value
+    configuration["dimensions"] = configuration["dimensions"] or None  # 0 keeps every dimension
+    if configuration["dtype"] not in STORAGE_DTYPES:
+        raise ValueError(f"Storage dtype must be one of {STORAGE_DTYPES}")
+    if configuration["dimensions"] is not None and (not isinstance(configuration["dimensions"], int) or configuration["dimensions"] < 1):
+        raise ValueError("Storage dimensions must be a positive integer")
+    if not isinstance(configuration["rescore"], int) or configuration["rescore"] < 0:
+        raise ValueError("Rescore factor must be a non-negative integer")
+    return configuration
+
+def model_collection_name(model: str) -> str:
+    """
+    Name of the collection holding one embedding model's vectors.
+
+    Args:
+        model (str): Embedding model name, e.g. "nomic-embed-text:latest"
+
+    Returns:
+        str: A valid ChromaDB collection name, e.g. "vault_embeddings__nomic-embed-text_latest"
+    """
+    slug = re.sub(r'[^a-zA-Z0-9_-]+', '_', model).strip('_-')
+    return f"{COLLECTION_NAME}__{slug}"
+
+def named_collection_name(model: str, name: str) -> str:
+    """
+    Name of a named collection (e.g. one manual) of an embedding model.
+
+    Args:
+        model (str): Embedding model name
+        name (str): Collection name chosen by the user, e.g. "grandma3"
+
+    Returns:
+        str: e.g. "vault_embeddings__nomic-embed-text_latest.grandma3"
+
+    Raises:
+        ValueError: If the name is not 1-63 letters, digits, "_" or "-" starting with a letter or digit
+    """
+    if not COLLECTION_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid collection name {name!r}: use 1-63 letters, digits, '_' or '-'")
+    return f"{model_collection_name(model)}.{name}"  # Model slugs never contain "."
+
 class DatabaseHandler:
-    """Class to handle read and write operations with the ChromaDB vector database."""
+    """Class to handle read and write operations with the vector database."""
 
-    def __init__(self, db_path: str = "./vector_db"):
+    def __init__(self, db_path: str = "./vector_db", backend: Optional[str] = None):
         """
         Initialize the DatabaseHandler with a specific database path.
 
+        Collections are ChromaDB collections (HNSW index) or, with the "numpy"
+        backend, memory-mapped flat indexes searched exactly; both are used
+        through the VectorStore interface.
+
+        Unless WRITE_BUFFER_ENABLED is "false", adds to the collection go
+        through a group-commit write buffer: concurrent adds are coalesced into
+        batches of up to the client's max batch size, and each add() returns
+        once its records are written.
+
         Args:
-            db_path (str, optional): Path to the ChromaDB persistent storage. Defaults to "./vector_db".
+            db_path (str, optional): Path to the vector database storage. Defaults to "./vector_db".
+            backend (str, optional): "chroma" or "numpy". Defaults to VECTOR_STORE or "chroma".
+
+        Raises:
+            ValueError: If the backend is unknown
         """
-        self.client = chromadb.PersistentClient(path=db_path)  # Initialize PersistentClient
-        self.collection = self._initialize_collection()  # Initialize or retrieve the collection
+        self.backend = (backend or os.getenv('VECTOR_STORE', 'chroma')).lower()
+        if self.backend not in VECTOR_STORES:
+            raise ValueError(f"Unknown vector store {self.backend} (expected one of {VECTOR_STORES})")
+        self.db_path = db_path
+        self.client = chromadb.PersistentClient(path=db_path) if self.backend == "chroma" else None
+        self._flat_stores = {}  # Collection name -> open numpy store (one instance per directory)
+        self._lock = threading.Lock()
+        self._write_buffers: List[WriteBuffer] = []
+        self._model_collections = {}  # Embedding model -> its (buffered) collection
+        self._named_collections = {}  # (embedding model, name) -> (buffered) named collection
+        self.collection = self._buffered(self._initialize_collection())  # Initialize or retrieve the collection
+
+    @property
+    def max_batch_size(self) -> int:
+        """Most records one write to a collection may hold."""
+        return self.client.get_max_batch_size() if self.client else NUMPY_MAX_BATCH_SIZE
 
-    def _initialize_collection(self) -> Collection:
+    def _buffered(self, collection: VectorStore):
+        """Route the collection's adds through a new write buffer unless buffering is disabled."""
+        if os.getenv('WRITE_BUFFER_ENABLED', 'true').lower() == 'false':
+            return collection
+        write_buffer = WriteBuffer(
+            collection,
+            max_batch_size=self.max_batch_size,
+            flush_size=int(os.getenv('WRITE_BUFFER_FLUSH_SIZE', '1000')),
+            max_delay=float(os.getenv('WRITE_BUFFER_MAX_DELAY_MS', '10')) / 1000
+        )
+        self._write_buffers.append(write_buffer)
+        return BufferedCollection(collection, write_buffer)  # Adds are group-committed
+
+    def _initialize_collection(self) -> VectorStore:
         """
-        Initialize and return the ChromaDB collection.
+        Initialize and return the original collection.
 
         Returns:
-            chromadb.api.model.Collection: The ChromaDB collection for embeddings.
+            VectorStore: The collection for embeddings.
         """
+        if self.backend == "numpy":
+            return self._open_store(COLLECTION_NAME)
         try:
-            collection = self.client.get_collection("vault_embeddings")  # Try to get existing collection
+            collection = self.client.get_collection(COLLECTION_NAME)  # Try to get existing collection
             print("Loading existing vector database...")  # Log loading existing DB
         except:
             collection = self.client.create_collection(
-                name="vault_embeddings",
-                metadata={"hnsw:space": "cosine"}  # Define similarity metric
+                name=COLLECTION_NAME,
+                configuration={"hnsw": hnsw_configuration()}  # Cosine similarity and configured index parameters
             )
             print("Creating new vector database...")  # Log creation of new DB
-        return collection  # Return the collection instance
+        return ChromaVectorStore(collection)  # Return the collection instance
+
+    def _open_store(self, name: str, metadata: Optional[dict] = None, hnsw: Optional[dict] = None,
+                    storage: Optional[dict] = None) -> VectorStore:
+        """Open a collection of the configured backend, creating it with `metadata`, `hnsw` and `storage` if needed."""
+        if self.backend == "numpy":
+            if name not in self._flat_stores:
+                self._flat_stores[name] = NumpyVectorStore(
+                    os.path.join(self.db_path, FLAT_INDEX_DIR, name), name, metadata, storage_configuration(storage)
+                )
+            return self._flat_stores[name]
+        if storage and any(value is not None for value in storage.values()):
+            raise ValueError("Quantized or truncated storage needs VECTOR_STORE=numpy")
+        return ChromaVectorStore(self.client.get_or_create_collection(
+            name=name,
+            configuration={"hnsw": hnsw_configuration(hnsw)},
+            metadata=metadata
+        ))
+
+    def _collection_names(self) -> List[str]:
+        """Names of every stored collection."""
+        if self.backend == "numpy":
+            directory = os.path.join(self.db_path, FLAT_INDEX_DIR)
+            return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        return [collection.name for collection in self.client.list_collections()]
+
+    def collection_model(self, collection) -> str:
+        """Embedding model recorded in a collection's metadata (None if unclaimed)."""
+        return (collection.metadata or {}).get('embedding_model')
+
+    def collection_for_model(self, model: str, hnsw: Optional[dict] = None, storage: Optional[dict] = None):
+        """
+        Get the collection holding one embedding model's vectors, creating it if needed.
+
+        Vectors of different models are never mixed: each model has its own
+        collection with its own write buffer. The original collection is
+        claimed by the first model asked for: it belongs to the model its
+        chunks were embedded with, or to the asking model if it is empty.
+
+        Args:
+            model (str): Embedding model name
+            hnsw (dict, optional): HNSW parameters if the collection is created (see hnsw_configuration)
+            storage (dict, optional): Numpy storage settings if the collection is created (see storage_configuration)
+
+        Returns:
+            The model's (buffered) collection
+
+        Raises:
+            ValueError: If the model's collection name is taken by another model, or storage settings are
+                given without the numpy backend
+        """
+        with self._lock:
+            if model in self._model_collections:
+                return self._model_collections[model]
+
+            owner = self.collection_model(self.collection)
+            if owner is None:
+                sample = self.collection.get(limit=1, include=['metadatas'])
+                owner = sample['metadatas'][0].get('embedding_model') if sample['ids'] else model
+                if owner:
+                    self.collection.modify(metadata={"embedding_model": owner})
+            if owner == model:
+                self._model_collections[model] = self.collection
+                return self.collection
+
+            collection = self._open_store(model_collection_name(model), {"embedding_model": model}, hnsw, storage)
+            if self.collection_model(collection) != model:
+                raise ValueError(f"Collection {collection.name} belongs to model {self.collection_model(collection)}")
+            self._model_collections[model] = self._buffered(collection)
+            return self._model_collections[model]
+
+    def named_collection(self, model: str, name: Optional[str], hnsw: Optional[dict] = None,
+                         storage: Optional[dict] = None, create: bool = True):
+        """
+        Get one of a model's named collections, such as a single manual.
+
+        Named collections are searched on their own or together (see
+        FederatedSearch), so adding one does not slow queries of the others.
+
+        Args:
+            model (str): Embedding model name
+            name (str, optional): Collection name; None or DEFAULT_COLLECTION selects the model's main collection
+            hnsw (dict, optional): HNSW parameters if the collection is created
+            storage (dict, optional): Numpy storage settings if the collection is created
+            create (bool): Create the collection if it does not exist
+
+        Returns:
+            The (buffered) collection
+
+        Raises:
+            ValueError: If the name is invalid
+            LookupError: If the collection does not exist and `create` is False
+        """
+        if name is None or name == DEFAULT_COLLECTION:
+            return self.collection_for_model(model, hnsw=hnsw, storage=storage)
+        store_name = named_collection_name(model, name)
+        with self._lock:
+            if (model, name) not in self._named_collections:
+                if not create and store_name not in self._collection_names():
+                    raise LookupError(f"No collection {name} for model {model}")
+                collection = self._open_store(
+                    store_name, {"embedding_model": model, "collection_name": name}, hnsw, storage
+                )
+                self._named_collections[(model, name)] = self._buffered(collection)
+            return self._named_collections[(model, name)]
+
+    def list_model_collections(self) -> List[dict]:
+        """
+        List the per-model and named collections with their models and sizes.
+
+        Returns:
+            List[dict]: 'collection', request-level 'name', 'model', 'count', 'hnsw' parameters and
+                numpy 'storage' settings of each collection
+        """
+        collections = []
+        for name in self._collection_names():
+            if name == COLLECTION_NAME or name.startswith(f"{COLLECTION_NAME}__"):
+                collection = self._open_store(name)
+                collections.append({
+                    'collection': collection.name,
+                    'name': (collection.metadata or {}).get('collection_name', DEFAULT_COLLECTION),
+                    'model': self.collection_model(collection),
+                    'count': collection.count(),
+                    'hnsw': self.hnsw_settings(collection),
+                    'storage': collection.storage if self.backend == "numpy" else None,
+                })
+        return collections
+
+    def hnsw_settings(self, collection) -> dict:
+        """HNSW parameters a collection was built with and currently searches with (None for numpy stores)."""
+        if self.backend == "numpy":
+            return {parameter: None for parameter in HNSW_PARAMETERS}
+        hnsw = (collection.configuration_json or {}).get('hnsw') or {}
+        return {parameter: hnsw.get(parameter) for parameter in HNSW_PARAMETERS}
+
+    def set_search_ef(self, collection, ef_search: int) -> dict:
+        """
+        Change how many candidates a collection's HNSW search explores.
+
+        The setting is stored with the collection and applied when ChromaDB
+        next loads the index, i.e. after a restart. max_neighbors and
+        ef_construction are fixed when the index is built.
+
+        Args:
+            collection: The collection to tune
+            ef_search (int): Candidate list size; must be at least the number of results requested
+
+        Returns:
+            dict: The collection's HNSW parameters after the change
+        """
+        if self.backend == "numpy":
+            raise ValueError("The numpy vector store searches exactly and has no HNSW settings")
+        if ef_search < 1:
+            raise ValueError("ef_search must be a positive integer")
+        collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        return self.hnsw_settings(self.client.get_collection(collection.name))
+
+    def set_storage(self, collection, overrides: dict) -> dict:
+        """
+        Re-encode a numpy collection's vectors with changed storage settings.
+
+        Settings not given keep their current values. Converting needs the
+        full-precision vectors, so a collection compressed with rescore 0
+        can only be rebuilt by re-embedding.
+
+        Args:
+            collection: The collection to convert
+            overrides (dict): Values for some of STORAGE_PARAMETERS
+
+        Returns:
+            dict: The collection's storage settings after the change
+
+        Raises:
+            ValueError: If the backend is not numpy or the settings are invalid
+        """
+        if self.backend != "numpy":
+            raise ValueError("Quantized or truncated storage needs VECTOR_STORE=numpy")
+        current = collection.storage
+        current["dimensions"] = current["dimensions"] or 0
+        storage = storage_configuration({**current, **{key: value for key, value in overrides.items() if value is not None}})
+        collection.set_storage(storage)
+        return collection.storage
 
     def add_documents(self, documents: list, embeddings: list, ids: list):
         """
@@ -78,6 +419,13 @@ class DatabaseHandler:
         """
         return self.collection.count()  # Return the number of documents
 
+    def close(self):
+        """Write any buffered adds and stop the write buffers."""
+        for write_buffer in self._write_buffers:
+            write_buffer.close()
+        for store in self._flat_stores.values():
+            store.close()
+
     def load_documents_from_file(self, filepath: str) -> list:
         """
         Load documents from a specified text file.
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from app.handlers.corpus_ingester import CorpusIngester, describe_result, file_sha256, iter_corpus_files
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class DirectoryWatcher:
+    """Class to keep the collection in sync with a directory of PDF and text files by polling it."""
+
+    def __init__(self, directory: str, embedder, registry: IngestionRegistry, poll_interval: float = 5.0,
+                 debounce_seconds: float = 10.0, workers: int = 2, **ingest_options):
+        """
+        Initialize the DirectoryWatcher.
+
+        The directory is scanned every `poll_interval` seconds. Changes are
+        only synced once the directory has been quiet for `debounce_seconds`,
+        so copying a large batch of files triggers a single sync. Files are
+        compared by size and modification time first and by SHA-256 second,
+        so touching a file without changing it does not re-ingest it.
+
+        Args:
+            directory (str): Directory to watch (recursively)
+            embedder: Embedding provider whose collection is kept in sync
+            registry (IngestionRegistry): Registry holding the synced state of the directory
+            poll_interval (float): Seconds between scans
+            debounce_seconds (float): Quiet period required before syncing
+            workers (int): Files ingested concurrently
+            **ingest_options: Options passed to CorpusIngester (batch_size, dedup_distance, chunking options)
+        """
+        self.directory = os.path.abspath(directory)
+        self.embedder = embedder
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.debounce_seconds = debounce_seconds
+        self.workers = max(1, workers)
+        self.ingest_options = ingest_options
+        self._last_scan = None  # Stats of the previous scan
+        self._last_change = 0.0  # Monotonic time the directory last changed
+        self._synced: Dict[str, Tuple[int, int]] = {}  # Stats of files as of the last sync
+        self._task: Optional[asyncio.Task] = None
+        self.status = {
+            'directory': self.directory,
+            'running': False,
+            'syncs': 0,
+            'last_sync': None,
+            'last_result': None,
+        }
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """
+        List the supported files of the directory.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: (size, mtime in ns) by source (path relative to the directory)
+        """
+        snapshot = {}
+        for path in iter_corpus_files(self.directory):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Removed during the scan
+            snapshot[os.path.relpath(path, self.directory)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def sync(self, snapshot: Dict[str, Tuple[int, int]]) -> dict:
+        """
+        Ingest new and changed files and remove deleted ones.
+
+        Args:
+            snapshot: Result of scan()
+
+        Returns:
+            dict: Sources 'ingested', 'removed' and 'failed', and the number 'unchanged'
+        """
+        collection = self.embedder.collection.name
+        known = self.registry.watched_files(self.directory)
+        result = {'ingested': [], 'removed': [], 'failed': [], 'unchanged': 0}
+
+        # Deletions first, so a renamed file is re-ingested under its new name
+        for source in sorted(set(known) - set(snapshot)):
+            self.embedder.delete_document(source)
+            self.registry.remove_source(source, collection)
+            self.registry.set_watched_file(self.directory, source, None)
+            self._synced.pop(source, None)
+            result['removed'].append(source)
+
+        changed = [source for source, stat in snapshot.items() if self._synced.get(source) != stat]
+        with ThreadPoolExecutor(self.workers) as extract_pool, \
+                ThreadPoolExecutor(self.workers) as embed_pool, \
+                ThreadPoolExecutor(self.workers) as file_pool:
+            ingester = CorpusIngester(self.embedder, self.registry, extract_pool, embed_pool, **self.ingest_options)
+
+            def sync_file(source: str):
+                path = os.path.join(self.directory, source)
+                sha256 = file_sha256(path)
+                if known.get(source) == sha256:
+                    return False  # Touched but not modified
+                logger.info(describe_result(ingester.ingest_file(path, source, sha256=sha256)))
+                self.registry.set_watched_file(self.directory, source, sha256)
+                return True
+
+            futures = {source: file_pool.submit(sync_file, source) for source in changed}
+            for source, future in futures.items():
+                try:
+                    if future.result():
+                        result['ingested'].append(source)
+                    else:
+                        result['unchanged'] += 1
+                except Exception as e:
+                    # Not retried until the file changes again
+                    logger.error(f"Failed to ingest watched file {source}: {str(e)}")
+                    result['failed'].append(source)
+                self._synced[source] = snapshot[source]
+
+        logger.info(
+            f"Synced {self.directory}: {len(result['ingested'])} ingested, {len(result['removed'])} removed, "
+            f"{len(result['failed'])} failed"
+        )
+        return result
+
+    async def poll_once(self):
+        """Scan the directory and sync it if it changed and has been quiet long enough."""
+        snapshot = await asyncio.to_thread(self.scan)
+        now = time.monotonic()
+        if snapshot != self._last_scan:
+            self._last_scan = snapshot
+            self._last_change = now
+            return
+        if snapshot == self._synced or now - self._last_change < self.debounce_seconds:
+            return
+        result = await asyncio.to_thread(self.sync, snapshot)
+        self.status['syncs'] += 1
+        self.status['last_sync'] = datetime.now(timezone.utc).isoformat()
+        self.status['last_result'] = result
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error watching {self.directory}: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start watching in a background task on the running event loop."""
+        if self._task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+            self.status['running'] = True
+            logger.info(f"Watching {self.directory} every {self.poll_interval}s (debounce {self.debounce_seconds}s)")
+
+    async def stop(self):
+        """Stop watching; a sync in progress finishes in its worker thread."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.status['running'] = False
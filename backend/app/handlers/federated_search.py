@@ -0,0 +1,99 @@
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def normalized_score(distance: float) -> float:
+    """Map a cosine distance (0 to 2) to a relevance score from 1 (identical) to 0 (opposite)."""
+    return max(0.0, min(1.0, 1 - distance / 2))
+
+class FederatedSearch:
+    """
+    Searches several collections of one embedding model in parallel and merges the results.
+
+    Exposes the search methods of an embedder, so it can be handed to
+    ContextHandler in place of a single collection's embedder.
+    """
+
+    def __init__(self, embedders: Dict[str, object], executor: Executor):
+        """
+        Initialize FederatedSearch over some collections.
+
+        Args:
+            embedders (Dict[str, object]): Embedder of each collection by request-level name; all of one model
+            executor (Executor): Pool running the per-collection queries
+        """
+        models = {embedder.model for embedder in embedders.values()}
+        if len(models) != 1:
+            raise ValueError(f"Federated collections must share one embedding model, got {sorted(models)}")
+        self.embedders = embedders
+        self.executor = executor
+        self.model = models.pop()
+
+    def search_hits(self, query: str, top_k: int = 2, where: Optional[dict] = None) -> List[dict]:
+        """
+        Search every collection and merge the results by normalized score.
+
+        The query is embedded once; the collections are then queried
+        concurrently, each for its own top_k, and the best top_k overall are
+        kept. A passage found in several collections is returned once.
+
+        Args:
+            query (str): The search query
+            top_k (int): Number of results to return
+            where (dict, optional): Metadata filter applied in every collection
+
+        Returns:
+            List[dict]: 'collection', 'id', 'document', 'metadata' and 'score' of each result, best first
+        """
+        query_embedding = next(iter(self.embedders.values())).embed_query(query)
+        futures = {
+            name: self.executor.submit(
+                embedder.collection.query,
+                query_embeddings=[query_embedding],
+                n_results=top_k,
+                where=where,
+                include=['documents', 'metadatas', 'distances']
+            )
+            for name, embedder in self.embedders.items()
+        }
+        hits = []
+        for name, future in futures.items():
+            result = future.result()
+            for chunk_id, document, metadata, distance in zip(
+                    result['ids'][0], result['documents'][0], result['metadatas'][0], result['distances'][0]):
+                hits.append({
+                    'collection': name,
+                    'id': chunk_id,
+                    'document': document,
+                    'metadata': metadata,
+                    'score': normalized_score(distance),
+                })
+        hits.sort(key=lambda hit: hit['score'], reverse=True)
+        seen = set()
+        merged = [hit for hit in hits if not (hit['document'] in seen or seen.add(hit['document']))]
+        logger.debug(f"Federated search over {list(self.embedders)}: {len(hits)} hits, {len(merged[:top_k])} kept")
+        return merged[:top_k]
+
+    def search(self, query: str, top_k: int = 2, where: Optional[dict] = None) -> List[str]:
+        """Search every collection and return the merged documents, best first."""
+        return [hit['document'] for hit in self.search_hits(query, top_k=top_k, where=where)]
+
+    def get_relevant_context(self, queries: List[str], top_k: int = 2, where: Optional[dict] = None) -> List[str]:
+        """
+        Get unique relevant contexts for several queries, in order of first appearance.
+
+        Args:
+            queries (List[str]): Search queries
+            top_k (int): Number of results per query
+            where (dict, optional): Metadata filter applied to every query
+
+        Returns:
+            List[str]: Unique relevant contexts
+        """
+        contexts = []
+        for query in queries:
+            contexts.extend(self.search(query, top_k=top_k, where=where))
+        seen = set()
+        return [context for context in contexts if not (context in seen or seen.add(context))]
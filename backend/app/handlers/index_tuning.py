@@ -0,0 +1,100 @@
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def load_vectors(collection, batch_size: int = 1000) -> Tuple[List[str], np.ndarray]:
+    """
+    Read every ID and embedding of a collection.
+
+    Args:
+        collection: ChromaDB collection
+        batch_size (int): Records read per request
+
+    Returns:
+        Tuple of (IDs, float32 matrix with one row per ID)
+    """
+    ids, rows = [], []
+    offset = 0
+    while True:
+        page = collection.get(limit=batch_size, offset=offset, include=['embeddings'])
+        if not page['ids']:
+            break
+        ids.extend(page['ids'])
+        rows.append(np.asarray(page['embeddings'], dtype=np.float32))
+        offset += len(page['ids'])
+    vectors = np.vstack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+    return ids, vectors
+
+def exact_neighbors(vectors: np.ndarray, query_rows: List[int], k: int) -> List[List[int]]:
+    """
+    Exact cosine top-k of stored vectors, by brute force.
+
+    Each query is a stored vector; the vector itself is excluded from its own results.
+
+    Args:
+        vectors (np.ndarray): All stored vectors
+        query_rows (List[int]): Rows of `vectors` used as queries
+        k (int): Neighbours per query
+
+    Returns:
+        List[List[int]]: Rows of the k nearest vectors of each query, nearest first
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = vectors / np.maximum(norms, 1e-12)
+    similarities = normalized[query_rows] @ normalized.T
+    similarities[np.arange(len(query_rows)), query_rows] = -np.inf
+    k = min(k, vectors.shape[0] - 1)
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(similarities, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1).tolist()
+
+def recall_at_k(approximate: List[List[str]], exact: List[List[str]]) -> float:
+    """Mean fraction of the exact top-k found in the approximate top-k."""
+    if not exact:
+        return 0.0
+    found = [len(set(approx) & set(truth)) / len(truth) for approx, truth in zip(approximate, exact) if truth]
+    return float(np.mean(found)) if found else 0.0
+
+def measure_queries(collection, ids: List[str], vectors: np.ndarray, query_rows: List[int],
+                    exact: List[List[int]], k: int) -> Dict[str, float]:
+    """
+    Time one query per sampled vector against a collection and score its recall.
+
+    Args:
+        collection: ChromaDB collection holding `vectors` under `ids`
+        ids (List[str]): IDs of the stored vectors
+        vectors (np.ndarray): Stored vectors
+        query_rows (List[int]): Rows used as queries
+        exact (List[List[int]]): Exact neighbour rows from exact_neighbors
+        k (int): Neighbours per query
+
+    Returns:
+        Dict[str, float]: 'recall' at k and 'p50_ms', 'p99_ms' and 'mean_ms' query latency
+    """
+    latencies, approximate = [], []
+    for row in query_rows:
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[vectors[row].tolist()], n_results=k + 1, include=[])
+        latencies.append((time.perf_counter() - started) * 1000)
+        approximate.append([chunk_id for chunk_id in result['ids'][0] if chunk_id != ids[row]][:k])
+    truth = [[ids[index] for index in neighbours] for neighbours in exact]
+    return {
+        'recall': round(recall_at_k(approximate, truth), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(np.mean(latencies)), 3),
+    }
+
+def pick_setting(results: List[dict], target_recall: float) -> dict:
+    """
+    Choose the fastest measured setting (by p50) that reaches the target recall.
+
+    Falls back to the setting with the best recall when none reaches the target.
+    """
+    eligible = [result for result in results if result['recall'] >= target_recall]
+    if eligible:
+        return min(eligible, key=lambda result: (result['p50_ms'], result['p99_ms']))
+    return max(results, key=lambda result: (result['recall'], -result['p50_ms']))
@@ -0,0 +1,391 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.utils.logger import get_logger
+from app.utils.simhash import FINGERPRINT_BANDS, FingerprintIndex, band_groups, fingerprint_bands, hamming_distance, simhash
+
+logger = get_logger(__name__)
+
+BAND_COLUMNS = [f"band{band}" for band in range(FINGERPRINT_BANDS)]
+
+class IngestionRegistry:
+    """Class to record ingested files and chunk SimHash fingerprints in a small SQLite database."""
+
+    def __init__(self, registry_path: str = None):
+        """
+        Initialize the IngestionRegistry and create its table if needed.
+
+        Args:
+            registry_path (str, optional): Path to the SQLite file. Defaults to the
+                INGESTION_REGISTRY_PATH environment variable or "./ingestion_registry.db".
+        """
+        self.registry_path = registry_path or os.getenv('INGESTION_REGISTRY_PATH', './ingestion_registry.db')
+        self._lock = threading.Lock()  # sqlite3 connections are not safe for concurrent use
+        self._connection = sqlite3.connect(self.registry_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingestions (
+                    sha256 TEXT NOT NULL,
+                    collection TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    total_pages INTEGER NOT NULL,
+                    embedding_model TEXT,
+                    ingested_at TEXT NOT NULL,
+                    PRIMARY KEY (sha256, collection)
+                )
+                """
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS idx_ingestions_source ON ingestions (source)")
+            self._connection.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS chunk_fingerprints (
+                    collection TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    {', '.join(f'{column} INTEGER NOT NULL' for column in BAND_COLUMNS)},
+                    PRIMARY KEY (collection, chunk_id)
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_fingerprints_source ON chunk_fingerprints (collection, source)"
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS watched_files (
+                    directory TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    PRIMARY KEY (directory, source)
+                )
+                """
+            )
+            for column in BAND_COLUMNS:
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_fingerprints_{column} ON chunk_fingerprints (collection, {column})"
+                )
+        logger.info(f"Ingestion registry ready at {self.registry_path}")
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+    def get(self, sha256: str, collection: str) -> Optional[dict]:
+        """
+        Look up the ingestion record of a file fingerprint.
+
+        Args:
+            sha256 (str): Hex SHA-256 of the file content
+            collection (str): Collection the file was ingested into
+
+        Returns:
+            Optional[dict]: The ingestion record, or None if the file is new
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM ingestions WHERE sha256 = ? AND collection = ?",
+                (sha256, collection)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record(self, sha256: str, collection: str, source: str, size_bytes: int,
+               chunks: int, total_pages: int, embedding_model: str = None) -> dict:
+        """
+        Record a completed ingestion, replacing any previous record of the same file.
+
+        Returns:
+            dict: The stored ingestion record
+        """
+        record = {
+            'sha256': sha256,
+            'collection': collection,
+            'source': source,
+            'size_bytes': size_bytes,
+            'chunks': chunks,
+            'total_pages': total_pages,
+            'embedding_model': embedding_model,
+            'ingested_at': datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO ingestions
+                (sha256, collection, source, size_bytes, chunks, total_pages, embedding_model, ingested_at)
+                VALUES (:sha256, :collection, :source, :size_bytes, :chunks, :total_pages, :embedding_model, :ingested_at)
+                """,
+                record
+            )
+        return record
+
+    def remove_source(self, source: str, collection: str) -> int:
+        """
+        Forget every ingestion and chunk fingerprint of a source document, e.g. after it was deleted.
+
+        Returns:
+            int: Number of ingestion records removed
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM ingestions WHERE source = ? AND collection = ?",
+                (source, collection)
+            )
+            self._connection.execute(
+                "DELETE FROM chunk_fingerprints WHERE source = ? AND collection = ?",
+                (source, collection)
+            )
+        return cursor.rowcount
+
+    def copy_collection(self, source_collection: str, target_collection: str, embedding_model: str = None) -> int:
+        """
+        Copy the ingestion records and chunk fingerprints of one collection to another.
+
+        Used when a collection is re-embedded with another model: the new
+        collection holds the same files and chunks under the same IDs.
+
+        Args:
+            source_collection (str): Collection whose records are copied
+            target_collection (str): Collection receiving the records
+            embedding_model (str, optional): Model recorded on the copied ingestions
+
+        Returns:
+            int: Number of ingestion records copied
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                """
+                INSERT OR REPLACE INTO ingestions
+                (sha256, collection, source, size_bytes, chunks, total_pages, embedding_model, ingested_at)
+                SELECT sha256, ?, source, size_bytes, chunks, total_pages, COALESCE(?, embedding_model), ingested_at
+                FROM ingestions WHERE collection = ?
+                """,
+                (target_collection, embedding_model, source_collection)
+            )
+            self._connection.execute(
+                f"""
+                INSERT OR REPLACE INTO chunk_fingerprints
+                SELECT ?, source, chunk_id, fingerprint, {', '.join(BAND_COLUMNS)}
+                FROM chunk_fingerprints WHERE collection = ?
+                """,
+                (target_collection, source_collection)
+            )
+        return cursor.rowcount
+
+    def dump_collection(self, collection: str) -> dict:
+        """
+        Get the ingestion records and chunk fingerprints of a collection, e.g. for a snapshot.
+
+        Args:
+            collection (str): Collection whose records are returned
+
+        Returns:
+            dict: 'ingestions' (list of records) and 'fingerprints' (list of [source, chunk ID, hex fingerprint])
+        """
+        with self._lock:
+            ingestions = self._connection.execute(
+                "SELECT * FROM ingestions WHERE collection = ? ORDER BY ingested_at", (collection,)
+            ).fetchall()
+            fingerprints = self._connection.execute(
+                "SELECT source, chunk_id, fingerprint FROM chunk_fingerprints WHERE collection = ?", (collection,)
+            ).fetchall()
+        return {
+            'ingestions': [{key: row[key] for key in row.keys() if key != 'collection'} for row in ingestions],
+            'fingerprints': [[row['source'], row['chunk_id'], row['fingerprint']] for row in fingerprints],
+        }
+
+    def load_collection(self, collection: str, records: dict) -> int:
+        """
+        Store records returned by dump_collection under a collection, replacing matching ones.
+
+        Args:
+            collection (str): Collection receiving the records
+            records (dict): Output of dump_collection
+
+        Returns:
+            int: Number of ingestion records stored
+        """
+        ingestions = [
+            (record['sha256'], collection, record['source'], record['size_bytes'], record['chunks'],
+             record['total_pages'], record['embedding_model'], record['ingested_at'])
+            for record in records.get('ingestions', [])
+        ]
+        fingerprints = [
+            (collection, source, chunk_id, fingerprint, *fingerprint_bands(int(fingerprint, 16)))
+            for source, chunk_id, fingerprint in records.get('fingerprints', [])
+        ]
+        placeholders = ', '.join('?' * (4 + FINGERPRINT_BANDS))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                """
+                INSERT OR REPLACE INTO ingestions
+                (sha256, collection, source, size_bytes, chunks, total_pages, embedding_model, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                ingestions
+            )
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO chunk_fingerprints VALUES ({placeholders})", fingerprints
+            )
+        return len(ingestions)
+
+    def watched_files(self, directory: str) -> Dict[str, str]:
+        """
+        Get the files of a watched directory as of its last sync.
+
+        Args:
+            directory (str): Absolute path of the watched directory
+
+        Returns:
+            Dict[str, str]: Hex SHA-256 by source (path relative to the directory)
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT source, sha256 FROM watched_files WHERE directory = ?", (directory,)
+            ).fetchall()
+        return {row['source']: row['sha256'] for row in rows}
+
+    def set_watched_file(self, directory: str, source: str, sha256: str = None):
+        """
+        Record the synced content of a watched file, or forget it when sha256 is None.
+
+        Args:
+            directory (str): Absolute path of the watched directory
+            source (str): Path of the file relative to the directory
+            sha256 (str, optional): Hex SHA-256 of the ingested content
+        """
+        with self._lock, self._connection:
+            if sha256 is None:
+                self._connection.execute(
+                    "DELETE FROM watched_files WHERE directory = ? AND source = ?", (directory, source)
+                )
+            else:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO watched_files (directory, source, sha256) VALUES (?, ?, ?)",
+                    (directory, source, sha256)
+                )
+
+    def add_fingerprints(self, collection: str, source: str, fingerprints: List[Tuple[str, int]]):
+        """
+        Store the SimHash fingerprints of a source document's stored chunks.
+
+        Args:
+            collection (str): Collection the chunks were stored in
+            source (str): Source document of the chunks
+            fingerprints (List[Tuple[str, int]]): (chunk ID, 64-bit fingerprint) pairs
+        """
+        rows = [
+            (collection, source, chunk_id, f"{fingerprint:016x}", *fingerprint_bands(fingerprint))
+            for chunk_id, fingerprint in fingerprints
+        ]
+        placeholders = ', '.join('?' * (4 + FINGERPRINT_BANDS))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO chunk_fingerprints VALUES ({placeholders})", rows
+            )
+
+    def find_near_duplicate(self, collection: str, fingerprint: int, max_distance: int,
+                            exclude_source: str = None) -> Optional[dict]:
+        """
+        Find a stored chunk whose fingerprint is within `max_distance` bits.
+
+        Args:
+            collection (str): Collection to search
+            fingerprint (int): 64-bit SimHash of the new chunk
+            max_distance (int): Largest Hamming distance counted as a duplicate
+            exclude_source (str, optional): Ignore chunks of this source (e.g. the revision being replaced)
+
+        Returns:
+            Optional[dict]: 'chunk_id', 'source' and 'distance' of the closest match, or None
+        """
+        bands = fingerprint_bands(fingerprint)
+        clauses = []
+        params = [collection]
+        for group in band_groups(max_distance):
+            clauses.append('(' + ' AND '.join(f"{BAND_COLUMNS[band]} = ?" for band in group) + ')')
+            params.extend(bands[band] for band in group)
+        query = f"SELECT chunk_id, source, fingerprint FROM chunk_fingerprints WHERE collection = ? AND ({' OR '.join(clauses)})"
+        if exclude_source:
+            query += " AND source != ?"
+            params.append(exclude_source)
+
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+
+        best = None
+        for row in rows:
+            distance = hamming_distance(fingerprint, int(row['fingerprint'], 16))
+            if distance <= max_distance and (best is None or distance < best['distance']):
+                best = {'chunk_id': row['chunk_id'], 'source': row['source'], 'distance': distance}
+        return best
+
+    def list_records(self, source: str = None, collection: str = None, limit: int = 100, offset: int = 0) -> List[dict]:
+        """
+        List ingestion records, newest first.
+
+        Args:
+            source (str, optional): Only return records of this source document
+            collection (str, optional): Only return records of this collection
+            limit (int): Maximum number of records
+            offset (int): Number of records to skip
+
+        Returns:
+            List[dict]: Ingestion records
+        """
+        query = "SELECT * FROM ingestions"
+        conditions = []
+        params = []
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if collection:
+            conditions.append("collection = ?")
+            params.append(collection)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY ingested_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def filter_near_duplicates(self, collection: str, contents: List[str], max_distance: int,
+                               exclude_source: str = None) -> List[Tuple[int, int]]:
+        """
+        Select the chunks that are not near-duplicates of stored chunks or of each other.
+
+        A chunk is dropped when its SimHash is within `max_distance` bits of a
+        fingerprint stored for the collection or of a chunk kept earlier in
+        `contents`. Nothing is stored; call add_fingerprints once the kept
+        chunks are embedded.
+
+        Args:
+            collection (str): Collection the chunks will be stored in
+            contents (List[str]): Chunk texts, in document order
+            max_distance (int): Largest Hamming distance counted as a duplicate; negative keeps every chunk
+            exclude_source (str, optional): Ignore stored chunks of this source
+
+        Returns:
+            List[Tuple[int, int]]: (index into contents, fingerprint) of every kept chunk
+        """
+        kept = []
+        batch_index = FingerprintIndex(max(max_distance, 0))
+        for index, content in enumerate(contents):
+            fingerprint = simhash(content)
+            if max_distance >= 0:
+                if batch_index.find(fingerprint) is not None:
+                    continue
+                match = self.find_near_duplicate(collection, fingerprint, max_distance, exclude_source=exclude_source)
+                if match:
+                    logger.debug(f"Dropping near-duplicate chunk: {match['distance']} bits from {match['chunk_id']} ({match['source']})")
+                    continue
+            batch_index.add(fingerprint)
+            kept.append((index, fingerprint))
+        return kept
@@ -0,0 +1,149 @@
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_CATCH_UP_PASSES = 5  # Passes over the source collection before giving up on catching up with writes
+
+class ReembedCancelled(Exception):
+    """Raised inside a re-embed job when it is cancelled."""
+
+class ReembedJob:
+    """Class to build another embedding model's collection from the current one in the background."""
+
+    def __init__(self, source, target, registry: IngestionRegistry, batch_size: int = 64,
+                 on_complete: Optional[Callable[["ReembedJob"], None]] = None):
+        """
+        Initialize the ReembedJob.
+
+        Every chunk of the source embedder's collection is embedded with the
+        target embedder's model and stored in the target's collection under
+        the same ID and metadata. Queries keep using the source collection
+        while the job runs. Chunks already in the target are skipped, so an
+        interrupted job resumes where it stopped, and the source is re-read
+        until a pass finds nothing new, so chunks written meanwhile are picked
+        up. Chunks deleted from the source are then deleted from the target.
+        If writes still arrive after MAX_CATCH_UP_PASSES passes, the job ends
+        'not_caught_up' without calling `on_complete`, so a collection missing
+        recent chunks is never activated; running it again resumes.
+
+        Args:
+            source: Embedder of the collection being copied
+            target: Embedder of the new model and its collection
+            registry (IngestionRegistry): Registry whose records are copied to the target collection
+            batch_size (int): Chunks read and embedded per batch
+            on_complete (callable, optional): Called with the job once it completed, caught up with the source
+        """
+        self.source = source
+        self.target = target
+        self.registry = registry
+        self.batch_size = max(1, batch_size)
+        self.on_complete = on_complete
+        self._cancelled = threading.Event()
+        self.status = {
+            'source_model': source.model,
+            'target_model': target.model,
+            'source_collection': source.collection.name,
+            'target_collection': target.collection.name,
+            'state': 'pending',
+            'passes': 0,
+            'embedded': 0,
+            'already_present': 0,
+            'removed': 0,
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self.status['state'] in ('pending', 'running')
+
+    def cancel(self):
+        """Stop the job after the batch in progress."""
+        self._cancelled.set()
+
+    def run(self):
+        """Run the job to completion; the outcome is reported in `status`."""
+        self.status['state'] = 'running'
+        self.status['started_at'] = datetime.now(timezone.utc).isoformat()
+        try:
+            caught_up = False
+            for _ in range(MAX_CATCH_UP_PASSES):
+                self.status['passes'] += 1
+                if not self._copy_pass():
+                    caught_up = True
+                    break
+            self._remove_deleted()
+            self.registry.copy_collection(
+                self.source.collection.name, self.target.collection.name, embedding_model=self.target.model
+            )
+            if not caught_up:
+                self.status['state'] = 'not_caught_up'
+                self.status['error'] = (f"Chunks were still being written after {MAX_CATCH_UP_PASSES} passes; "
+                                        f"{self.target.model} was not activated, start the job again to resume")
+                logger.warning(f"Re-embedding with {self.target.model} did not catch up with writes: {self.status}")
+                return
+            self.status['state'] = 'completed'
+            logger.info(f"Re-embedded {self.status['source_collection']} into {self.status['target_collection']}: {self.status}")
+            if self.on_complete:
+                self.on_complete(self)
+        except ReembedCancelled:
+            self.status['state'] = 'cancelled'
+        except Exception as e:
+            logger.error(f"Re-embedding with {self.target.model} failed: {str(e)}")
+            self.status['state'] = 'failed'
+            self.status['error'] = str(e)
+        finally:
+            self.status['finished_at'] = datetime.now(timezone.utc).isoformat()
+
+    def _copy_pass(self) -> int:
+        """Embed source chunks missing from the target; returns how many were embedded."""
+        embedded = 0
+        offset = 0
+        while True:
+            if self._cancelled.is_set():
+                raise ReembedCancelled()
+            page = self.source.collection.get(
+                limit=self.batch_size, offset=offset, include=['documents', 'metadatas']
+            )
+            if not page['ids']:
+                return embedded
+            present = set(self.target.collection.get(ids=page['ids'], include=[])['ids'])
+            self.status['already_present'] += len(present)
+            missing = [index for index, chunk_id in enumerate(page['ids']) if chunk_id not in present]
+            if missing:
+                documents = [page['documents'][index] for index in missing]
+                metadatas = []
+                for index in missing:
+                    metadata = dict(page['metadatas'][index] or {})
+                    metadata['embedding_model'] = self.target.model
+                    metadatas.append(metadata)
+                self.target.collection.add(
+                    ids=[page['ids'][index] for index in missing],
+                    embeddings=self.target.embed_documents(documents),
+                    documents=documents,
+                    metadatas=metadatas
+                )
+                embedded += len(missing)
+                self.status['embedded'] += len(missing)
+            offset += len(page['ids'])
+
+    def _remove_deleted(self):
+        """Delete target chunks whose ID is no longer in the source."""
+        offset = 0
+        while True:
+            if self._cancelled.is_set():
+                raise ReembedCancelled()
+            ids = self.target.collection.get(limit=self.batch_size, offset=offset, include=[])['ids']
+            if not ids:
+                return
+            kept = set(self.source.collection.get(ids=ids, include=[])['ids'])
+            stale = [chunk_id for chunk_id in ids if chunk_id not in kept]
+            if stale:
+                self.target.collection.delete(ids=stale)
+                self.status['removed'] += len(stale)
+            offset += len(ids) - len(stale)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from itertools import islice
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"  # float32 matrix, row i belongs to line i of RECORDS_FILE
+RECORDS_FILE = "records.jsonl"  # One {"id", "document", "metadata"} object per line
+REGISTRY_FILE = "registry.json"  # Ingestion records and chunk fingerprints of the collection
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for block in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def export_snapshot(collection, path: str, registry=None, batch_size: int = 1000) -> dict:
+    """
+    Write a collection's IDs, documents, metadata and embeddings to a snapshot directory.
+
+    Embeddings go to a .npy file, which import memory-maps; the other columns
+    go to a JSON Lines file with one line per embedding row. A manifest lists
+    the collection, embedding model, shape and file checksums.
+
+    Args:
+        collection: Collection to export (VectorStore)
+        path (str): Snapshot directory; must not exist or be empty
+        registry (IngestionRegistry, optional): Registry whose records of the collection are included
+        batch_size (int): Records read per request
+
+    Returns:
+        dict: The manifest
+
+    Raises:
+        ValueError: If the directory is not empty or the collection keeps no full-precision vectors
+    """
+    if os.path.isdir(path) and os.listdir(path):
+        raise ValueError(f"Snapshot directory {path} is not empty")
+    storage = getattr(collection, 'storage', None)
+    if storage and (storage['dtype'] != 'float32' or storage['dimensions']) and not storage['rescore']:
+        raise ValueError(f"{collection.name} keeps no full-precision vectors to export")
+    os.makedirs(path, exist_ok=True)
+
+    raw_path = os.path.join(path, EMBEDDINGS_FILE + ".raw")
+    rows, dimension, offset = 0, None, 0
+    with open(raw_path, 'wb') as raw_file, open(os.path.join(path, RECORDS_FILE), 'w', encoding='utf-8') as records_file:
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=['embeddings', 'documents', 'metadatas'])
+            if not page['ids']:
+                break
+            vectors = np.asarray(page['embeddings'], dtype=np.float32)
+            dimension = dimension or vectors.shape[1]
+            raw_file.write(vectors.tobytes())
+            for record_id, document, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                records_file.write(json.dumps({'id': record_id, 'document': document, 'metadata': metadata}) + "\n")
+            rows += len(page['ids'])
+            offset += len(page['ids'])
+
+    # The row count is only known now, so the .npy header is written ahead of the data afterwards
+    with open(os.path.join(path, EMBEDDINGS_FILE), 'wb') as outfile, open(raw_path, 'rb') as raw_file:
+        np.lib.format.write_array_header_1_0(
+            outfile, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float32)), 'fortran_order': False,
+                      'shape': (rows, dimension or 0)}
+        )
+        shutil.copyfileobj(raw_file, outfile, 1 << 20)
+    os.remove(raw_path)
+
+    files = [EMBEDDINGS_FILE, RECORDS_FILE]
+    if registry is not None:
+        with open(os.path.join(path, REGISTRY_FILE), 'w', encoding='utf-8') as outfile:
+            json.dump(registry.dump_collection(collection.name), outfile)
+        files.append(REGISTRY_FILE)
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'collection': collection.name,
+        'embedding_model': (collection.metadata or {}).get('embedding_model'),
+        'count': rows,
+        'dimension': dimension,
+        'dtype': 'float32',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'files': {
+            name: {'bytes': os.path.getsize(os.path.join(path, name)), 'sha256': file_sha256(os.path.join(path, name))}
+            for name in files
+        },
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w', encoding='utf-8') as outfile:
+        json.dump(manifest, outfile, indent=2)
+    logger.info(f"Exported {rows} records of {collection.name} to {path}")
+    return manifest
+
+def read_manifest(path: str, verify: bool = True) -> dict:
+    """
+    Read a snapshot's manifest, optionally checking its files against their checksums.
+
+    Raises:
+        ValueError: If the manifest is missing, of an unknown format, or a file does not match it
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No {MANIFEST_FILE} in {path}")
+    with open(manifest_path, encoding='utf-8') as infile:
+        manifest = json.load(infile)
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')}")
+    if verify:
+        for name, expected in manifest['files'].items():
+            file_path = os.path.join(path, name)
+            if not os.path.exists(file_path) or file_sha256(file_path) != expected['sha256']:
+                raise ValueError(f"{name} in {path} does not match the manifest")
+    return manifest
+
+def import_snapshot(collection, path: str, registry=None, batch_size: int = 5000, verify: bool = True) -> dict:
+    """
+    Bulk-load a snapshot into a collection without calling any embedding provider.
+
+    Records are upserted, so importing twice, or into a collection that
+    already holds some of the records, leaves one copy of each.
+
+    Args:
+        collection: Collection receiving the records (VectorStore)
+        path (str): Snapshot directory written by export_snapshot
+        registry (IngestionRegistry, optional): Registry receiving the snapshot's ingestion records
+        batch_size (int): Records written per upsert
+        verify (bool): Check file checksums first
+
+    Returns:
+        dict: The snapshot's manifest
+
+    Raises:
+        ValueError: If the snapshot is invalid or was embedded with another model than the collection's
+    """
+    manifest = read_manifest(path, verify=verify)
+    model = (collection.metadata or {}).get('embedding_model')
+    if model and manifest['embedding_model'] and model != manifest['embedding_model']:
+        raise ValueError(f"Snapshot was embedded with {manifest['embedding_model']}, {collection.name} holds {model}")
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode='r')
+    if embeddings.shape != (manifest['count'], manifest['dimension'] or 0):
+        raise ValueError(f"{EMBEDDINGS_FILE} has shape {embeddings.shape}, the manifest expects "
+                         f"({manifest['count']}, {manifest['dimension']})")
+
+    start = 0
+    with open(os.path.join(path, RECORDS_FILE), encoding='utf-8') as infile:
+        while True:
+            records = [json.loads(line) for line in islice(infile, batch_size)]
+            if not records:
+                break
+            collection.upsert(
+                ids=[record['id'] for record in records],
+                embeddings=np.asarray(embeddings[start:start + len(records)]),
+                documents=[record['document'] for record in records],
+                metadatas=[record['metadata'] for record in records],
+            )
+            start += len(records)
+    if start != manifest['count']:
+        raise ValueError(f"{RECORDS_FILE} holds {start} records, the manifest expects {manifest['count']}")
+
+    registry_path = os.path.join(path, REGISTRY_FILE)
+    if registry is not None and os.path.exists(registry_path):
+        with open(registry_path, encoding='utf-8') as infile:
+            registry.load_collection(collection.name, json.load(infile))
+    logger.info(f"Imported {start} records from {path} into {collection.name}")
+    return manifest
@@ -0,0 +1,604 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_INCLUDE = ('documents', 'metadatas')
+DEFAULT_QUERY_INCLUDE = ('documents', 'metadatas', 'distances')
+COMPACT_MIN_DEAD_ROWS = 1024  # Deleted rows tolerated before the vector file is rewritten
+STORAGE_DTYPES = ('float32', 'float16', 'int8')
+DEFAULT_STORAGE = {'dtype': 'float32', 'dimensions': None, 'rescore': 0}
+SCORE_BLOCK_ROWS = 65536  # Compressed rows decoded at a time while scoring
+
+class VectorStore(ABC):
+    """
+    Base class for vector stores holding one collection of chunks.
+
+    The methods follow ChromaDB's Collection API (argument names, `include`
+    and the shape of returned dicts), so embedders and handlers work with any
+    store. Distances are cosine distances (1 - cosine similarity).
+    """
+
+    name: str
+
+    @property
+    @abstractmethod
+    def metadata(self) -> Optional[dict]:
+        """Collection-level metadata (e.g. the embedding model)."""
+        pass
+
+    @abstractmethod
+    def modify(self, metadata: Optional[dict] = None, **kwargs):
+        """Replace the collection-level metadata."""
+        pass
+
+    @abstractmethod
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        """Add records; IDs already stored are ignored and duplicate IDs within the call are an error."""
+        pass
+
+    @abstractmethod
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        """Add records, replacing records with the same ID."""
+        pass
+
+    @abstractmethod
+    def update(self, ids, metadatas=None):
+        """Merge metadata into stored records; keys set to None are removed and IDs not stored are ignored."""
+        pass
+
+    @abstractmethod
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[dict] = None,
+              include: Sequence[str] = DEFAULT_QUERY_INCLUDE) -> dict:
+        """Nearest records of each query embedding, optionally restricted by a metadata filter."""
+        pass
+
+    @abstractmethod
+    def get(self, ids=None, where: Optional[dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = DEFAULT_INCLUDE) -> dict:
+        """Records by ID and/or metadata filter, in insertion order."""
+        pass
+
+    @abstractmethod
+    def delete(self, ids=None, where: Optional[dict] = None):
+        """Delete records by ID and/or metadata filter."""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored records."""
+        pass
+
+class ChromaVectorStore(VectorStore):
+    """VectorStore backed by a ChromaDB collection (HNSW index on disk)."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    @property
+    def metadata(self) -> Optional[dict]:
+        return self._collection.metadata
+
+    def modify(self, metadata: Optional[dict] = None, **kwargs):
+        self._collection.modify(metadata=metadata, **kwargs)
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def update(self, ids, metadatas=None):
+        self._collection.update(ids=ids, metadatas=metadatas)
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[dict] = None,
+              include: Sequence[str] = DEFAULT_QUERY_INCLUDE) -> dict:
+        return self._collection.query(
+            query_embeddings=query_embeddings, n_results=n_results, where=where, include=list(include)
+        )
+
+    def get(self, ids=None, where: Optional[dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = DEFAULT_INCLUDE) -> dict:
+        return self._collection.get(ids=ids, where=where, limit=limit, offset=offset, include=list(include))
+
+    def delete(self, ids=None, where: Optional[dict] = None):
+        self._collection.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return self._collection.count()
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)  # ChromaDB specifics such as configuration_json
+
+_COMPARISONS = {'$eq': '=', '$ne': '!=', '$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}
+
+def where_to_sql(where: dict) -> Tuple[str, list]:
+    """
+    Translate a ChromaDB `where` clause into an SQL condition on the JSON metadata column.
+
+    Supports $and, $or, the comparisons $eq/$ne/$gt/$gte/$lt/$lte, $in/$nin,
+    and $contains/$not_contains on list values (such as tags).
+
+    Args:
+        where (dict): The where clause
+
+    Returns:
+        Tuple of (SQL condition, parameters)
+
+    Raises:
+        ValueError: If the clause uses an unsupported operator
+    """
+    if not isinstance(where, dict) or not where:
+        raise ValueError(f"Invalid where clause: {where!r}")
+    conditions, params = [], []
+    for key, value in where.items():
+        if key in ('$and', '$or'):
+            parts = [where_to_sql(clause) for clause in value]
+            conditions.append('(' + f" {key[1:].upper()} ".join(sql for sql, _ in parts) + ')')
+            for _, part_params in parts:
+                params.extend(part_params)
+            continue
+        if key.startswith('$') or '"' in key:
+            raise ValueError(f"Unsupported where field {key!r}")
+        path = f'$."{key}"'
+        operators = value if isinstance(value, dict) else {'$eq': value}
+        for operator, operand in operators.items():
+            if operator in _COMPARISONS:
+                conditions.append(f"json_extract(metadata, ?) {_COMPARISONS[operator]} ?")
+                params.extend([path, operand])
+            elif operator in ('$in', '$nin'):
+                placeholders = ', '.join('?' * len(operand))
+                negation = 'NOT ' if operator == '$nin' else ''
+                conditions.append(f"json_extract(metadata, ?) {negation}IN ({placeholders})")
+                params.extend([path, *operand])
+            elif operator in ('$contains', '$not_contains'):
+                negation = 'NOT ' if operator == '$not_contains' else ''
+                conditions.append(f"{negation}EXISTS (SELECT 1 FROM json_each(metadata, ?) WHERE value = ?)")
+                params.extend([path, operand])
+            else:
+                raise ValueError(f"Unsupported where operator {operator!r}")
+    return '(' + ' AND '.join(conditions) + ')', params
+
+class NumpyVectorStore(VectorStore):
+    """VectorStore keeping vectors in a memory-mapped matrix searched exactly."""
+
+    def __init__(self, path: str, name: str, metadata: Optional[dict] = None, storage: Optional[dict] = None):
+        """
+        Open the store at `path`, creating it if needed.
+
+        Vectors are normalized on insert and appended to `vectors.f32`, which
+        is memory-mapped, so the OS page cache holds the index and a query is
+        one matrix-vector product over it. IDs, documents and metadata live in
+        a SQLite file next to it, and metadata filters run there as SQL.
+        Deleted rows are skipped until enough accumulate to rewrite the file.
+
+        With compressed storage, queries scan a smaller matrix in `coarse.bin`
+        instead: vectors truncated to their first `dimensions` components
+        (Matryoshka models) and/or stored as float16 or int8 (with a per-row
+        scale). If `rescore` is set, full vectors are still kept on disk and
+        the best `rescore` x n_results candidates are re-scored exactly.
+
+        Args:
+            path (str): Directory of the store
+            name (str): Collection name
+            metadata (dict, optional): Collection-level metadata, used if the store is created
+            storage (dict, optional): 'dtype', 'dimensions' and 'rescore', used if the store is created
+        """
+        self.path = path
+        self.name = name
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(path, 'vectors.f32')
+        self._coarse_path = os.path.join(path, 'coarse.bin')
+        self._scales_path = os.path.join(path, 'scales.f32')
+        self._info_path = os.path.join(path, 'collection.json')
+        if os.path.exists(self._info_path):
+            with open(self._info_path) as infile:
+                self._info = json.load(infile)
+        else:
+            self._info = {'name': name, 'metadata': metadata, 'dimension': None, 'storage': dict(storage or DEFAULT_STORAGE)}
+            self._save_info()
+        self._info.setdefault('storage', dict(DEFAULT_STORAGE))
+        self._connection = sqlite3.connect(os.path.join(path, 'records.db'), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS records (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+                "document TEXT, metadata TEXT)"
+            )
+        self._load()
+
+    def _save_info(self):
+        temporary = self._info_path + '.tmp'
+        with open(temporary, 'w') as outfile:
+            json.dump(self._info, outfile)
+        os.replace(temporary, self._info_path)
+
+    @property
+    def storage(self) -> dict:
+        """Storage settings: 'dtype', 'dimensions' (None for all) and 'rescore' factor."""
+        return dict(self._info['storage'])
+
+    def _compressed(self, storage: Optional[dict] = None) -> bool:
+        storage = storage or self._info['storage']
+        return storage['dtype'] != 'float32' or bool(storage['dimensions'])
+
+    def _keeps_full(self, storage: Optional[dict] = None) -> bool:
+        storage = storage or self._info['storage']
+        return not self._compressed(storage) or bool(storage['rescore'])
+
+    def _coarse_dimension(self) -> int:
+        return self._info['storage']['dimensions'] or self._info['dimension']
+
+    @staticmethod
+    def _map(path: str, dtype, shape: tuple):
+        return np.memmap(path, dtype=dtype, mode='r', shape=shape) if shape[0] else None
+
+    def _load(self):
+        """Map the vector files and rebuild the live-row mask from the records."""
+        rows = self._map_files()
+        self._alive = np.zeros(rows, dtype=bool)
+        live = [row for (row,) in self._connection.execute("SELECT row FROM records") if row < rows]
+        self._alive[live] = True
+
+    def _map_files(self) -> int:
+        """Map the vector files at their current size; returns the number of rows."""
+        dimension = self._info['dimension']
+        self._release_maps()
+        rows = 0
+        if dimension and self._compressed():
+            dtype = np.dtype(self._info['storage']['dtype'])
+            if os.path.exists(self._coarse_path):
+                rows = os.path.getsize(self._coarse_path) // (dtype.itemsize * self._coarse_dimension())
+            self._coarse = self._map(self._coarse_path, dtype, (rows, self._coarse_dimension()))
+            if dtype == np.int8:
+                self._scales = self._map(self._scales_path, np.float32, (rows,))
+            if self._keeps_full():
+                self._full = self._map(self._vectors_path, np.float32, (rows, dimension))
+        elif dimension and os.path.exists(self._vectors_path):
+            rows = os.path.getsize(self._vectors_path) // (4 * dimension)
+            self._full = self._coarse = self._map(self._vectors_path, np.float32, (rows, dimension))
+        return rows
+
+    def _release_maps(self):
+        """Drop the memory maps, so their files can be replaced or removed (which Windows refuses while mapped)."""
+        self._full = self._coarse = self._scales = None
+
+    @property
+    def index_bytes(self) -> int:
+        """Size of the vectors scanned by every query (the part that should stay in memory)."""
+        if self._coarse is None:
+            return 0
+        return self._coarse.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    @property
+    def metadata(self) -> Optional[dict]:
+        return self._info['metadata']
+
+    def modify(self, metadata: Optional[dict] = None, **kwargs):
+        if kwargs:
+            raise ValueError(f"Unsupported collection settings for the numpy vector store: {sorted(kwargs)}")
+        with self._lock:
+            self._info['metadata'] = metadata
+            self._save_info()
+
+    def count(self) -> int:
+        return int(self._alive.sum())
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write(ids, embeddings, metadatas, documents, replace=False)
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None):
+        self._write(ids, embeddings, metadatas, documents, replace=True)
+
+    def update(self, ids, metadatas=None):
+        if metadatas is None:
+            return  # Vectors and documents are replaced with upsert
+        ids = [ids] if isinstance(ids, str) else list(ids)
+        with self._lock:
+            stored = {}
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                stored.update(self._connection.execute(
+                    f"SELECT id, metadata FROM records WHERE id IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall())
+            updates = []
+            for record_id, metadata in zip(ids, metadatas):
+                if record_id not in stored:
+                    continue
+                merged = {**(json.loads(stored[record_id]) if stored[record_id] else {}), **(metadata or {})}
+                merged = {key: value for key, value in merged.items() if value is not None}
+                updates.append((json.dumps(merged) if merged else None, record_id))
+            with self._connection:
+                self._connection.executemany("UPDATE records SET metadata = ? WHERE id = ?", updates)
+
+    def _encode(self, vectors: np.ndarray, storage: Optional[dict] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Compressed rows (truncated, renormalized, cast) and their int8 scales."""
+        storage = storage or self._info['storage']
+        coarse = vectors[:, :storage['dimensions']]
+        coarse = coarse / np.maximum(np.linalg.norm(coarse, axis=1, keepdims=True), 1e-12)
+        if storage['dtype'] == 'int8':
+            scales = (np.maximum(np.abs(coarse).max(axis=1), 1e-12) / 127).astype(np.float32)
+            return np.round(coarse / scales[:, None]).astype(np.int8), scales
+        return coarse.astype(storage['dtype']), None
+
+    def _append(self, vectors: np.ndarray):
+        if self._keeps_full():
+            with open(self._vectors_path, 'ab') as outfile:
+                outfile.write(vectors.tobytes())
+        if self._compressed():
+            coarse, scales = self._encode(vectors)
+            with open(self._coarse_path, 'ab') as outfile:
+                outfile.write(coarse.tobytes())
+            if scales is not None:
+                with open(self._scales_path, 'ab') as outfile:
+                    outfile.write(scales.tobytes())
+
+    def _write(self, ids, embeddings, metadatas, documents, replace: bool):
+        ids = [ids] if isinstance(ids, str) else list(ids)
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate IDs in one add")
+        if embeddings is None:
+            raise ValueError("The numpy vector store needs embeddings")
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if self._info['dimension'] is None:
+                if (self._info['storage']['dimensions'] or 0) > vectors.shape[1]:
+                    raise ValueError(f"Cannot truncate {vectors.shape[1]}-dimensional embeddings to "
+                                     f"{self._info['storage']['dimensions']} dimensions")
+                self._info['dimension'] = int(vectors.shape[1])
+                self._save_info()
+            elif vectors.shape[1] != self._info['dimension']:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match {self._info['dimension']}")
+
+            existing = self._rows_for_ids(ids)
+            if replace:
+                self._remove_rows(list(existing.values()))
+                keep = list(range(len(ids)))
+            else:
+                keep = [index for index, record_id in enumerate(ids) if record_id not in existing]
+            if not keep:
+                return
+
+            first_row = len(self._alive)
+            self._append(vectors[keep])
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            first_row + position,
+                            ids[index],
+                            documents[index] if documents is not None else None,
+                            json.dumps(metadatas[index]) if metadatas is not None and metadatas[index] is not None else None,
+                        )
+                        for position, index in enumerate(keep)
+                    ]
+                )
+            # Extend the mask with the appended rows instead of re-reading every record
+            alive = np.zeros(self._map_files(), dtype=bool)
+            alive[:first_row] = self._alive
+            alive[first_row:] = True
+            self._alive = alive
+
+    def _rows_for_ids(self, ids: List[str]) -> Dict[str, int]:
+        rows = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows.update(self._connection.execute(
+                f"SELECT id, row FROM records WHERE id IN ({', '.join('?' * len(batch))})", batch
+            ).fetchall())
+        return rows
+
+    def _select_rows(self, ids=None, where: Optional[dict] = None) -> List[int]:
+        """Rows matching the IDs and filter, in insertion order."""
+        conditions, params = [], []
+        if ids is not None:
+            ids = [ids] if isinstance(ids, str) else list(ids)
+            if not ids:
+                return []
+            conditions.append(f"id IN ({', '.join('?' * len(ids))})")
+            params.extend(ids)
+        if where:
+            sql, where_params = where_to_sql(where)
+            conditions.append(sql)
+            params.extend(where_params)
+        clause = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        return [row for (row,) in self._connection.execute(f"SELECT row FROM records{clause} ORDER BY row", params)]
+
+    def get(self, ids=None, where: Optional[dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = DEFAULT_INCLUDE) -> dict:
+        with self._lock:
+            rows = self._select_rows(ids, where)
+            rows = rows[offset or 0:][:limit] if limit is not None else rows[offset or 0:]
+            return self._records(rows, include)
+
+    def _decoded(self, rows) -> np.ndarray:
+        """Stored vectors of some rows: full precision when kept, otherwise decoded from the compressed matrix."""
+        if self._full is not None:
+            return np.array(self._full[rows])
+        vectors = np.asarray(self._coarse[rows], dtype=np.float32)
+        return vectors * self._scales[rows][:, None] if self._scales is not None else vectors
+
+    def _records(self, rows: List[int], include: Sequence[str]) -> dict:
+        by_row = {}
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            for row, record_id, document, metadata in self._connection.execute(
+                    f"SELECT row, id, document, metadata FROM records WHERE row IN ({', '.join('?' * len(batch))})", batch):
+                by_row[row] = (record_id, document, json.loads(metadata) if metadata else None)
+        result = {
+            'ids': [by_row[row][0] for row in rows],
+            'documents': [by_row[row][1] for row in rows] if 'documents' in include else None,
+            'metadatas': [by_row[row][2] for row in rows] if 'metadatas' in include else None,
+            'embeddings': None,
+        }
+        if 'embeddings' in include:
+            dimension = self._info['dimension'] or 0
+            result['embeddings'] = self._decoded(rows) if rows else np.empty((0, dimension), dtype=np.float32)
+        return result
+
+    def _coarse_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Similarity of the query to every row (or the given rows) of the scanned matrix."""
+        if not self._compressed():
+            return (self._coarse[rows] if rows is not None else self._coarse) @ query
+        query = query[:self._coarse_dimension()]
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        total = len(rows) if rows is not None else len(self._coarse)
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, SCORE_BLOCK_ROWS):
+            block = rows[start:start + SCORE_BLOCK_ROWS] if rows is not None else slice(start, start + SCORE_BLOCK_ROWS)
+            block_scores = np.asarray(self._coarse[block], dtype=np.float32) @ query
+            if self._scales is not None:
+                block_scores *= self._scales[block]
+            scores[start:start + len(block_scores)] = block_scores
+        return scores
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[dict] = None,
+              include: Sequence[str] = DEFAULT_QUERY_INCLUDE) -> dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries.reshape(1, -1) if queries.ndim == 1 else queries
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        result = {key: [] for key in ('ids', 'documents', 'metadatas', 'distances', 'embeddings')}
+        with self._lock:
+            if where:
+                candidates = np.asarray(self._select_rows(where=where), dtype=np.int64)
+            else:
+                candidates = np.flatnonzero(self._alive)
+            rescore = self._info['storage']['rescore'] if self._compressed() and self._full is not None else 0
+            for query in queries:
+                if len(candidates) == 0:
+                    top, similarities = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+                else:
+                    scores = self._coarse_scores(query, candidates) if where else self._masked_scores(query)
+                    k = min(n_results, len(candidates))
+                    shortlist = min(k * rescore, len(candidates)) if rescore else k
+                    best = np.argpartition(-scores, shortlist - 1)[:shortlist]
+                    rows = candidates[best] if where else best
+                    similarities = scores[best]
+                    if rescore:
+                        similarities = self._full[np.sort(rows)] @ query  # Exact scores of the shortlist
+                        rows = np.sort(rows)
+                    order = np.argsort(-similarities)[:k]
+                    top, similarities = rows[order], similarities[order]
+                records = self._records(top.tolist(), include)
+                for key in ('ids', 'documents', 'metadatas', 'embeddings'):
+                    result[key].append(records[key])
+                result['distances'].append((1 - similarities).tolist())
+        for key in ('documents', 'metadatas', 'distances', 'embeddings'):
+            if key not in include:
+                result[key] = None
+        return result
+
+    def _masked_scores(self, query: np.ndarray) -> np.ndarray:
+        """Similarity of every row, with deleted rows pushed to the bottom."""
+        scores = self._coarse_scores(query)
+        scores[~self._alive] = -np.inf
+        return scores
+
+    def delete(self, ids=None, where: Optional[dict] = None):
+        if ids is None and not where:
+            raise ValueError("delete needs ids or where")
+        with self._lock:
+            self._remove_rows(self._select_rows(ids, where))
+
+    def _remove_rows(self, rows: List[int]):
+        if not rows:
+            return
+        with self._connection:
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                self._connection.execute(f"DELETE FROM records WHERE row IN ({', '.join('?' * len(batch))})", batch)
+        self._alive[rows] = False
+        dead = len(self._alive) - self.count()
+        if dead >= max(COMPACT_MIN_DEAD_ROWS, self.count()):
+            self.compact()
+
+    def _vector_files(self) -> List[Tuple[str, np.ndarray]]:
+        """Row-aligned files of the store with their mapped arrays."""
+        files = [(self._vectors_path, self._full)] if self._full is not None else []
+        if self._compressed() and self._coarse is not None:
+            files.append((self._coarse_path, self._coarse))
+        if self._scales is not None:
+            files.append((self._scales_path, self._scales))
+        return files
+
+    def _write_live_rows(self, live: np.ndarray) -> List[str]:
+        """Write the live rows of every vector file to a '.tmp' file next to it; returns the files' paths."""
+        paths = []
+        for path, array in self._vector_files():
+            with open(path + '.tmp', 'wb') as outfile:
+                for start in range(0, len(live), 10000):
+                    outfile.write(np.asarray(array[live[start:start + 10000]]).tobytes())
+            paths.append(path)
+        return paths  # The references to the mapped arrays end here, so releasing them unmaps the files
+
+    def compact(self):
+        """Rewrite the vector files without deleted rows."""
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            paths = self._write_live_rows(live)
+            with self._connection:
+                # New rows are never above old ones, so renumbering in ascending order cannot collide
+                self._connection.executemany(
+                    "UPDATE records SET row = ? WHERE row = ?",
+                    [(new_row, int(old_row)) for new_row, old_row in enumerate(live) if new_row != old_row]
+                )
+            self._release_maps()
+            for path in paths:
+                os.replace(path + '.tmp', path)
+            logger.info(f"Compacted {self.name}: {len(self._alive) - len(live)} deleted rows removed")
+            self._load()
+
+    def set_storage(self, storage: dict):
+        """
+        Re-encode the stored vectors with new storage settings.
+
+        Args:
+            storage (dict): 'dtype', 'dimensions' and 'rescore'
+
+        Raises:
+            ValueError: If full-precision vectors were not kept, or the dimensions exceed the embeddings'
+        """
+        with self._lock:
+            dimension = self._info['dimension']
+            if len(self._alive) and self._full is None:
+                raise ValueError(f"{self.name} keeps no full-precision vectors to re-encode; re-embed it instead")
+            if dimension and (storage['dimensions'] or 0) > dimension:
+                raise ValueError(f"Cannot truncate {dimension}-dimensional embeddings to {storage['dimensions']} dimensions")
+            self.compact()
+            if self._compressed(storage):
+                with open(self._coarse_path + '.tmp', 'wb') as coarse_file, open(self._scales_path + '.tmp', 'wb') as scales_file:
+                    for start in range(0, len(self._alive), 10000):
+                        coarse, scales = self._encode(np.asarray(self._full[start:start + 10000]), storage)
+                        coarse_file.write(coarse.tobytes())
+                        if scales is not None:
+                            scales_file.write(scales.tobytes())
+            self._release_maps()
+            for path, used in ((self._coarse_path, self._compressed(storage)),
+                               (self._scales_path, self._compressed(storage) and storage['dtype'] == 'int8')):
+                if used:
+                    os.replace(path + '.tmp', path)
+                else:
+                    for stale in (path, path + '.tmp'):
+                        if os.path.exists(stale):
+                            os.remove(stale)
+            if not self._keeps_full(storage) and os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+            self._info['storage'] = dict(storage)
+            self._save_info()
+            self._load()
+            logger.info(f"Re-encoded {self.name} with storage {storage}")
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            self._connection.close()
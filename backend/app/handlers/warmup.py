@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_WARMUP_QUERIES = (
+    "How do I store a cue?",
+    "network configuration",
+    "patch fixtures",
+)
+
+class Warmup:
+    """Class to load the index and models the first requests would otherwise load."""
+
+    def __init__(self, embedder, chat_handler_factory: Optional[Callable] = None,
+                 queries: Optional[List[str]] = None, keep_alive: Optional[str] = None, top_k: int = 5):
+        """
+        Initialize the Warmup.
+
+        Steps run in order, each timed in `status`: reading the collection's
+        index (queried with one of its own vectors, so it loads without the
+        embedding provider), loading the embedding model, creating the chat
+        provider and loading its model, then running `queries` through the
+        embedder's search. A failing step is recorded and the next one runs.
+
+        Args:
+            embedder: Embedder of the default model and its collection
+            chat_handler_factory (callable, optional): Creates the default chat provider; skipped if None
+            queries (List[str], optional): Synthetic search queries. Defaults to DEFAULT_WARMUP_QUERIES.
+            keep_alive (str, optional): How long Ollama keeps preloaded models, e.g. "30m"
+            top_k (int): Results fetched per synthetic query
+        """
+        self.embedder = embedder
+        self.chat_handler_factory = chat_handler_factory
+        self.queries = list(DEFAULT_WARMUP_QUERIES if queries is None else queries)
+        self.keep_alive = keep_alive
+        self.top_k = top_k
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self.status = {
+            'state': 'pending',
+            'collection': embedder.collection.name,
+            'steps': {},
+            'started_at': None,
+            'finished_at': None,
+        }
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up has finished, successfully or not."""
+        return self._finished.is_set()
+
+    def cancel(self):
+        """Skip the steps not started yet."""
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up finishes; returns whether it did within `timeout`."""
+        return self._finished.wait(timeout)
+
+    def run(self):
+        """Run every step; the outcome is reported in `status`."""
+        self.status['state'] = 'running'
+        self.status['started_at'] = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        try:
+            self._step('index', self._load_index)
+            self._step('embedding_model', lambda: self.embedder.warm_up(keep_alive=self.keep_alive))
+            if self.chat_handler_factory:
+                self._step('chat_model', lambda: self.chat_handler_factory().warm_up(keep_alive=self.keep_alive))
+            self._step('queries', self._run_queries)
+            failed = [name for name, step in self.status['steps'].items() if step['error']]
+            self.status['state'] = 'cancelled' if self._cancelled.is_set() else 'failed' if failed else 'completed'
+            logger.info(f"Warm-up {self.status['state']} in {time.perf_counter() - started:.2f}s: {self.status['steps']}")
+        finally:
+            self.status['finished_at'] = datetime.now(timezone.utc).isoformat()
+            self._finished.set()
+
+    def _step(self, name: str, action: Callable):
+        """Run one step unless cancelled, recording its duration and error."""
+        if self._cancelled.is_set():
+            return
+        started = time.perf_counter()
+        error = None
+        try:
+            action()
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"Warm-up step {name} failed: {error}")
+        self.status['steps'][name] = {'seconds': round(time.perf_counter() - started, 3), 'error': error}
+
+    def _load_index(self):
+        """Query the collection with one of its stored vectors, loading its index from disk."""
+        collection = self.embedder.collection
+        peek = collection.get(limit=1, include=['embeddings'])
+        if peek['embeddings'] is not None and len(peek['embeddings']):
+            collection.query(query_embeddings=[list(peek['embeddings'][0])], n_results=1, include=[])
+
+    def _run_queries(self):
+        """Search the synthetic queries through the same path as user requests."""
+        for query in self.queries:
+            if self._cancelled.is_set():
+                break
+            self.embedder.search(query, top_k=self.top_k)
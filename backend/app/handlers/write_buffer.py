@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Optional
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class _PendingAdd:
+    """One producer's add() call waiting to be written."""
+
+    def __init__(self, ids: list, embeddings, documents, metadatas):
+        self.ids = ids
+        self.embeddings = embeddings
+        self.documents = documents
+        self.metadatas = metadatas
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+class WriteBuffer:
+    """Class to coalesce concurrent ChromaDB adds into large batches (group commit)."""
+
+    def __init__(self, collection, max_batch_size: int, flush_size: Optional[int] = None, max_delay: float = 0.01):
+        """
+        Initialize the WriteBuffer and start its writer thread.
+
+        A single writer thread takes every pending add and writes them with one
+        collection.add. Pending adds are written once they add up to `flush_size`
+        records or the oldest has waited `max_delay` seconds; adds that arrive
+        while a write is in progress join the next batch. Batches never exceed
+        `max_batch_size` records.
+
+        Args:
+            collection: The ChromaDB collection to write to
+            max_batch_size (int): Largest batch the ChromaDB client accepts
+            flush_size (int, optional): Pending records that trigger an immediate write. Defaults to max_batch_size.
+            max_delay (float): Longest time an add waits for others to join its batch
+        """
+        self.collection = collection
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_size = min(flush_size or self.max_batch_size, self.max_batch_size)
+        self.max_delay = max_delay
+        self._pending = deque()
+        self._pending_records = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self.stats = {'requests': 0, 'records': 0, 'batches': 0, 'failed_requests': 0}
+        self._thread = threading.Thread(target=self._run, name="chroma-write-buffer", daemon=True)
+        self._thread.start()
+
+    def submit(self, ids: List[str], embeddings=None, documents=None, metadatas=None) -> Future:
+        """
+        Queue an add for the next batch.
+
+        Args:
+            ids (List[str]): Record IDs
+            embeddings (list, optional): Embedding vectors, aligned with ids
+            documents (list, optional): Document texts, aligned with ids
+            metadatas (list, optional): Metadata dicts, aligned with ids
+
+        Returns:
+            Future: Resolves to None once the records are written, or raises the write's error
+        """
+        request = _PendingAdd(list(ids), embeddings, documents, metadatas)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write buffer is closed")
+            self._pending.append(request)
+            self._pending_records += len(request.ids)
+            self._condition.notify()
+        return request.future
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until every add submitted so far has been written."""
+        with self._condition:
+            futures = [request.future for request in self._pending]
+            self._condition.notify()
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass  # Reported to the producer through its own future
+
+    def close(self):
+        """Write everything still pending and stop the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _take_batch(self) -> List[_PendingAdd]:
+        """Pop whole requests up to max_batch_size records (a larger single request is taken alone)."""
+        batch = [self._pending.popleft()]
+        records = len(batch[0].ids)
+        while self._pending and records + len(self._pending[0].ids) <= self.max_batch_size:
+            records += len(self._pending[0].ids)
+            batch.append(self._pending.popleft())
+        self._pending_records -= records
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return  # Closed and drained
+                # Linger until the batch is large enough or the oldest add has waited long enough
+                while not self._closed and self._pending_records < self.flush_size:
+                    remaining = self._pending[0].enqueued_at + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+            self._write(batch)
+
+    def _write(self, batch: List[_PendingAdd]):
+        try:
+            self._add_records(batch)
+            for request in batch:
+                request.future.set_result(None)
+        except Exception as e:
+            if len(batch) == 1:
+                self.stats['failed_requests'] += 1
+                batch[0].future.set_exception(e)
+                return
+            # Retry each request on its own so one bad add does not fail the others
+            logger.warning(f"Batched add of {len(batch)} requests failed ({str(e)}), retrying individually")
+            for request in batch:
+                self._write([request])
+            return
+        self.stats['requests'] += len(batch)
+
+    def _add_records(self, batch: List[_PendingAdd]):
+        ids, embeddings, documents, metadatas = [], [], [], []
+        seen = set()
+        for request in batch:
+            for index, record_id in enumerate(request.ids):
+                if record_id in seen:
+                    continue  # A later add of the same ID would be ignored by ChromaDB anyway
+                seen.add(record_id)
+                ids.append(record_id)
+                embeddings.append(request.embeddings[index] if request.embeddings is not None else None)
+                documents.append(request.documents[index] if request.documents is not None else None)
+                metadatas.append(request.metadatas[index] if request.metadatas is not None else None)
+
+        for start in range(0, len(ids), self.max_batch_size):
+            end = start + self.max_batch_size
+            self.collection.add(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end] if any(e is not None for e in embeddings) else None,
+                documents=documents[start:end] if any(d is not None for d in documents) else None,
+                metadatas=metadatas[start:end] if any(m is not None for m in metadatas) else None
+            )
+            self.stats['batches'] += 1
+            self.stats['records'] += len(ids[start:end])
+
+class BufferedCollection:
+    """Collection proxy whose add() goes through a WriteBuffer; everything else is delegated."""
+
+    def __init__(self, collection, write_buffer: WriteBuffer):
+        self._collection = collection
+        self._write_buffer = write_buffer
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None, **kwargs):
+        """Add records through the write buffer and wait until they are written."""
+        if kwargs:
+            return self._collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents, **kwargs)
+        if isinstance(ids, str):
+            ids = [ids]
+        self._write_buffer.submit(ids, embeddings=embeddings, documents=documents, metadatas=metadatas).result()
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
@@ -1,10 +1,13 @@
 import uvicorn  # Importing uvicorn to run the server
 from fastapi import FastAPI, HTTPException  # Import FastAPI and HTTPException for handling requests and errors
+from contextlib import asynccontextmanager
 import logging
 import os
+import threading
 from dotenv import load_dotenv
 
 from app.utils.cors import add_cors_middleware  # Import the CORS configuration function
+from app.utils.uploads import UploadSizeLimitMiddleware  # Rejects oversized uploads before they are read
 
 # API Endpoints
 from app.api.v1.endpoints.hello_world import router as hello_world_router  # Import the hello world router
@@ -12,6 +15,11 @@ from app.api.v1.endpoints.chat_api import router as chat_router   # Import the c
 from app.api.v1.endpoints.ollama_embedding_api import router as ollama_embedding_router  # Import the ollama embedding router
 from app.api.v1.endpoints.document_chat_api import router as document_chat_router  # Import the document chat router
 from app.api.v1.endpoints.document_api import router as document_router  # Import the new document router
+from app.api.v1.endpoints.health_api import router as health_router  # Readiness endpoint
+from app.dependencies import AppResources  # Shared vector store, embedder and ingestion registry
+from app.handlers.directory_watcher import DirectoryWatcher
+from app.handlers.warmup import Warmup
+from app.LLMs.llm_factory import LLMFactory
 
 load_dotenv()  # Load environment variables from .env file
 
@@ -21,7 +29,57 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'  # Define log format
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the shared resources and the optional directory watcher, and close them on shutdown.
+
+    One DatabaseHandler, embedder and ingestion registry serve every router
+    (injected with the dependencies in app.dependencies), so all endpoints
+    see the same collections and write buffers. Unless WARMUP_ENABLED is
+    "false", the index and models are loaded in the background and
+    /api/v1/ready reports 503 until that finishes.
+    """
+    resources = AppResources.create(os.getenv('VECTOR_DB_PATH', './vector_db'))
+    app.state.resources = resources
+    warmup = None
+    if os.getenv('WARMUP_ENABLED', 'true').lower() != 'false':
+        queries = os.getenv('WARMUP_QUERIES')
+        warmup = Warmup(
+            resources.embedder,
+            chat_handler_factory=LLMFactory.create_llm if os.getenv('WARMUP_CHAT_MODEL', 'true').lower() != 'false' else None,
+            queries=[query.strip() for query in queries.split('|') if query.strip()] if queries is not None else None,
+            keep_alive=os.getenv('WARMUP_KEEP_ALIVE') or None
+        )
+        threading.Thread(target=warmup.run, name="warmup", daemon=True).start()
+    app.state.warmup = warmup
+    watcher = None
+    if os.getenv('WATCH_DIRECTORY'):
+        watcher = DirectoryWatcher(
+            os.getenv('WATCH_DIRECTORY'),
+            resources.embedder,
+            resources.registry,
+            poll_interval=float(os.getenv('WATCH_POLL_SECONDS', '5')),
+            debounce_seconds=float(os.getenv('WATCH_DEBOUNCE_SECONDS', '10')),
+            workers=int(os.getenv('WATCH_WORKERS', '2'))
+        )
+        watcher.start()
+
+        def follow_default_model(embedder):
+            watcher.embedder = embedder  # Sync into the collection of the new default model
+
+        resources.on_default_model_change(follow_default_model)
+    app.state.watcher = watcher
+    yield
+    if warmup:
+        warmup.cancel()
+        warmup.wait(timeout=10)  # A step blocked on a provider call is abandoned
+    if watcher:
+        await watcher.stop()
+    resources.close()
+
 app = FastAPI(
+    lifespan=lifespan,  # Startup and shutdown hooks
     title="Context Engine",  # Title of the API
     description="A powerful context-aware search and retrieval system.",  # Description of the API
     version="1.0.0",  # Version of the API
@@ -30,6 +88,9 @@ app = FastAPI(
         "email": "naorbonomo@gmail.com",  # Contact email
     },
 )  
+# Reject oversized uploads from their Content-Length, inside CORS so the 413 carries CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Configure CORS
 add_cors_middleware(app)  # Add CORS middleware to the FastAPI app
 
@@ -39,6 +100,7 @@ app.include_router(chat_router)  # Include the chat router
 app.include_router(ollama_embedding_router)  # Include the ollama embedding router
 app.include_router(document_chat_router)  # Include the document chat router
 app.include_router(document_router)  # Include the new document router
+app.include_router(health_router)  # Include the readiness router
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)  # Run the server with uvicorn
\ No newline at end of file
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class Document(BaseModel):
     """
@@ -6,7 +7,70 @@ class Document(BaseModel):
 
     Attributes:
         id (str): Unique identifier for the document.
-        content (str): The textual content of the document.
+        content (str, optional): The textual content of the document (omitted in IDs-only listings).
+        metadata (dict, optional): Chunk metadata, when requested.
     """
     id: str  # Unique identifier for the document
-    content: str  # Content of the document 
\ No newline at end of file
+    content: Optional[str] = None  # Content of the document
+    metadata: Optional[dict] = None  # Chunk metadata (source, page, section, ...)
+
+class IngestionRecord(BaseModel):
+    """
+    Pydantic model representing an ingested file in the ingestion registry.
+
+    Attributes:
+        sha256 (str): SHA-256 fingerprint of the file content.
+        collection (str): Collection the file was ingested into.
+        source (str): Source name the chunks were stored under.
+        size_bytes (int): File size in bytes.
+        chunks (int): Number of chunks produced.
+        total_pages (int): Number of pages in the file.
+        embedding_model (str, optional): Embedding model used.
+        ingested_at (str): ISO timestamp of the ingestion.
+    """
+    sha256: str  # Hex SHA-256 of the file content
+    collection: str  # Collection name
+    source: str  # Source document name
+    size_bytes: int  # File size in bytes
+    chunks: int  # Number of chunks produced
+    total_pages: int  # Number of pages
+    embedding_model: Optional[str] = None  # Embedding model used
+    ingested_at: str  # ISO timestamp
+
+class MetadataFilter(BaseModel):
+    """
+    Pydantic model representing an optional chunk metadata filter.
+
+    Attributes:
+        source (str, optional): Only match chunks from this source document.
+        page_from (int, optional): Lowest page number to match (inclusive).
+        page_to (int, optional): Highest page number to match (inclusive).
+        tags (List[str], optional): Only match chunks carrying all of these tags.
+    """
+    source: Optional[str] = None  # Source filename of the document
+    page_from: Optional[int] = None  # First page of the range
+    page_to: Optional[int] = None  # Last page of the range
+    tags: Optional[List[str]] = None  # Required tags
+
+    def to_where(self) -> Optional[dict]:
+        """
+        Convert the filter into a ChromaDB `where` clause.
+
+        Returns:
+            Optional[dict]: The where clause, or None if no field is set.
+        """
+        conditions = []
+        if self.source:
+            conditions.append({"source": self.source})
+        if self.page_from is not None:
+            conditions.append({"page": {"$gte": self.page_from}})
+        if self.page_to is not None:
+            conditions.append({"page": {"$lte": self.page_to}})
+        for tag in self.tags or []:
+            conditions.append({"tags": {"$contains": tag}})
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
@@ -12,4 +12,5 @@ def add_cors_middleware(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Offset", "X-Total-Count"],  # Paging headers of GET /documents/
     ) 
\ No newline at end of file
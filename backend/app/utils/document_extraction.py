@@ -0,0 +1,340 @@
+"""
+Text extraction and chunking of PDF and plain-text documents.
+
+Shared by the upload endpoints and the bulk ingestion command, so it has no
+dependency on the API layer or on a particular embedder.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+from app.utils.lazy_registry import LazyRegistry
+from app.utils.text_chunker import chunk_blocks, chunk_statistics, estimate_tokens, is_heading_block, iter_text_chunks
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PDF_EXTENSIONS = ('.pdf',)
+TEXT_EXTENSIONS = ('.txt', '.md')
+
+# PDF libraries, imported when the first PDF is extracted
+PDF_LIBRARIES = LazyRegistry("PDF library", {
+    "pymupdf": "fitz",
+    "pypdf2": "PyPDF2",
+})
+
+def extract_text_from_pdf(pdf_path: str, chunk_size: int = 1000, overlap: int = 200,
+                          source: Optional[str] = None, strategy: str = "structured",
+                          max_tokens: int = 256, overlap_tokens: int = 0) -> Tuple[List[str], List[dict], int, dict]:
+    """
+    Extract text from a PDF file and split into chunks.
+    
+    The 'structured' strategy packs PyMuPDF layout blocks into token-sized
+    chunks that respect headings and sentence boundaries. The 'fixed' strategy
+    cuts each page's flattened text into overlapping character windows.
+    
+    Args:
+        pdf_path: Path of the PDF file
+        chunk_size: Number of characters per chunk (fixed strategy)
+        overlap: Number of characters to overlap between chunks (fixed strategy)
+        source: Source filename stored in the chunk metadata
+        strategy: 'structured' or 'fixed'
+        max_tokens: Token budget per chunk (structured strategy)
+        overlap_tokens: Tokens repeated when a section spans chunks (structured strategy)
+        
+    Returns:
+        Tuple of (text chunks, per-chunk metadata, total page count, chunk statistics)
+    """
+    try:
+        chunks = []
+        metadatas = []
+        
+        if strategy == "structured":
+            blocks, total_pages = extract_blocks_from_pdf(pdf_path)
+            for chunk in chunk_blocks(blocks, max_tokens=max_tokens, overlap_tokens=overlap_tokens):
+                chunks.append(chunk['text'])
+                metadatas.append({
+                    'source': source,
+                    'page': chunk['page'],
+                    'page_end': chunk['page_end'],
+                    'section': chunk['section'],
+                })
+        else:
+            pages = extract_pages_from_pdf(pdf_path)
+            total_pages = len(pages)
+            for page in pages:
+                # Clean and normalize text
+                text = clean_text(page['text'])
+                if not text:
+                    continue
+                
+                # Split page text into chunks, without an intermediate list per page
+                for chunk in iter_text_chunks(text, chunk_size, overlap):
+                    chunks.append(chunk)
+                    metadatas.append({
+                        'source': source,
+                        'page': page['page'],
+                        'section': page['section'],
+                    })
+        
+        if not chunks:
+            logger.warning("No text extracted from PDF")
+        
+        stats = chunk_statistics([estimate_tokens(chunk) for chunk in chunks], [len(chunk) for chunk in chunks])
+        logger.info(f"Extracted {len(chunks)} chunks from {total_pages} PDF pages ({strategy}): {stats}")
+        return chunks, metadatas, total_pages, stats
+        
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        return [], [], 0, chunk_statistics([])
+
+def extract_blocks_from_pdf(pdf_path: str) -> Tuple[List[dict], int]:
+    """
+    Extract PyMuPDF layout blocks with heading detection.
+    
+    Headings are blocks set larger than the document's body font (or short
+    all-bold blocks). Each block also carries the outline section of its page.
+    If PyMuPDF cannot read the file, every PyPDF2 page becomes one block.
+    
+    Args:
+        pdf_path: Path of the PDF file
+        
+    Returns:
+        Tuple of (blocks with 'text', 'page', 'section', 'is_heading', total page count)
+    """
+    try:
+        doc = PDF_LIBRARIES.resolve("pymupdf").open(pdf_path, filetype="pdf")
+    except Exception as e:
+        logger.warning(f"PyMuPDF failed, falling back to page text: {str(e)}")
+        pages = extract_pages_from_pdf(pdf_path)
+        blocks = [
+            {'text': page['text'], 'page': page['page'], 'section': page['section'], 'is_heading': False}
+            for page in pages
+        ]
+        return blocks, len(pages)
+    
+    toc = doc.get_toc(simple=True)
+    blocks = []
+    size_counts = Counter()  # Characters per font size, to find the body font
+    try:
+        for page_index, page in enumerate(doc):
+            page_number = page_index + 1
+            section = section_for_page(toc, page_number)
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:  # Skip image blocks
+                    continue
+                lines = []
+                max_size = 0.0
+                chars = 0
+                bold_chars = 0
+                for line in block["lines"]:
+                    line_text = "".join(span["text"] for span in line["spans"]).strip()
+                    if line_text:
+                        lines.append(line_text)
+                    for span in line["spans"]:
+                        span_chars = len(span["text"].strip())
+                        if not span_chars:
+                            continue
+                        chars += span_chars
+                        size_counts[round(span["size"], 1)] += span_chars
+                        max_size = max(max_size, span["size"])
+                        if span["flags"] & 16:  # Bold
+                            bold_chars += span_chars
+                text = "\n".join(lines).replace('\x00', '')
+                if text.strip():
+                    blocks.append({
+                        'text': text,
+                        'page': page_number,
+                        'section': section,
+                        'font_size': max_size,
+                        'bold_ratio': bold_chars / chars if chars else 0.0,
+                    })
+        total_pages = doc.page_count
+    finally:
+        doc.close()
+    
+    body_font_size = size_counts.most_common(1)[0][0] if size_counts else 0.0
+    for block in blocks:
+        block['is_heading'] = is_heading_block(
+            block['text'],
+            block.pop('font_size'),
+            body_font_size,
+            block.pop('bold_ratio')
+        )
+    return blocks, total_pages
+
+def extract_pages_from_pdf(pdf_path: str) -> List[dict]:
+    """
+    Extract the raw text of every PDF page together with its section heading.
+    The file is opened from disk, so pages are read on demand instead of
+    loading the whole document into memory.
+    
+    Args:
+        pdf_path: Path of the PDF file
+        
+    Returns:
+        List of dicts with 1-based 'page', 'section' (or None) and 'text'
+    """
+    pages = []
+    # Try PyMuPDF first (better text extraction)
+    try:
+        doc = PDF_LIBRARIES.resolve("pymupdf").open(pdf_path, filetype="pdf")
+        # The outline gives the heading each page falls under
+        toc = doc.get_toc(simple=True)
+        for page_index, page in enumerate(doc):
+            page_number = page_index + 1
+            pages.append({
+                'page': page_number,
+                'section': section_for_page(toc, page_number),
+                'text': page.get_text(),
+            })
+        doc.close()
+    except Exception as e:
+        logger.warning(f"PyMuPDF failed, trying PyPDF2: {str(e)}")
+        # Fallback to PyPDF2 (no outline lookup)
+        with open(pdf_path, 'rb') as pdf_file:
+            pdf_reader = PDF_LIBRARIES.resolve("pypdf2").PdfReader(pdf_file)
+            pages = [
+                {'page': page_index + 1, 'section': None, 'text': page.extract_text() or ''}
+                for page_index, page in enumerate(pdf_reader.pages)
+            ]
+    return pages
+
+def section_for_page(toc: list, page_number: int) -> Optional[str]:
+    """
+    Find the deepest outline heading that starts on or before a page.
+    
+    Args:
+        toc: PyMuPDF table of contents entries [level, title, page]
+        page_number: 1-based page number
+        
+    Returns:
+        The heading title, or None if the page precedes every heading
+    """
+    section = None
+    for _level, title, start_page in toc:
+        if start_page > page_number:
+            break
+        if start_page > 0:
+            section = title
+    return section
+
+def clean_text(text: str) -> str:
+    """
+    Clean and normalize extracted text.
+    
+    Args:
+        text: Raw extracted text
+        
+    Returns:
+        Cleaned text
+    """
+    # Remove excessive whitespace
+    text = ' '.join(text.split())
+    
+    # Remove common PDF artifacts
+    text = text.replace('\x00', '')  # Remove null bytes
+    text = text.replace('\r', ' ')   # Replace carriage returns
+    text = text.replace('\n', ' ')   # Replace newlines with spaces
+    
+    # Remove multiple spaces
+    text = re.sub(r'\s+', ' ', text)
+    
+    return text.strip()
+
+def split_text_into_chunks(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """
+    Split text into overlapping chunks.
+    
+    The list form of iter_text_chunks. Ingestion still materializes a file's
+    chunks: extraction returns them from a worker process and re-indexing
+    diffs the whole set, so the lazy generator bounds time, not memory.
+    
+    Args:
+        text: Text to split
+        chunk_size: Size of each chunk
+        overlap: Overlap between chunks (capped at half the chunk size)
+        
+    Returns:
+        List of text chunks
+    """
+    return list(iter_text_chunks(text, chunk_size, overlap))
+
+def extract_text_file(path: str, source: Optional[str] = None, max_tokens: int = 256,
+                      overlap_tokens: int = 0) -> Tuple[List[str], List[dict], dict]:
+    """
+    Extract token-sized chunks from a plain-text or Markdown file.
+    
+    Blank-line separated paragraphs become blocks and Markdown '#' lines
+    become headings, so the structured chunker applies as it does to PDFs.
+    
+    Args:
+        path: Path of the text file
+        source: Source name stored in the chunk metadata
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens repeated when a section spans chunks
+        
+    Returns:
+        Tuple of (text chunks, per-chunk metadata, chunk statistics)
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as infile:
+        text = infile.read().replace('\x00', '')
+    
+    blocks = []
+    paragraph = []
+    for line in text.splitlines() + ['']:
+        stripped = line.strip()
+        if stripped.startswith('#') and stripped.lstrip('#').startswith(' '):
+            if paragraph:
+                blocks.append({'text': '\n'.join(paragraph)})
+                paragraph = []
+            blocks.append({'text': stripped.lstrip('#').strip(), 'is_heading': True})
+        elif stripped:
+            paragraph.append(stripped)
+        elif paragraph:
+            blocks.append({'text': '\n'.join(paragraph)})
+            paragraph = []
+    
+    chunks = []
+    metadatas = []
+    for chunk in chunk_blocks(blocks, max_tokens=max_tokens, overlap_tokens=overlap_tokens):
+        chunks.append(chunk['text'])
+        metadatas.append({'source': source, 'section': chunk['section']})
+    
+    stats = chunk_statistics([estimate_tokens(chunk) for chunk in chunks], [len(chunk) for chunk in chunks])
+    logger.info(f"Extracted {len(chunks)} chunks from {os.path.basename(path)}: {stats}")
+    return chunks, metadatas, stats
+
+def extract_document(path: str, source: Optional[str] = None, strategy: str = "structured",
+                     chunk_size: int = 1000, overlap: int = 200, max_tokens: int = 256,
+                     overlap_tokens: int = 0) -> Tuple[List[str], List[dict], int]:
+    """
+    Extract the chunks of a PDF or text file, choosing the extractor by extension.
+    
+    Args:
+        path: Path of the file
+        source: Source name stored in the chunk metadata
+        strategy: 'structured' or 'fixed' (PDFs only; text files are always structured)
+        chunk_size: Number of characters per chunk (fixed strategy)
+        overlap: Number of characters to overlap between chunks (fixed strategy)
+        max_tokens: Token budget per chunk (structured strategy)
+        overlap_tokens: Tokens repeated when a section spans chunks (structured strategy)
+        
+    Returns:
+        Tuple of (text chunks, per-chunk metadata, total page count; 0 for text files)
+        
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        chunks, metadatas, total_pages, _stats = extract_text_from_pdf(
+            path, chunk_size, overlap, source=source, strategy=strategy,
+            max_tokens=max_tokens, overlap_tokens=overlap_tokens
+        )
+        return chunks, metadatas, total_pages
+    if extension in TEXT_EXTENSIONS:
+        chunks, metadatas, _stats = extract_text_file(path, source, max_tokens, overlap_tokens)
+        return chunks, metadatas, 0
+    raise ValueError(f"Unsupported file type: {extension}")
@@ -0,0 +1,59 @@
+"""
+Registry of named implementations imported on first use.
+
+Provider SDKs and PDF libraries are heavy to import; registering them as
+"module:attribute" paths means a deployment only pays for the ones it uses.
+"""
+
+import importlib
+import threading
+from typing import Dict, List
+
+class LazyRegistry:
+    """Class mapping names to import paths, resolved and cached on first use."""
+
+    def __init__(self, kind: str, entries: Dict[str, str]):
+        """
+        Initialize the LazyRegistry.
+
+        Args:
+            kind (str): What the registry holds, used in error messages (e.g. "LLM provider")
+            entries (Dict[str, str]): Import path by name, "package.module:attribute" or "package.module"
+        """
+        self.kind = kind
+        self._entries = dict(entries)
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str):
+        """Add or replace the import path of `name`."""
+        with self._lock:
+            self._entries[name] = path
+            self._resolved.pop(name, None)
+
+    def names(self) -> List[str]:
+        """Registered names."""
+        return list(self._entries)
+
+    def resolve(self, name: str):
+        """
+        Import the module of `name` and return the registered attribute, or the module itself.
+
+        Args:
+            name (str): Registered name
+
+        Returns:
+            The class, function or module
+
+        Raises:
+            ValueError: If `name` is not registered
+            ImportError: If the module or its dependencies are not installed
+        """
+        if name not in self._resolved:
+            if name not in self._entries:
+                raise ValueError(f"Unsupported {self.kind}: {name}")
+            module_name, _, attribute = self._entries[name].partition(':')
+            module = importlib.import_module(module_name)
+            with self._lock:
+                self._resolved[name] = getattr(module, attribute) if attribute else module
+        return self._resolved[name]
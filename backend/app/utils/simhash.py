@@ -0,0 +1,115 @@
+"""
+SimHash fingerprints for near-duplicate text detection.
+
+Two texts whose 64-bit fingerprints differ in only a few bits share almost
+all of their word shingles. Fingerprints are stored as FINGERPRINT_BANDS
+one-byte bands; to find candidates within d bits the bands are split into
+d + 1 groups, and by pigeonhole at least one group is unchanged, so an exact
+lookup on each group finds every candidate.
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+FINGERPRINT_BITS = 64
+FINGERPRINT_BANDS = 8  # One-byte bands
+BAND_BITS = FINGERPRINT_BITS // FINGERPRINT_BANDS
+MAX_HAMMING_DISTANCE = FINGERPRINT_BANDS - 1  # Largest distance the band lookup is guaranteed to find
+WORD_PATTERN = re.compile(r"\w+")
+NUMBER_PATTERN = re.compile(r"\d+")
+
+def get_near_duplicate_distance() -> int:
+    """Get the default near-duplicate distance from NEAR_DUPLICATE_MAX_DISTANCE (default 3, negative disables)."""
+    return int(os.getenv('NEAR_DUPLICATE_MAX_DISTANCE', '3'))
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """
+    Split text into overlapping word n-grams, ignoring case, punctuation and
+    the value of numbers (so repeated headers differing only in page number match).
+
+    Args:
+        text: Text to split
+        size: Words per shingle
+
+    Returns:
+        List of shingles (a single shingle for texts shorter than `size` words)
+    """
+    words = WORD_PATTERN.findall(NUMBER_PATTERN.sub('0', text.lower()))
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    Compute the 64-bit SimHash of a text over its word shingles.
+
+    Args:
+        text: Text to fingerprint
+        shingle_size: Words per shingle
+
+    Returns:
+        int: Unsigned 64-bit fingerprint (0 for texts without words)
+    """
+    features = shingles(text, shingle_size)
+    if not features:
+        return 0
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little') for feature in features),
+        dtype='<u8', count=len(features)
+    )
+    # One row of 64 bits per shingle; each bit of the fingerprint is the majority vote
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(features)
+    return int(np.packbits(votes, bitorder='little').view('<u8')[0])
+
+def hamming_distance(a: int, b: int) -> int:
+    """Count the bits in which two fingerprints differ."""
+    return bin(a ^ b).count('1')
+
+def fingerprint_bands(fingerprint: int) -> List[int]:
+    """Split a fingerprint into FINGERPRINT_BANDS integers of BAND_BITS bits each."""
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (band * BAND_BITS)) & mask for band in range(FINGERPRINT_BANDS)]
+
+def band_groups(max_distance: int) -> List[List[int]]:
+    """
+    Partition the band indexes into max_distance + 1 disjoint groups.
+
+    Fingerprints within max_distance bits agree on every band of at least one group.
+
+    Args:
+        max_distance: Hamming distance to cover, at most MAX_HAMMING_DISTANCE
+
+    Returns:
+        List of groups of band indexes
+    """
+    groups = min(max(max_distance, 0), MAX_HAMMING_DISTANCE) + 1
+    return [list(range(FINGERPRINT_BANDS))[i::groups] for i in range(groups)]
+
+class FingerprintIndex:
+    """In-memory band index of fingerprints, for near-duplicates within one batch."""
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self.groups = band_groups(max_distance)
+        self._buckets: Dict[Tuple, List[int]] = {}
+
+    def _keys(self, fingerprint: int) -> List[Tuple]:
+        bands = fingerprint_bands(fingerprint)
+        return [(index, tuple(bands[band] for band in group)) for index, group in enumerate(self.groups)]
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Return an indexed fingerprint within max_distance bits, or None."""
+        for key in self._keys(fingerprint):
+            for candidate in self._buckets.get(key, ()):
+                if hamming_distance(fingerprint, candidate) <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int):
+        """Index a fingerprint."""
+        for key in self._keys(fingerprint):
+            self._buckets.setdefault(key, []).append(fingerprint)
@@ -0,0 +1,115 @@
+"""
+Cancellation of streamed responses whose client went away.
+
+A streamed chat response runs blocking retrieval and generation in worker
+threads. They share a threading.Event that is set when the client
+disconnects (or the response is otherwise abandoned); retrieval checks it
+between searches and generation closes the upstream stream at its next
+chunk, which ends the provider's generation.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator
+from fastapi import Request
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DISCONNECT_POLL_SECONDS = float(os.getenv('STREAM_DISCONNECT_POLL_MS', '500')) / 1000
+
+# A stream holds its thread for the whole generation, so streams get their own
+# pool instead of starving asyncio.to_thread work (uploads, retrieval) in the default one
+stream_executor = ThreadPoolExecutor(max_workers=int(os.getenv('STREAM_WORKERS', '32')), thread_name_prefix="stream")
+
+class GenerationCancelled(Exception):
+    """Raised when the client of a streamed response went away."""
+
+class StreamStats:
+    """Counts of streamed responses by outcome, and of cancellations by the stage they interrupted."""
+
+    def __init__(self):
+        self.counts = {'started': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+        self.cancelled_during = {'retrieval': 0, 'generation': 0}
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def cancel(self, stage: str):
+        with self._lock:
+            self.counts['cancelled'] += 1
+            self.cancelled_during[stage] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {**self.counts, 'cancelled_during': dict(self.cancelled_during)}
+
+stream_stats = StreamStats()
+
+async def watch_disconnect(request: Request, cancelled: threading.Event):
+    """Set `cancelled` once the client of `request` disconnects; runs until then or until cancelled."""
+    while not cancelled.is_set():
+        if await request.is_disconnected():
+            logger.info("Client disconnected from a streamed response")
+            cancelled.set()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+async def iterate_in_thread(make_iterator: Callable[[], Iterator], cancelled: threading.Event) -> AsyncIterator:
+    """
+    Iterate a blocking iterator in a worker thread without blocking the event loop.
+
+    The worker comes from `stream_executor` (STREAM_WORKERS threads); streams
+    beyond that wait for a free thread. Once `cancelled` is set, or the
+    returned iterator is closed, the worker stops at the next item and closes
+    the blocking iterator.
+
+    Args:
+        make_iterator (callable): Creates the blocking iterator, in the worker thread
+        cancelled (threading.Event): Stops the iteration when set
+
+    Yields:
+        The iterator's items
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+
+    def put(kind, payload=None):
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, (kind, payload))
+        except RuntimeError:
+            pass  # The event loop is gone
+
+    def pump():
+        iterator = None
+        try:
+            iterator = make_iterator()
+            for item in iterator:
+                if cancelled.is_set():
+                    break
+                put('item', item)
+            put('done')
+        except Exception as e:
+            put('error', e)
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    loop.run_in_executor(stream_executor, pump)
+    finished = False
+    try:
+        while True:
+            kind, payload = await items.get()
+            if kind == 'done':
+                finished = True
+                return
+            if kind == 'error':
+                raise payload
+            yield payload
+    finally:
+        if not finished:
+            cancelled.set()  # The caller stopped reading: stop the worker too
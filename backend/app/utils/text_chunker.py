@@ -0,0 +1,267 @@
+"""
+Structure-aware, token-sized chunking of extracted document blocks.
+"""
+
+import re
+from typing import Iterator, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")  # Words and punctuation, a close proxy for subword tokens
+# A sentence ends after a word of two or more letters (so "1." or "a." list markers do not
+# end one) or after a closing bracket/quote, and the next sentence starts with a capital or digit
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[^\W\d_]{2}[.!?:;])|(?<=[)\]\"'][.!?:;]))\s+(?=[\"'(\[]?[A-Z0-9])")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(\d+[.)]|[a-zA-Z][.)]|[•\-–*▪●])\s+")
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text from its words and punctuation."""
+    return len(TOKEN_PATTERN.findall(text))
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, keeping list items on their own lines intact.
+
+    Args:
+        text: Block text, possibly spanning several lines
+
+    Returns:
+        List of sentences
+    """
+    sentences = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if line:
+            sentences.extend(part for part in SENTENCE_BOUNDARY.split(line) if part)
+    return sentences
+
+def is_heading_block(text: str, font_size: float, body_font_size: float, bold_ratio: float) -> bool:
+    """
+    Decide whether a layout block is a heading.
+
+    A heading is a short block set noticeably larger than the body text, or a
+    short fully bold block that does not end like a sentence.
+
+    Args:
+        text: Block text
+        font_size: Largest font size in the block
+        body_font_size: Most common font size in the document
+        bold_ratio: Fraction of the block's characters set in bold
+
+    Returns:
+        bool: True if the block looks like a heading
+    """
+    words = text.split()
+    if not words or len(words) > 15 or LIST_ITEM_PATTERN.match(text):
+        return False
+    if font_size >= body_font_size * 1.15:
+        return True
+    return bold_ratio > 0.9 and not text.rstrip().endswith(('.', ',', ';'))
+
+def chunk_blocks(blocks: List[dict], max_tokens: int = 256, overlap_tokens: int = 0) -> List[dict]:
+    """
+    Pack layout blocks into chunks of at most `max_tokens` estimated tokens.
+
+    Headings always start a new chunk and are repeated at the top of every
+    chunk of their section, so each chunk is self-contained. Consecutive
+    headings with no text between them are joined into one heading path.
+    Blocks are never split unless a single block exceeds the budget, in which
+    case it is split at sentence boundaries (and only a sentence longer than
+    the whole budget is split between words). `overlap_tokens` carries trailing sentences of a
+    split section into the next chunk, as many as fit beside the next piece within the budget;
+    it is never applied across sections.
+
+    Args:
+        blocks: Dicts with 'text', 'page' and optional 'is_heading' and 'section'
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens of trailing context repeated when a section continues
+
+    Returns:
+        List of dicts with 'text', 'page', 'page_end', 'section' and 'tokens'
+    """
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    chunks = []
+    state = {'heading': None, 'section': None, 'has_body': False,
+             'sentences': [], 'tokens': 0, 'page': None, 'page_end': None}
+
+    def heading_tokens() -> int:
+        return estimate_tokens(state['heading']) if state['heading'] else 0
+
+    def flush(carry_overlap: bool):
+        if not state['sentences']:
+            return
+        body = ' '.join(state['sentences'])
+        text = f"{state['heading']}\n\n{body}" if state['heading'] else body
+        chunks.append({
+            'text': text,
+            'page': state['page'],
+            'page_end': state['page_end'],
+            'section': state['section'],
+            'tokens': state['tokens'] + heading_tokens(),
+        })
+        carried = []
+        if carry_overlap and overlap_tokens:
+            budget = overlap_tokens
+            for sentence in reversed(state['sentences']):
+                cost = estimate_tokens(sentence)
+                if cost > budget:
+                    break
+                carried.insert(0, sentence)
+                budget -= cost
+        state['sentences'] = carried
+        state['tokens'] = sum(estimate_tokens(sentence) for sentence in carried)
+        state['page'] = state['page_end'] if carried else None
+
+    def add_piece(piece: str, cost: int, page: int):
+        if state['sentences'] and state['tokens'] + cost + heading_tokens() > max_tokens:
+            flush(carry_overlap=True)
+            # Drop the oldest carried sentences until the piece fits beside the rest
+            while state['sentences'] and state['tokens'] + cost + heading_tokens() > max_tokens:
+                state['tokens'] -= estimate_tokens(state['sentences'].pop(0))
+            if not state['sentences']:
+                state['page'] = None
+        if state['page'] is None:
+            state['page'] = page
+        state['sentences'].append(piece)
+        state['tokens'] += cost
+        state['page_end'] = page
+        state['has_body'] = True
+
+    for block in blocks:
+        text = block.get('text', '').strip()
+        if not text:
+            continue
+        page = block.get('page')
+
+        if block.get('is_heading'):
+            flush(carry_overlap=False)
+            heading = ' '.join(text.split())
+            if state['heading'] and not state['has_body'] and \
+                    estimate_tokens(state['heading']) + estimate_tokens(heading) <= max_tokens // 4:
+                heading = f"{state['heading']} > {heading}"
+            state['heading'] = heading
+            state['section'] = heading
+            state['has_body'] = False
+            continue
+        if block.get('section') and not state['heading']:
+            state['section'] = block['section']
+
+        block_tokens = estimate_tokens(text)
+        budget = max(1, max_tokens - heading_tokens())
+        if block_tokens <= budget:
+            # Keep the block whole: start a new chunk rather than splitting it
+            if state['sentences'] and state['tokens'] + block_tokens > budget:
+                flush(carry_overlap=False)
+            add_piece(' '.join(text.split()), block_tokens, page)
+            continue
+
+        # Oversized block: pack it sentence by sentence
+        for sentence in split_sentences(text):
+            cost = estimate_tokens(sentence)
+            if cost <= budget:
+                add_piece(sentence, cost, page)
+                continue
+            words = sentence.split()
+            piece = []
+            piece_tokens = 0
+            for word in words:
+                word_tokens = estimate_tokens(word)
+                if piece and piece_tokens + word_tokens > budget:
+                    add_piece(' '.join(piece), piece_tokens, page)
+                    piece = []
+                    piece_tokens = 0
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                add_piece(' '.join(piece), piece_tokens, page)
+
+    flush(carry_overlap=False)
+    return chunks
+
+def iter_text_spans(text: str, chunk_size: int, overlap: int = 0) -> Iterator[Tuple[int, int]]:
+    """
+    Lazily yield the (start, end) offsets of overlapping character windows.
+
+    Runs in O(n) time: windows are at most `chunk_size` long, the word-boundary
+    search only scans the back half of a window, and every window starts at
+    least a quarter window after the previous one. Overlap is capped at half
+    the window, so starts strictly increase, no window is ever repeated,
+    consecutive windows leave no gap, and the total emitted text is at most
+    about four times the input.
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum window length in characters
+        overlap: Characters shared by consecutive windows (capped at chunk_size // 2)
+
+    Yields:
+        (start, end) offsets into text
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    overlap = max(0, min(overlap, chunk_size // 2))
+    min_stride = max(1, (chunk_size - overlap) // 2)
+    length = len(text)
+    start = 0
+
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Break at the last space in the back half of the window, if any
+            boundary = text.rfind(' ', start + chunk_size // 2, end)
+            if boundary > start:
+                end = boundary
+        yield start, end
+        if end >= length:
+            break
+
+        next_start = max(end - overlap, start + min_stride)
+        if 0 < next_start < end and text[next_start - 1] != ' ':
+            # Begin the overlap at a word start rather than mid-word
+            space = text.find(' ', next_start, end)
+            if space != -1:
+                next_start = space + 1
+        start = next_start
+
+def iter_text_chunks(text: str, chunk_size: int, overlap: int = 0) -> Iterator[str]:
+    """
+    Lazily split text into overlapping chunks of at most `chunk_size` characters.
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum chunk length in characters
+        overlap: Characters shared by consecutive chunks (capped at chunk_size // 2)
+
+    Yields:
+        Non-empty, stripped chunks
+    """
+    for start, end in iter_text_spans(text, chunk_size, overlap):
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+
+def chunk_statistics(token_counts: List[int], char_counts: Optional[List[int]] = None) -> dict:
+    """
+    Summarize chunk sizes for an ingestion report.
+
+    Args:
+        token_counts: Estimated tokens per chunk
+        char_counts: Characters per chunk
+
+    Returns:
+        dict: Chunk count, token totals and min/mean/median/p95/max tokens per chunk
+    """
+    if not token_counts:
+        return {'chunks': 0, 'total_tokens': 0}
+    ordered = sorted(token_counts)
+    stats = {
+        'chunks': len(ordered),
+        'total_tokens': sum(ordered),
+        'min_tokens': ordered[0],
+        'mean_tokens': round(sum(ordered) / len(ordered), 1),
+        'median_tokens': ordered[len(ordered) // 2],
+        'p95_tokens': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max_tokens': ordered[-1],
+    }
+    if char_counts:
+        stats['total_chars'] = sum(char_counts)
+        stats['mean_chars'] = round(sum(char_counts) / len(char_counts), 1)
+    return stats
@@ -0,0 +1,196 @@
+"""
+Helpers for streaming uploaded files to disk without holding them in memory.
+"""
+
+import hashlib
+import os
+import posixpath
+import tarfile
+import tempfile
+import zipfile
+from typing import List, Optional, Tuple
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+
+SPOOL_CHUNK_SIZE = 1024 * 1024  # Bytes read from the upload per iteration
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Allowance for form fields and boundaries around the file
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size."""
+
+class InvalidArchiveError(ValueError):
+    """Raised when an upload is not a readable zip or tar archive."""
+
+def get_max_upload_bytes() -> int:
+    """Get the maximum accepted upload size from MAX_UPLOAD_SIZE_MB (default 500 MB)."""
+    return int(float(os.getenv('MAX_UPLOAD_SIZE_MB', '500')) * 1024 * 1024)
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None,
+                       suffix: str = "") -> Tuple[str, int, str]:
+    """
+    Stream an upload into a temporary spool file, hashing it on the way.
+
+    Only SPOOL_CHUNK_SIZE bytes are held in memory at a time, so peak memory
+    does not depend on the upload size, and the copy stops as soon as the limit
+    is crossed. Starlette has already received the request body by the time
+    this runs; requests declaring a too large body are rejected earlier, by
+    UploadSizeLimitMiddleware. The caller owns the returned file and must
+    delete it.
+
+    Args:
+        file: The uploaded file
+        max_bytes: Maximum accepted size. Defaults to get_max_upload_bytes().
+        suffix: Suffix of the spool file name (e.g. ".pdf")
+
+    Returns:
+        Tuple of (spool file path, size in bytes, hex SHA-256 of the content)
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_bytes
+    """
+    max_bytes = max_bytes if max_bytes is not None else get_max_upload_bytes()
+    digest = hashlib.sha256()
+    size = 0
+    spool = tempfile.NamedTemporaryFile(
+        delete=False, suffix=suffix, prefix="upload_", dir=os.getenv('UPLOAD_SPOOL_DIR') or None
+    )
+    try:
+        with spool:
+            while True:
+                block = await file.read(SPOOL_CHUNK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(block)
+                spool.write(block)
+    except BaseException:
+        os.remove(spool.name)
+        raise
+
+    return spool.name, size, digest.hexdigest()
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject multipart requests whose Content-Length exceeds the upload limit before the body is read.
+
+    Form parsing (and so Starlette's spooling of the upload) happens before an
+    endpoint or its dependencies run, so the declared size is checked here.
+    Bodies without a Content-Length are still capped by spool_upload.
+    """
+
+    def __init__(self, app, max_bytes: Optional[int] = None):
+        """
+        Initialize the UploadSizeLimitMiddleware.
+
+        Args:
+            app: The ASGI app to wrap
+            max_bytes: Maximum accepted file size. Defaults to get_max_upload_bytes() per request.
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            headers = dict(scope['headers'])
+            declared = headers.get(b'content-length', b'')
+            if headers.get(b'content-type', b'').startswith(b'multipart/form-data') and declared.isdigit():
+                max_bytes = self.max_bytes if self.max_bytes is not None else get_max_upload_bytes()
+                if int(declared) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+                    response = JSONResponse(
+                        status_code=413,
+                        content={"detail": f"Upload of {int(declared)} bytes exceeds the {max_bytes} byte limit"}
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
+
+def remove_spool_file(path: Optional[str]):
+    """Delete a spool file, ignoring files that are already gone."""
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def safe_member_path(name: str) -> Optional[str]:
+    """
+    Normalize an archive member name, rejecting absolute paths and '..' components.
+
+    Args:
+        name: Member name as stored in the archive
+
+    Returns:
+        The normalized relative path, or None if the member would escape the extraction directory
+    """
+    path = posixpath.normpath(name.replace('\\', '/'))
+    if path.startswith('/') or path == '.' or path.split('/')[0] == '..' or ':' in path.split('/')[0]:
+        return None
+    return path
+
+def extract_archive(archive_path: str, destination: str, extensions: Tuple[str, ...],
+                    max_bytes: Optional[int] = None) -> List[str]:
+    """
+    Extract the regular files with the given extensions from a zip or tar archive.
+
+    Members are copied in SPOOL_CHUNK_SIZE blocks and the total uncompressed
+    size is capped, so a compression bomb is stopped early. Links, directories,
+    unsafe paths and other file types are skipped.
+
+    Args:
+        archive_path: Path of the zip or (optionally compressed) tar archive
+        destination: Directory to extract into
+        extensions: Lower-case file extensions to extract
+        max_bytes: Maximum total uncompressed size. Defaults to get_max_upload_bytes().
+
+    Returns:
+        Relative paths of the extracted files, in archive order
+
+    Raises:
+        InvalidArchiveError: If the file is neither a zip nor a tar archive
+        UploadTooLargeError: If the extracted content exceeds max_bytes
+    """
+    max_bytes = max_bytes if max_bytes is not None else get_max_upload_bytes()
+    extracted = []
+    total = 0
+
+    def copy_member(source, relative_path: str):
+        nonlocal total
+        if relative_path in extracted:
+            return  # Later copies of a repeated member name are ignored
+        target = os.path.join(destination, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as outfile:
+            while True:
+                block = source.read(SPOOL_CHUNK_SIZE)
+                if not block:
+                    break
+                total += len(block)
+                if total > max_bytes:
+                    raise UploadTooLargeError(f"Archive content exceeds the {max_bytes} byte limit")
+                outfile.write(block)
+        extracted.append(relative_path)
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                relative_path = safe_member_path(member.filename)
+                if member.is_dir() or not relative_path or not relative_path.lower().endswith(extensions):
+                    continue
+                with archive.open(member) as source:
+                    copy_member(source, relative_path)
+    elif tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path, mode='r:*') as archive:
+            for member in archive:
+                relative_path = safe_member_path(member.name)
+                if not member.isfile() or not relative_path or not relative_path.lower().endswith(extensions):
+                    continue
+                with archive.extractfile(member) as source:
+                    copy_member(source, relative_path)
+    else:
+        raise InvalidArchiveError("File is not a zip or tar archive")
+
+    return extracted
@@ -0,0 +1,39 @@
+"""
+Microbenchmark of the character chunker.
+
+Times iter_text_chunks over growing inputs, including pathological ones
+(a single unbroken token, overlap as large as the window), and prints the
+time per character so linear scaling is visible at a glance.
+
+Run from the backend directory:
+    python -m benchmarks.bench_chunker
+"""
+
+import time
+from app.utils.text_chunker import iter_text_chunks
+
+SIZES = (10_000, 100_000, 1_000_000, 4_000_000)
+CASES = {
+    'prose': lambda n: ('The quick brown fox jumps over the lazy dog. ' * (n // 45 + 1))[:n],
+    'one token': lambda n: 'x' * n,
+    'spaces': lambda n: ' ' * n,
+}
+
+def time_case(text: str, chunk_size: int, overlap: int) -> tuple:
+    """Return (seconds, chunk count) for chunking text once."""
+    started = time.perf_counter()
+    count = sum(1 for _ in iter_text_chunks(text, chunk_size, overlap))
+    return time.perf_counter() - started, count
+
+def main():
+    for name, make in CASES.items():
+        for chunk_size, overlap in ((1000, 200), (1000, 1000)):
+            print(f"\n{name} (chunk_size={chunk_size}, overlap={overlap})")
+            print(f"{'chars':>10} {'chunks':>8} {'seconds':>9} {'ns/char':>8}")
+            for size in SIZES:
+                text = make(size)
+                seconds, count = time_case(text, chunk_size, overlap)
+                print(f"{size:>10} {count:>8} {seconds:>9.4f} {seconds / size * 1e9:>8.1f}")
+
+if __name__ == '__main__':
+    main()
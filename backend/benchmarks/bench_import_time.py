@@ -0,0 +1,65 @@
+"""
+Cold-start benchmark of importing the app.
+
+Imports app.main in fresh interpreters and reports the median wall time and
+the peak RSS of the process. The "lazy" case is what a deployment pays at
+startup; the "eager" case additionally resolves every registered LLM
+provider, embedding provider and PDF library, which is what every worker
+paid when they were imported at module load.
+
+Run from the backend directory:
+    python -m benchmarks.bench_import_time [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import List
+
+PROBE = """
+import json, resource, time
+started = time.perf_counter()
+import app.main
+if {eager}:
+    from app.LLMs.embedding_factory import EMBEDDING_PROVIDERS
+    from app.LLMs.llm_factory import LLM_PROVIDERS
+    from app.utils.document_extraction import PDF_LIBRARIES
+    for registry in (LLM_PROVIDERS, EMBEDDING_PROVIDERS, PDF_LIBRARIES):
+        for name in registry.names():
+            try:
+                registry.resolve(name)
+            except ImportError:
+                pass
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+def measure(eager: bool) -> dict:
+    """Import the app once in a new interpreter and return its seconds and peak RSS (MB)."""
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE.format(eager=eager)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure app import time and memory.")
+    parser.add_argument("--runs", type=int, default=5, help="Interpreters started per case")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'case':>6} {'median s':>9} {'min s':>7} {'RSS MB':>8}")
+    for case, eager in (("lazy", False), ("eager", True)):
+        measure(eager)  # Fill the OS file cache so both cases start equally warm
+        runs = [measure(eager) for _ in range(args.runs)]
+        seconds = [run['seconds'] for run in runs]
+        results[case] = (statistics.median(seconds), statistics.median(run['rss_mb'] for run in runs))
+        print(f"{case:>6} {results[case][0]:>9.3f} {min(seconds):>7.3f} {results[case][1]:>8.1f}")
+    print(f"\nLazy imports save {results['eager'][0] - results['lazy'][0]:.3f}s and "
+          f"{results['eager'][1] - results['lazy'][1]:.1f} MB per worker")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
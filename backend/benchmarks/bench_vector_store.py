@@ -0,0 +1,97 @@
+"""
+Benchmark of the vector stores selectable with VECTOR_STORE.
+
+Fills a ChromaDB collection (HNSW) and a NumpyVectorStore (exact flat
+index) with the same random unit vectors, then prints for each: add
+throughput, p50/p99 latency of unfiltered and metadata-filtered top-k
+queries, recall@k against brute-force search, and size on disk.
+
+Run from the backend directory:
+    python -m benchmarks.bench_vector_store [--vectors 20000] [--dimension 768] [--queries 200] [--k 10]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import chromadb
+import numpy as np
+from chromadb.api.client import SharedSystemClient
+from app.handlers.db_handler import hnsw_configuration
+from app.handlers.index_tuning import recall_at_k
+from app.handlers.vector_store import ChromaVectorStore, NumpyVectorStore
+
+BATCH_SIZE = 1000
+SOURCES = 20  # Distinct 'source' values; a filtered query matches one of them
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the files under a directory."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+def percentiles(latencies: list) -> tuple:
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+def run(name: str, store, path: str, vectors: np.ndarray, queries: np.ndarray, truth: list, k: int):
+    ids = [f"doc_{index}" for index in range(len(vectors))]
+    metadatas = [{'source': f"file_{index % SOURCES}.txt"} for index in range(len(vectors))]
+    started = time.perf_counter()
+    for start in range(0, len(ids), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        store.add(ids=ids[start:end], embeddings=vectors[start:end], metadatas=metadatas[start:end],
+                  documents=[f"chunk {index}" for index in range(start, min(end, len(ids)))])
+    add_seconds = time.perf_counter() - started
+
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        result = store.query(query_embeddings=[query.tolist()], n_results=k, include=['distances'])
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append(result['ids'][0])
+    filtered = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query(query_embeddings=[query.tolist()], n_results=k, where={'source': 'file_0.txt'}, include=['distances'])
+        filtered.append((time.perf_counter() - started) * 1000)
+
+    p50, p99 = percentiles(latencies)
+    filtered_p50, filtered_p99 = percentiles(filtered)
+    print(
+        f"{name:>7} {len(ids) / add_seconds:>10.0f} {p50:>8.2f} {p99:>8.2f} {filtered_p50:>8.2f} {filtered_p99:>8.2f} "
+        f"{recall_at_k(found, truth):>8.4f} {directory_size(path) / 2**20:>8.1f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ChromaDB and numpy vector stores.")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+    truth = [[f"doc_{index}" for index in row] for row in exact]
+
+    print(f"{args.vectors} vectors of dimension {args.dimension}, {args.queries} queries, k={args.k}\n")
+    print(f"{'store':>7} {'adds/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'where p50':>8} {'where p99':>8} "
+          f"{f'recall@{args.k}':>8} {'disk MB':>8}")
+    with tempfile.TemporaryDirectory(prefix="bench_chroma_") as path:
+        collection = chromadb.PersistentClient(path=path).create_collection(
+            "bench_vectors", configuration={"hnsw": hnsw_configuration()}
+        )
+        run("chroma", ChromaVectorStore(collection), path, vectors, queries, truth, args.k)
+        SharedSystemClient.clear_system_cache()  # Release the files before they are deleted
+    with tempfile.TemporaryDirectory(prefix="bench_numpy_") as path:
+        store = NumpyVectorStore(path, "bench_vectors")
+        run("numpy", store, path, vectors, queries, truth, args.k)
+        store.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Bulk-ingest a directory of PDF and text files into the vector database.
+
+Extraction runs in a process pool, embedding requests in a thread pool, and
+several files are in flight at once, so extraction of one file overlaps the
+embedding of others. Chunks are embedded in batches of --batch-size.
+
+The run is resumable. Every file whose chunks are all stored is checkpointed
+in the ingestion registry under its SHA-256, so a restarted run skips it
+without reading past the hash. A file interrupted part-way is re-extracted,
+but chunks already in the collection are found by their content-hash ID and
+not embedded again. A file whose content changed is re-indexed: its new
+chunks are added and chunks missing from the new version are deleted.
+
+Run from the backend directory:
+    python -m scripts.ingest_corpus /path/to/corpus --embed-workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List
+from dotenv import load_dotenv
+from app.dependencies import AppResources
+from app.handlers.corpus_ingester import CorpusIngester, describe_result, iter_corpus_files
+from app.utils.simhash import MAX_HAMMING_DISTANCE, get_near_duplicate_distance
+from app.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory of PDF and text files.")
+    parser.add_argument("directory", help="Directory to ingest recursively")
+    parser.add_argument("--db-path", default=os.getenv('VECTOR_DB_PATH', './vector_db'), help="ChromaDB storage path")
+    parser.add_argument("--provider", default=os.getenv('DEFAULT_EMBEDDING_PROVIDER'), help="Embedding provider")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1, help="Extraction processes")
+    parser.add_argument("--embed-workers", type=int, default=4, help="Concurrent embedding requests")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding batch")
+    parser.add_argument("--chunking", choices=("structured", "fixed"), default="structured", help="PDF chunking strategy")
+    parser.add_argument("--max-tokens", type=int, default=256, help="Token budget per chunk (structured)")
+    parser.add_argument("--overlap-tokens", type=int, default=0, help="Overlap within a split section (structured)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Characters per chunk (fixed)")
+    parser.add_argument("--overlap", type=int, default=200, help="Characters of overlap (fixed)")
+    parser.add_argument("--dedup-distance", type=int, default=get_near_duplicate_distance(),
+                        help=f"Near-duplicate SimHash distance in bits (0-{MAX_HAMMING_DISTANCE}); negative disables")
+    args = parser.parse_args(argv)
+    if args.dedup_distance > MAX_HAMMING_DISTANCE:
+        parser.error(f"--dedup-distance must be at most {MAX_HAMMING_DISTANCE}")
+    if args.batch_size < 1 or args.embed_workers < 1 or args.extract_workers < 1:
+        parser.error("--batch-size, --embed-workers and --extract-workers must be at least 1")
+    return args
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    root = os.path.abspath(args.directory)
+    files = list(iter_corpus_files(root))
+    print(f"Found {len(files)} files under {root}")
+
+    resources = AppResources.create(args.db_path, provider=args.provider)
+    try:
+        started = time.perf_counter()
+        # Enough files in flight to keep both pools busy
+        file_workers = args.extract_workers + args.embed_workers
+        with ProcessPoolExecutor(args.extract_workers) as extract_pool, \
+                ThreadPoolExecutor(args.embed_workers) as embed_pool, \
+                ThreadPoolExecutor(file_workers) as file_pool:
+            ingester = CorpusIngester(
+                resources.embedder, resources.registry, extract_pool, embed_pool,
+                batch_size=args.batch_size, dedup_distance=args.dedup_distance,
+                strategy=args.chunking, chunk_size=args.chunk_size, overlap=args.overlap,
+                max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens
+            )
+            futures = {
+                file_pool.submit(ingester.ingest_file, path, os.path.relpath(path, root)): path
+                for path in files
+            }
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        print(f"[{done}/{len(files)}] {describe_result(future.result())}")
+                    except Exception as e:
+                        ingester.count(failed=1)
+                        logger.error(f"Failed to ingest {futures[future]}: {str(e)}")
+                        print(f"[{done}/{len(files)}] {os.path.relpath(futures[future], root)}: FAILED ({e})")
+            except KeyboardInterrupt:
+                print("Interrupted; completed files are checkpointed, re-run to resume.")
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        resources.close()  # Write anything still buffered, also when interrupted or failing
+    elapsed = time.perf_counter() - started
+    stats = ingester.stats
+    print(
+        f"\nIngested {stats['files']} files ({stats['skipped']} already ingested, {stats['failed']} failed) "
+        f"in {elapsed:.1f}s\n"
+        f"Embedded {stats['chunks']} chunks / {stats['tokens']} tokens: "
+        f"{stats['chunks'] / elapsed:.1f} chunks/s, {stats['tokens'] / elapsed:.1f} tokens/s\n"
+        f"{stats['already_stored']} chunks already stored, {stats['near_duplicates']} near-duplicates dropped, "
+        f"{stats['removed']} stale chunks removed"
+    )
+    return 1 if stats['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Export a collection to a snapshot directory, or import one, without re-embedding.
+
+A snapshot holds the collection's embeddings as a float32 .npy matrix,
+IDs/documents/metadata as JSON Lines in the same row order, the collection's
+ingestion registry records, and a manifest with the embedding model, shape
+and file checksums. Import memory-maps the embeddings and bulk-loads them into
+the collection of the snapshot's model, so a replica comes up without calling
+any embedding provider. Run with the server stopped.
+
+Run from the backend directory:
+    python -m scripts.snapshot export /backups/vault-2024-01-01 [--model nomic-embed-text]
+    python -m scripts.snapshot import /backups/vault-2024-01-01
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+from dotenv import load_dotenv
+from app.handlers.db_handler import DatabaseHandler
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.handlers.snapshot import export_snapshot, import_snapshot, read_manifest
+from app.LLMs.embedding_factory import EmbeddingFactory
+
+load_dotenv()
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Export or import a collection snapshot.")
+    parser.add_argument("action", choices=("export", "import"), help="Direction of the copy")
+    parser.add_argument("path", help="Snapshot directory")
+    parser.add_argument("--db-path", default=os.getenv('VECTOR_DB_PATH', './vector_db'), help="Vector database path")
+    parser.add_argument("--registry-path", default=None, help="Ingestion registry path (default: INGESTION_REGISTRY_PATH)")
+    parser.add_argument("--model", default=None, help="Embedding model whose collection is exported (default: the configured model)")
+    parser.add_argument("--provider", default=os.getenv('DEFAULT_EMBEDDING_PROVIDER'), help="Embedding provider of the default model")
+    parser.add_argument("--no-verify", action="store_true", help="Skip checksum verification on import")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    db_handler = DatabaseHandler(args.db_path)
+    registry = IngestionRegistry(args.registry_path)
+    started = time.perf_counter()
+    try:
+        if args.action == "export":
+            collection = db_handler.collection_for_model(args.model or EmbeddingFactory.default_model(args.provider))
+            manifest = export_snapshot(collection, args.path, registry=registry)
+            verb = "Exported"
+        else:
+            model = read_manifest(args.path, verify=False)['embedding_model']
+            collection = db_handler.collection_for_model(model) if model else db_handler.collection
+            manifest = import_snapshot(
+                collection, args.path, registry=registry, batch_size=db_handler.max_batch_size, verify=not args.no_verify
+            )
+            verb = "Imported"
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        db_handler.close()
+        registry.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{verb} {manifest['count']} records of dimension {manifest['dimension']} "
+        f"({manifest['embedding_model'] or 'unknown model'}, {collection.name}) in {elapsed:.1f}s: "
+        f"{manifest['count'] / max(elapsed, 1e-9):.0f} records/s"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Measure HNSW recall and latency of a collection to choose its index parameters.
+
+A sample of the stored vectors is used as queries. Their exact cosine top-k
+is computed by brute force and compared with what the HNSW index returns,
+giving recall@k, alongside p50/p99 query latency, for every ef_search value
+given. The collection's ef_search is changed while measuring and restored
+afterwards, unless --apply stores the recommended value. ChromaDB applies
+ef_search when it loads an index, so run this while the server is stopped
+(or restart it after --apply).
+
+With --max-neighbors or --ef-construction, which are fixed when an index is
+built, the vectors are instead copied into temporary collections built with
+each combination and those are measured; apply the chosen values to a new
+collection through HNSW_MAX_NEIGHBORS / HNSW_EF_CONSTRUCTION or the hnsw
+settings of /ollama-embeddings/reembed.
+
+Run from the backend directory:
+    python -m scripts.tune_hnsw --ef-search 16,32,64,128 --k 10 --sample 200
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+import uuid
+from typing import List
+import chromadb
+import numpy as np
+from chromadb.api.client import SharedSystemClient
+from app.handlers.db_handler import COLLECTION_NAME, hnsw_configuration
+from app.handlers.index_tuning import exact_neighbors, load_vectors, measure_queries, pick_setting
+
+def int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of positive integers."""
+    try:
+        values = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {value!r}")
+    if not values or min(values) < 1:
+        raise argparse.ArgumentTypeError("values must be positive integers")
+    return values
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Measure HNSW recall@k and latency for a collection.")
+    parser.add_argument("--db-path", default=os.getenv('VECTOR_DB_PATH', './vector_db'), help="ChromaDB storage path")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection to measure")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--sample", type=int, default=200, help="Stored vectors used as queries")
+    parser.add_argument("--ef-search", type=int_list, default=[16, 32, 64, 128, 256], help="ef_search values to measure")
+    parser.add_argument("--max-neighbors", type=int_list, help="Rebuild with these max_neighbors (M) values")
+    parser.add_argument("--ef-construction", type=int_list, help="Rebuild with these ef_construction values")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Recall the recommendation must reach")
+    parser.add_argument("--seed", type=int, default=0, help="Query sample seed")
+    parser.add_argument("--apply", action="store_true", help="Store the recommended ef_search on the collection")
+    args = parser.parse_args(argv)
+    if args.k < 1 or args.sample < 1:
+        parser.error("--k and --sample must be at least 1")
+    if args.apply and (args.max_neighbors or args.ef_construction):
+        parser.error("--apply only changes ef_search; it cannot be combined with a rebuild")
+    return args
+
+def open_collection(db_path: str, name: str):
+    """
+    Open a collection with its index freshly loaded.
+
+    ChromaDB applies ef_search when it loads an index, so the client cache
+    is cleared to make a changed ef_search take effect in this process.
+    """
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=db_path).get_collection(name)
+
+def build_copy(db_path: str, ids: List[str], vectors: np.ndarray, max_neighbors: int, ef_construction: int) -> str:
+    """Build a collection holding the vectors with the given index parameters; returns its name."""
+    client = chromadb.PersistentClient(path=db_path)
+    collection = client.create_collection(
+        f"tune_{uuid.uuid4().hex[:12]}",
+        configuration={"hnsw": hnsw_configuration({'max_neighbors': max_neighbors, 'ef_construction': ef_construction})}
+    )
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(ids), batch_size):
+        collection.add(ids=ids[start:start + batch_size], embeddings=vectors[start:start + batch_size])
+    return collection.name
+
+def measure_ef_search(db_path: str, name: str, args, ids, vectors, query_rows, exact, build: dict) -> List[dict]:
+    """Measure every --ef-search value on one collection."""
+    results = []
+    for ef_search in args.ef_search:
+        open_collection(db_path, name).modify(configuration={"hnsw": {"ef_search": ef_search}})
+        collection = open_collection(db_path, name)
+        result = dict(build, ef_search=ef_search)
+        result.update(measure_queries(collection, ids, vectors, query_rows, exact, args.k))
+        print(
+            f"{str(result['max_neighbors']):>13} {str(result['ef_construction']):>15} {ef_search:>9} "
+            f"{result['recall']:>9.4f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        )
+        results.append(result)
+    return results
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    collection = open_collection(args.db_path, args.collection)
+    ids, vectors = load_vectors(collection)
+    if len(ids) <= args.k:
+        print(f"{args.collection} holds {len(ids)} vectors; at least {args.k + 1} are needed for k={args.k}")
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    query_rows = sorted(rng.choice(len(ids), size=min(args.sample, len(ids)), replace=False).tolist())
+    started = time.perf_counter()
+    exact = exact_neighbors(vectors, query_rows, args.k)
+    print(
+        f"{args.collection}: {len(ids)} vectors of dimension {vectors.shape[1]}, {len(query_rows)} queries, "
+        f"k={args.k} (exact search {time.perf_counter() - started:.2f}s)\n"
+    )
+    print(f"{'max_neighbors':>13} {'ef_construction':>15} {'ef_search':>9} {f'recall@{args.k}':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    results = []
+    current = collection.configuration_json['hnsw']
+    if args.max_neighbors or args.ef_construction:
+        with tempfile.TemporaryDirectory(prefix="tune_hnsw_") as copy_path:
+            for max_neighbors, ef_construction in itertools.product(
+                    args.max_neighbors or [current['max_neighbors']], args.ef_construction or [current['ef_construction']]):
+                started = time.perf_counter()
+                name = build_copy(copy_path, ids, vectors, max_neighbors, ef_construction)
+                build = {'max_neighbors': max_neighbors, 'ef_construction': ef_construction,
+                         'build_seconds': round(time.perf_counter() - started, 2)}
+                results.extend(measure_ef_search(copy_path, name, args, ids, vectors, query_rows, exact, build))
+            SharedSystemClient.clear_system_cache()  # Release the copies before they are deleted
+    else:
+        build = {'max_neighbors': current['max_neighbors'], 'ef_construction': current['ef_construction']}
+        try:
+            results = measure_ef_search(args.db_path, args.collection, args, ids, vectors, query_rows, exact, build)
+        finally:
+            open_collection(args.db_path, args.collection).modify(configuration={"hnsw": {"ef_search": current['ef_search']}})
+
+    best = pick_setting(results, args.target_recall)
+    reached = "reaches" if best['recall'] >= args.target_recall else "is the best recall, below"
+    print(
+        f"\nRecommended: max_neighbors={best['max_neighbors']} ef_construction={best['ef_construction']} "
+        f"ef_search={best['ef_search']} (recall@{args.k} {best['recall']:.4f} {reached} the "
+        f"{args.target_recall} target, p50 {best['p50_ms']:.2f} ms, p99 {best['p99_ms']:.2f} ms)"
+    )
+    if args.apply:
+        open_collection(args.db_path, args.collection).modify(configuration={"hnsw": {"ef_search": best['ef_search']}})
+        print(f"Stored ef_search={best['ef_search']} on {args.collection}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Report the memory saved and recall lost by quantized or truncated vector storage.
+
+The vectors of a collection are copied into temporary numpy stores, one per
+combination of --dtypes, --dimensions and --rescore. Stored vectors are used
+as sample queries; each store's results are compared with exact float32
+search, giving recall@k, alongside the size of the matrix every query scans
+and p50/p99 query latency. Truncation (--dimensions) only preserves quality
+for Matryoshka embedding models such as snowflake-arctic-embed2 or
+text-embedding-004. Nothing is changed; apply a setting with
+PATCH /ollama-embeddings/models/{model}/storage or the storage settings of
+/ollama-embeddings/reembed.
+
+Run from the backend directory:
+    python -m scripts.vector_storage_report --dtypes float16,int8 --dimensions 0,256 --rescore 0,4
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import List
+import chromadb
+import numpy as np
+from app.handlers.db_handler import COLLECTION_NAME, FLAT_INDEX_DIR, storage_configuration
+from app.handlers.index_tuning import exact_neighbors, load_vectors, measure_queries
+from app.handlers.vector_store import STORAGE_DTYPES, NumpyVectorStore
+from scripts.tune_hnsw import int_list
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Measure memory and recall@k of vector storage settings.")
+    parser.add_argument("--db-path", default=os.getenv('VECTOR_DB_PATH', './vector_db'), help="Vector database path")
+    parser.add_argument("--backend", default=os.getenv('VECTOR_STORE', 'chroma'), choices=("chroma", "numpy"),
+                        help="Store holding the collection")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection to measure")
+    parser.add_argument("--dtypes", default="float16,int8", help="Comma-separated dtypes to measure")
+    parser.add_argument("--dimensions", default="0", help="Comma-separated dimensions to keep (0 keeps all)")
+    parser.add_argument("--rescore", type=int_list, default=None, help="Rescore factors to measure (default: 0,4)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--sample", type=int, default=200, help="Stored vectors used as queries")
+    parser.add_argument("--seed", type=int, default=0, help="Query sample seed")
+    args = parser.parse_args(argv)
+    args.dtypes = [dtype.strip() for dtype in args.dtypes.split(',') if dtype.strip()]
+    if not args.dtypes or any(dtype not in STORAGE_DTYPES for dtype in args.dtypes):
+        parser.error(f"--dtypes must be a comma-separated subset of {STORAGE_DTYPES}")
+    try:
+        args.dimensions = [int(value) for value in args.dimensions.split(',') if value.strip()]
+    except ValueError:
+        parser.error("--dimensions must be comma-separated integers")
+    if not args.dimensions or min(args.dimensions) < 0:
+        parser.error("--dimensions must be zero or positive")
+    args.rescore = args.rescore or [0, 4]
+    if args.k < 1 or args.sample < 1:
+        parser.error("--k and --sample must be at least 1")
+    return args
+
+def open_collection(db_path: str, backend: str, name: str):
+    """Open an existing collection without creating it."""
+    if backend == "numpy":
+        path = os.path.join(db_path, FLAT_INDEX_DIR, name)
+        if not os.path.isdir(path):
+            raise ValueError(f"No numpy collection {name} in {db_path}")
+        return NumpyVectorStore(path, name)
+    return chromadb.PersistentClient(path=db_path).get_collection(name)
+
+def measure_storage(path: str, storage: dict, ids, vectors, query_rows, exact, k: int) -> dict:
+    """Copy the vectors into a numpy store with the given storage and measure it."""
+    store = NumpyVectorStore(path, "storage_report", storage=storage)
+    try:
+        for start in range(0, len(ids), 5000):
+            store.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000])
+        result = dict(storage, index_bytes=store.index_bytes)
+        result.update(measure_queries(store, ids, vectors, query_rows, exact, k))
+        return result
+    finally:
+        store.close()
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    collection = open_collection(args.db_path, args.backend, args.collection)
+    ids, vectors = load_vectors(collection)
+    if len(ids) <= args.k:
+        print(f"{args.collection} holds {len(ids)} vectors; at least {args.k + 1} are needed for k={args.k}")
+        return 1
+    if any(dimensions > vectors.shape[1] for dimensions in args.dimensions):
+        print(f"{args.collection} has {vectors.shape[1]} dimensions; --dimensions cannot exceed that")
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    query_rows = sorted(rng.choice(len(ids), size=min(args.sample, len(ids)), replace=False).tolist())
+    exact = exact_neighbors(vectors, query_rows, args.k)
+    full_bytes = vectors.shape[0] * vectors.shape[1] * 4
+    print(f"{args.collection}: {len(ids)} vectors of dimension {vectors.shape[1]}, {len(query_rows)} queries, k={args.k}\n")
+    print(f"{'dtype':>8} {'dims':>6} {'rescore':>7} {'index MB':>9} {'saved':>7} {f'recall@{args.k}':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+
+    settings = [{'dtype': 'float32', 'dimensions': 0, 'rescore': 0}]  # Uncompressed baseline
+    for dtype, dimensions, rescore in itertools.product(args.dtypes, args.dimensions, args.rescore):
+        if dtype != 'float32' or dimensions:
+            settings.append({'dtype': dtype, 'dimensions': dimensions, 'rescore': rescore})
+    for overrides in settings:
+        storage = storage_configuration(overrides)
+        with tempfile.TemporaryDirectory(prefix="storage_report_") as path:
+            started = time.perf_counter()
+            result = measure_storage(path, storage, ids, vectors, query_rows, exact, args.k)
+        print(
+            f"{storage['dtype']:>8} {str(storage['dimensions'] or vectors.shape[1]):>6} {storage['rescore']:>7} "
+            f"{result['index_bytes'] / 2**20:>9.2f} {1 - result['index_bytes'] / full_bytes:>7.1%} "
+            f"{result['recall']:>9.4f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+            f"  ({time.perf_counter() - started:.1f}s)"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+import uuid
+import chromadb
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import document_api, document_chat_api, ollama_embedding_api
+from app.dependencies import AppResources
+from app.handlers.ingestion_registry import IngestionRegistry
+from test_document_reindex import StubEmbeddings
+
+class TestSharedResources(unittest.TestCase):
+    """Test that routers use the resources injected from app.state."""
+
+    def setUp(self):
+        """Mount the routers on an app whose resources use an in-memory collection."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        collection = chromadb.EphemeralClient().create_collection(f"test_{uuid.uuid4().hex[:8]}")
+        self.embedder = StubEmbeddings(collection)
+        app = FastAPI()
+        app.state.resources = AppResources(None, self.embedder, self.registry)
+        app.include_router(document_api.router)
+        app.include_router(ollama_embedding_api.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Remove the temporary registry."""
+        self.registry.close()
+        self.tmpdir.cleanup()
+
+    def test_routers_do_not_open_stores_at_import(self):
+        """No router module creates its own DatabaseHandler or embedder."""
+        for module in (document_api, document_chat_api, ollama_embedding_api):
+            self.assertFalse(hasattr(module, "db_handler"))
+            self.assertFalse(hasattr(module, "embedder"))
+            self.assertFalse(hasattr(module, "registry"))
+
+    def test_writes_are_visible_across_routers(self):
+        """Chunks embedded through one router are listed by another."""
+        response = self.client.post(
+            "/api/v1/ollama-embeddings/embed", json={"contents": ["alpha", "beta"], "source": "notes.txt"}
+        )
+        self.assertTrue(response.json()["success"])
+        response = self.client.get("/api/v1/documents/", params={"fields": "ids"})
+        self.assertEqual(response.headers["X-Total-Count"], "2")
+        self.assertEqual(self.client.delete("/api/v1/documents/sources/notes.txt").json()["chunks_deleted"], 2)
+        self.assertEqual(self.embedder.collection.count(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import uuid
+import chromadb
+from app.handlers.directory_watcher import DirectoryWatcher
+from app.handlers.ingestion_registry import IngestionRegistry
+from test_document_reindex import StubEmbeddings
+
+class TestDirectoryWatcher(unittest.TestCase):
+    """Test watched-directory incremental ingestion."""
+
+    def setUp(self):
+        """Create a watched directory, a registry and an in-memory collection."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "inbox")
+        os.makedirs(self.directory)
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        collection = chromadb.EphemeralClient().create_collection(f"test_{uuid.uuid4().hex[:8]}")
+        self.embedder = StubEmbeddings(collection)
+        self.watcher = DirectoryWatcher(self.directory, self.embedder, self.registry, debounce_seconds=0)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.registry._connection.close()
+        self.tmpdir.cleanup()
+
+    def write(self, name: str, text: str):
+        with open(os.path.join(self.directory, name), "w") as outfile:
+            outfile.write(text)
+
+    def poll(self):
+        """Poll twice: the first scan sees the change, the second syncs it."""
+        asyncio.run(self.watcher.poll_once())
+        asyncio.run(self.watcher.poll_once())
+        return self.watcher.status['last_result']
+
+    def sources(self) -> set:
+        return {metadata['source'] for metadata in self.embedder.collection.get(include=['metadatas'])['metadatas']}
+
+    def test_new_changed_and_deleted_files(self):
+        """New files are ingested, changed files re-indexed and deleted files removed."""
+        self.write("a.md", "Alpha paragraph.")
+        self.write("b.txt", "Beta paragraph.")
+        self.assertEqual(sorted(self.poll()['ingested']), ["a.md", "b.txt"])
+
+        self.write("a.md", "Alpha paragraph, revised.")
+        os.remove(os.path.join(self.directory, "b.txt"))
+        result = self.poll()
+        self.assertEqual((result['ingested'], result['removed']), (["a.md"], ["b.txt"]))
+        self.assertEqual(self.embedder.collection.get(include=['documents'])['documents'], ["Alpha paragraph, revised."])
+        self.assertEqual(self.sources(), {"a.md"})
+
+    def test_unmodified_file_is_not_reingested(self):
+        """Rewriting a file with identical content does not embed it again."""
+        self.write("a.md", "Alpha paragraph.")
+        self.poll()
+        calls = self.embedder.client.calls
+        os.utime(os.path.join(self.directory, "a.md"), ns=(1, 1))
+        self.assertEqual(self.poll()['unchanged'], 1)
+        self.assertEqual(self.embedder.client.calls, calls)
+
+    def test_changes_wait_for_quiet_period(self):
+        """Nothing is synced while the directory keeps changing within the debounce window."""
+        self.watcher.debounce_seconds = 3600
+        self.write("a.md", "Alpha paragraph.")
+        self.poll()
+        self.assertEqual(self.watcher.status['syncs'], 0)
+        self.assertEqual(self.embedder.collection.count(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
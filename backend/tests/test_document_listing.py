@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+import chromadb
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import document_api
+from app.dependencies import AppResources
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.utils.cors import add_cors_middleware
+from test_document_reindex import StubEmbeddings
+
+class TestDocumentListing(unittest.TestCase):
+    """Test paging through and exporting the collection."""
+
+    def setUp(self):
+        """Mount the documents router on an in-memory collection of five chunks."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        collection = chromadb.EphemeralClient().create_collection(f"test_{uuid.uuid4().hex[:8]}")
+        collection.add(ids=[f"doc{i}" for i in range(5)], documents=[f"chunk {i}" for i in range(5)],
+                       embeddings=[[float(i), 1.0] for i in range(5)])
+        self.embedder = StubEmbeddings(collection)
+        app = FastAPI()
+        app.state.resources = AppResources(None, self.embedder, self.registry)
+        app.include_router(document_api.router)
+        add_cors_middleware(app)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Remove the temporary registry."""
+        self.registry.close()
+        self.tmpdir.cleanup()
+
+    def test_next_offset_until_last_page(self):
+        """An exactly full last page has no next offset."""
+        response = self.client.get("/api/v1/documents/", params={"limit": 3, "fields": "ids"})
+        self.assertEqual(response.headers["X-Next-Offset"], "3")
+        response = self.client.get("/api/v1/documents/", params={"limit": 2, "offset": 3, "fields": "ids"})
+        self.assertEqual(len(response.json()), 2)
+        self.assertNotIn("X-Next-Offset", response.headers)
+
+    def test_paging_headers_are_exposed_cross_origin(self):
+        """A frontend on another origin can read the paging headers."""
+        response = self.client.get("/api/v1/documents/", params={"limit": 3}, headers={"Origin": "http://localhost:5173"})
+        exposed = {header.strip().lower() for header in response.headers["Access-Control-Expose-Headers"].split(",")}
+        self.assertLessEqual({"x-next-offset", "x-total-count"}, exposed)
+
+    def test_storage_error_is_not_an_empty_list(self):
+        """A failing collection read is a 500, not an empty page."""
+        with mock.patch.object(self.embedder.collection, "get", side_effect=RuntimeError("storage offline")):
+            response = self.client.get("/api/v1/documents/")
+        self.assertEqual(response.status_code, 500)
+
+    def test_export_fails_before_streaming(self):
+        """An unreadable collection fails the export with a 500."""
+        with mock.patch.object(self.embedder.collection, "get", side_effect=RuntimeError("storage offline")):
+            response = self.client.get("/api/v1/documents/export")
+        self.assertEqual(response.status_code, 500)
+
+    def test_export_aborts_on_later_error(self):
+        """A read failing after the first batch aborts the stream instead of ending it cleanly."""
+        get = self.embedder.collection.get
+        calls = []
+
+        def failing_get(**kwargs):
+            calls.append(kwargs)
+            if len(calls) > 1:
+                raise RuntimeError("storage offline")
+            return get(**kwargs)
+
+        with mock.patch.object(self.embedder.collection, "get", side_effect=failing_get):
+            with self.assertRaises(RuntimeError):
+                self.client.get("/api/v1/documents/export", params={"batch_size": 2})
+
+    def test_export_streams_every_document(self):
+        lines = self.client.get("/api/v1/documents/export", params={"batch_size": 2}).text.splitlines()
+        self.assertEqual(len(lines), 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import hashlib
+import uuid
+import chromadb
+from app.LLMs.ollama_embedding import OllamaEmbeddings
+
+class FakeOllamaClient:
+    """Deterministic stand-in for the ollama module that counts embedded texts."""
+
+    def __init__(self):
+        self.calls = 0
+        self.endpoints = set()
+
+    def embeddings(self, model, prompt, keep_alive=None):
+        self.endpoints.add("embeddings")
+        return {"embedding": self._vector(prompt, keep_alive)}
+
+    def embed(self, model, input, keep_alive=None):
+        self.endpoints.add("embed")
+        texts = [input] if isinstance(input, str) else input
+        return {"embeddings": [self._vector(text, keep_alive) for text in texts]}
+
+    def _vector(self, text, keep_alive):
+        self.calls += 1
+        self.keep_alive = keep_alive
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+class StubEmbeddings(OllamaEmbeddings):
+    """OllamaEmbeddings backed by an in-memory collection and a fake client."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.model = "fake-embed"
+        self.client = FakeOllamaClient()
+
+class TestDocumentReindex(unittest.TestCase):
+    """Test document-level delete and incremental re-index."""
+
+    def setUp(self):
+        """Create a fresh in-memory collection."""
+        client = chromadb.EphemeralClient()
+        collection = client.create_collection(f"test_{uuid.uuid4().hex[:8]}", metadata={"hnsw:space": "cosine"})
+        self.embedder = StubEmbeddings(collection)
+
+    def test_replace_only_embeds_changed_chunks(self):
+        """Unchanged chunks are kept, new ones embedded and stale ones removed."""
+        self.embedder.replace_document("manual.pdf", ["alpha", "beta", "gamma"])
+        self.assertEqual(self.embedder.client.calls, 3)
+
+        stats = self.embedder.replace_document("manual.pdf", ["alpha", "beta revised", "gamma"])
+        self.assertEqual(stats, {"added": 1, "removed": 1, "unchanged": 2})
+        self.assertEqual(self.embedder.client.calls, 4)
+        self.assertEqual(self.embedder.collection.count(), 3)
+
+    def test_unchanged_chunks_take_new_metadata(self):
+        """A chunk moved to another page is found on its new page, without being embedded again."""
+        self.embedder.replace_document("manual.pdf", ["alpha", "beta"],
+                                       metadatas=[{"page": 1, "section": "Intro"}, {"page": 1}])
+        self.embedder.replace_document("manual.pdf", ["alpha", "beta"], metadatas=[{"page": 3}, {"page": 1}])
+        self.assertEqual(self.embedder.client.calls, 2)
+        moved = self.embedder.collection.get(where={"page": 3}, include=["documents", "metadatas"])
+        self.assertEqual(moved["documents"], ["alpha"])
+        self.assertNotIn("section", moved["metadatas"][0])
+        self.assertEqual(self.embedder.collection.get(where={"page": 1})["documents"], ["beta"])
+
+    def test_replace_leaves_other_sources_alone(self):
+        """Re-indexing one source does not touch chunks of another."""
+        self.embedder.replace_document("a.pdf", ["shared text"])
+        self.embedder.replace_document("b.pdf", ["shared text"])
+        self.embedder.replace_document("a.pdf", ["new text"])
+        self.assertEqual(self.embedder.collection.count(), 2)
+
+    def test_delete_document(self):
+        """Deleting a source removes all of its chunks and reports the count."""
+        self.embedder.create_embeddings_batch(
+            ["one", "two", "three"],
+            metadatas=[{"source": "a.pdf"}, {"source": "a.pdf"}, {"source": "b.pdf"}]
+        )
+        self.assertEqual(self.embedder.delete_document("a.pdf"), 2)
+        self.assertEqual(self.embedder.delete_document("a.pdf"), 0)
+        self.assertEqual(self.embedder.collection.count(), 1)
+
+    def test_documents_and_queries_share_an_endpoint(self):
+        """Stored chunks and queries are embedded through the same Ollama endpoint, so a chunk finds itself."""
+        self.embedder.create_embeddings_batch(["store cue", "patch fixture"])
+        self.embedder.create_embedding("label group")
+        self.embedder.warm_up(keep_alive="5m")
+        self.assertEqual(self.embedder.search("label group", top_k=1), ["label group"])
+        self.assertEqual(self.embedder.client.endpoints, {"embed"})
+
+if __name__ == "__main__":
+    unittest.main()
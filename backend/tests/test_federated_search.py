@@ -0,0 +1,139 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import document_api, ollama_embedding_api
+from app.dependencies import AppResources
+from app.handlers.db_handler import DatabaseHandler, named_collection_name
+from app.handlers.federated_search import FederatedSearch
+from app.handlers.ingestion_registry import IngestionRegistry
+from test_reembed import stub_embedder
+
+class SlowCollection:
+    """Collection stand-in that answers after a delay with fixed results."""
+
+    def __init__(self, hits, delay: float = 0.0):
+        self.hits = hits
+        self.delay = delay
+        self.threads = set()
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        hits = self.hits[:n_results]
+        return {
+            'ids': [[chunk_id for chunk_id, _, _ in hits]],
+            'documents': [[document for _, document, _ in hits]],
+            'metadatas': [[{} for _ in hits]],
+            'distances': [[distance for _, _, distance in hits]],
+        }
+
+def fake_embedder(collection):
+    return SimpleNamespace(model="fake-embed", collection=collection, embed_query=lambda query: [1.0, 0.0])
+
+class TestFederatedSearch(unittest.TestCase):
+    """Test merging parallel searches of several collections."""
+
+    def setUp(self):
+        """Create the shared search pool."""
+        self.executor = ThreadPoolExecutor(4)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_merges_by_score_and_dedupes(self):
+        """The best hits across collections win, and a passage found twice is kept once."""
+        manuals = {
+            "grandma3": fake_embedder(SlowCollection([("g1", "store cue", 0.1), ("g2", "label group", 0.8)])),
+            "dot2": fake_embedder(SlowCollection([("d1", "store cue", 0.1), ("d2", "patch fixture", 0.3)])),
+        }
+        hits = FederatedSearch(manuals, self.executor).search_hits("store", top_k=3)
+        self.assertEqual([hit['document'] for hit in hits], ["store cue", "patch fixture", "label group"])
+        self.assertEqual(hits[1]['collection'], "dot2")
+        self.assertAlmostEqual(hits[1]['score'], 0.85)
+
+    def test_collections_are_queried_in_parallel(self):
+        """A slow collection does not delay the others' queries."""
+        manuals = {name: fake_embedder(SlowCollection([(name, name, 0.5)], delay=0.2)) for name in ("a", "b", "c")}
+        started = time.perf_counter()
+        FederatedSearch(manuals, self.executor).search("query", top_k=2)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_rejects_mixed_models(self):
+        """Scores of different embedding models are not comparable."""
+        other = SimpleNamespace(model="other-embed", collection=SlowCollection([]), embed_query=None)
+        with self.assertRaises(ValueError):
+            FederatedSearch({"a": fake_embedder(SlowCollection([])), "b": other}, self.executor)
+
+class TestNamedCollections(unittest.TestCase):
+    """Test selecting named collections per request."""
+
+    def setUp(self):
+        """Mount the routers on resources whose embedders are stubs."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_handler = DatabaseHandler(os.path.join(self.tmpdir.name, "db"))
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        default = stub_embedder(self.db_handler.collection_for_model("default-model"), "default-model")
+        self.resources = AppResources(self.db_handler, default, self.registry)
+        patcher = mock.patch(
+            "app.dependencies.EmbeddingFactory.create_embedder",
+            side_effect=lambda provider, collection, model: stub_embedder(collection, model)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+        app.state.resources = self.resources
+        app.include_router(ollama_embedding_api.router)
+        app.include_router(document_api.router)
+        self.client = TestClient(app)
+        for collection, contents in (("grandma3", ["store cue", "label group"]), ("dot2", ["patch fixture"])):
+            response = self.client.post("/api/v1/ollama-embeddings/embed",
+                                        json={"contents": contents, "collection": collection, "source": f"{collection}.pdf"})
+            self.assertTrue(response.json()["success"])
+
+    def tearDown(self):
+        """Stop the write buffers and remove the temporary files."""
+        self.resources.close()
+        self.tmpdir.cleanup()
+
+    def search(self, collections, query="patch fixture"):
+        return self.client.post("/api/v1/ollama-embeddings/search", json={
+            "query": query, "top_k": 5, "enhanced_search": False, "collections": collections
+        })
+
+    def test_collections_are_separate(self):
+        """Each named collection holds its own chunks and the main collection is untouched."""
+        self.assertEqual(self.resources.embedder.collection.count(), 0)
+        grandma3 = self.db_handler.named_collection("default-model", "grandma3", create=False)
+        self.assertEqual((grandma3.name, grandma3.count()), (named_collection_name("default-model", "grandma3"), 2))
+        self.assertEqual(self.search(["grandma3"]).json()["contexts"][0], "store cue")
+        response = self.client.get("/api/v1/documents/", params={"collection": "dot2", "fields": "ids"})
+        self.assertEqual(response.headers["X-Total-Count"], "1")
+        names = {entry['name'] for entry in self.client.get("/api/v1/ollama-embeddings/models").json()["collections"]}
+        self.assertEqual(names, {"default", "grandma3", "dot2"})
+
+    def test_search_across_collections(self):
+        """Several collections are searched together and the exact match ranks first."""
+        response = self.search(["grandma3", "dot2", "default"])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["contexts"][0], "patch fixture")
+        self.assertEqual(sorted(body["contexts"]), ["label group", "patch fixture", "store cue"])
+        self.assertEqual(body["search_metadata"]["collections"], ["grandma3", "dot2", "default"])
+
+    def test_unknown_and_invalid_collections(self):
+        """Reading an unknown collection is a 404 and an invalid name a 400; neither creates anything."""
+        self.assertEqual(self.search(["grandma3", "missing"]).status_code, 404)
+        self.assertEqual(self.search(["../etc"]).status_code, 400)
+        self.assertEqual(self.client.get("/api/v1/documents/", params={"collection": "missing"}).status_code, 404)
+        response = self.client.delete("/api/v1/documents/sources/manual.pdf", params={"collection": "missing"})
+        self.assertEqual(response.status_code, 404)
+        with self.assertRaises(LookupError):
+            self.db_handler.named_collection("default-model", "missing", create=False)
+
+if __name__ == "__main__":
+    unittest.main()
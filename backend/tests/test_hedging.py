@@ -0,0 +1,116 @@
+import threading
+import time
+import unittest
+from app.LLMs.base_llm import BaseLLM
+from app.LLMs.hedging import HedgedLLM, HedgeStats, all_hedge_stats
+from app.LLMs.llm_factory import LLMFactory
+from app.LLMs.ollama_chat import OllamaChat
+from app.LLMs.provider_router import ProviderRouter, RoutedLLM
+
+class DelayedChat(BaseLLM):
+    """Chat provider streaming fixed chunks after a first-chunk delay, recording early closes."""
+
+    def __init__(self, name, delay=0.0, failing=False):
+        self.model = f"{name}-model"
+        self.provider = name
+        self.delay = delay
+        self.failing = failing
+        self.calls = 0
+        self.closed_early = threading.Event()
+
+    def generate_streaming_response(self, prompt, system_prompt=None, model=None, max_tokens=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError(f"{self.provider} unavailable")
+        finished = False
+        try:
+            for chunk in (self.provider, " answers", " fully"):
+                yield chunk
+            finished = True
+        finally:
+            if not finished:
+                self.closed_early.set()
+
+    def generate_response(self, prompt, system_prompt=None, model=None, max_tokens=None):
+        return "".join(self.generate_streaming_response(prompt))
+
+    def generate_autocomplete(self, partial_prompt, max_tokens=50, model=None):
+        return self.provider
+
+class TestHedging(unittest.TestCase):
+    """Test duplicating slow requests and keeping the first answer."""
+
+    def setUp(self):
+        """Hedge after 50 ms until latencies are known."""
+        self.stats = HedgeStats(min_samples=100, default_delay=0.05)
+
+    def test_fast_primary_is_not_hedged(self):
+        """A primary answering within the delay is the only request sent."""
+        secondary = DelayedChat("secondary")
+        llm = HedgedLLM(DelayedChat("primary"), secondary, self.stats)
+        self.assertEqual(llm.generate_response("question"), "primary answers fully")
+        self.assertEqual(secondary.calls, 0)
+        self.assertEqual((self.stats.counts['hedged'], self.stats.counts['primary_wins']), (0, 1))
+
+    def test_slow_primary_loses_to_duplicate(self):
+        """The duplicate answers first, and the slow primary is cancelled at its first chunk."""
+        primary = DelayedChat("primary", delay=0.4)
+        llm = HedgedLLM(primary, DelayedChat("secondary"), self.stats)
+        started = time.perf_counter()
+        self.assertEqual(list(llm.generate_streaming_response("question")), ["secondary", " answers", " fully"])
+        self.assertLess(time.perf_counter() - started, 0.3)
+        self.assertEqual((llm.provider, llm.model), ("secondary", "secondary-model"))
+        self.assertTrue(primary.closed_early.wait(2))
+        summary = self.stats.summary()
+        self.assertEqual((summary['hedged'], summary['secondary_wins'], summary['hedge_rate']), (1, 1, 1.0))
+
+    def test_failed_primary_is_replaced_without_waiting(self):
+        """A primary failing before it answers sends the duplicate at once."""
+        llm = HedgedLLM(DelayedChat("primary", failing=True), DelayedChat("secondary"), HedgeStats(default_delay=5.0))
+        started = time.perf_counter()
+        self.assertEqual(llm.generate_response("question"), "secondary answers fully")
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    def test_both_failing_raises(self):
+        """The error reaches the caller when neither copy answers."""
+        llm = HedgedLLM(DelayedChat("primary", failing=True), DelayedChat("secondary", failing=True), self.stats)
+        with self.assertRaises(ConnectionError):
+            llm.generate_response("question")
+        self.assertEqual(self.stats.counts['failed'], 1)
+
+    def test_delay_follows_latency_percentile(self):
+        """Once enough first-chunk latencies are recorded, their percentile is the hedge delay."""
+        stats = HedgeStats(fraction=0.5, min_samples=3, default_delay=2.0)
+        self.assertEqual(stats.delay(), 2.0)
+        for seconds in (0.3, 0.1, 0.2):
+            stats.record_latency(seconds)
+        self.assertEqual(stats.delay(), 0.2)
+
+    def test_factory_picks_secondary(self):
+        """Auto hedges to the second ranked provider."""
+        router = ProviderRouter(["a", "b"], {"a": lambda: DelayedChat("a"), "b": lambda: DelayedChat("b")}.__getitem__)
+        hedged = LLMFactory.hedged("auto", RoutedLLM(router))
+        self.assertIsInstance(hedged, HedgedLLM)
+        self.assertEqual((hedged.primary.provider, hedged.secondary.provider), ("a", "b"))
+        self.assertEqual(all_hedge_stats()["auto"]["secondary"], "provider")
+
+    def test_single_endpoint_hedges_to_another_provider(self):
+        """A provider with one endpoint sends its duplicate to a different provider, never back to itself."""
+        router = ProviderRouter(["ollama", "b"], {"b": lambda: DelayedChat("b")}.__getitem__)
+        router.record("ollama", 0.001, ok=True)  # Ranked first: still never the secondary
+        ollama = OllamaChat("llama3")
+        hedged = LLMFactory.hedged("ollama", ollama, router)
+        self.assertIsInstance(hedged, HedgedLLM)
+        self.assertIs(hedged.primary, ollama)
+        self.assertEqual(hedged.secondary.generate_response("question"), "b answers fully")
+        self.assertEqual(all_hedge_stats()["ollama"]["secondary"], "provider")
+
+    def test_no_other_endpoint_is_not_hedged(self):
+        """Without a second host or provider the request is sent once, and reported as not hedged."""
+        gemini = DelayedChat("gemini")
+        self.assertIs(LLMFactory.hedged("gemini", gemini, ProviderRouter(["gemini"], {}.__getitem__)), gemini)
+        self.assertIsNone(all_hedge_stats()["gemini"]["secondary"])
+
+if __name__ == "__main__":
+    unittest.main()
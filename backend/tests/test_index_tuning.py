@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+import chromadb
+import numpy as np
+from app.handlers.db_handler import DatabaseHandler, hnsw_configuration
+from app.handlers.index_tuning import exact_neighbors, load_vectors, measure_queries, pick_setting, recall_at_k
+
+class TestHNSWConfiguration(unittest.TestCase):
+    """Test HNSW parameters of new collections."""
+
+    def test_environment_and_overrides(self):
+        """Overrides win over HNSW_* variables, which win over ChromaDB's defaults."""
+        with mock.patch.dict(os.environ, {"HNSW_MAX_NEIGHBORS": "32", "HNSW_EF_SEARCH": "80"}):
+            configuration = hnsw_configuration({"ef_search": 200})
+        self.assertEqual(configuration, {"space": "cosine", "max_neighbors": 32, "ef_search": 200})
+        with self.assertRaises(ValueError):
+            hnsw_configuration({"M": 8})
+        with self.assertRaises(ValueError):
+            hnsw_configuration({"ef_search": 0})
+
+    def test_model_collection_uses_parameters(self):
+        """A model's collection is created with the requested parameters."""
+        with tempfile.TemporaryDirectory() as path:
+            db_handler = DatabaseHandler(path)
+            try:
+                db_handler.collection_for_model("model-a")
+                collection = db_handler.collection_for_model("model-b", hnsw={"max_neighbors": 24, "ef_construction": 150})
+                settings = db_handler.hnsw_settings(collection)
+                self.assertEqual((settings['max_neighbors'], settings['ef_construction']), (24, 150))
+                self.assertEqual(db_handler.set_search_ef(collection, 300)['ef_search'], 300)
+            finally:
+                db_handler.close()
+
+class TestIndexTuning(unittest.TestCase):
+    """Test recall and latency measurement against exact search."""
+
+    def setUp(self):
+        """Store random vectors in an in-memory collection."""
+        self.vectors = np.random.default_rng(7).standard_normal((300, 16)).astype(np.float32)
+        self.ids = [f"doc_{index}" for index in range(len(self.vectors))]
+        self.collection = chromadb.EphemeralClient().create_collection(
+            f"test_{uuid.uuid4().hex[:8]}", configuration={"hnsw": {"space": "cosine", "ef_search": 200}}
+        )
+        self.collection.add(ids=self.ids, embeddings=self.vectors)
+
+    def test_exact_neighbors_match_naive_search(self):
+        """Brute-force neighbours exclude the query itself and are ordered by similarity."""
+        exact = exact_neighbors(self.vectors, [0, 5], 4)
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        for row, neighbours in zip([0, 5], exact):
+            expected = [index for index in np.argsort(-(normalized @ normalized[row])) if index != row][:4]
+            self.assertEqual(neighbours, expected)
+
+    def test_measure_queries(self):
+        """A small index searched with a large ef_search finds the exact neighbours."""
+        ids, vectors = load_vectors(self.collection, batch_size=64)
+        self.assertEqual(len(ids), 300)
+        rows = list(range(0, 300, 30))
+        result = measure_queries(self.collection, ids, vectors, rows, exact_neighbors(vectors, rows, 5), 5)
+        self.assertGreaterEqual(result['recall'], 0.9)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_recall_and_pick_setting(self):
+        """Recall averages per query and the fastest setting reaching the target is picked."""
+        self.assertEqual(recall_at_k([["a", "b"], ["c", "x"]], [["a", "b"], ["c", "d"]]), 0.75)
+        results = [
+            {'ef_search': 16, 'recall': 0.90, 'p50_ms': 1.0, 'p99_ms': 2.0},
+            {'ef_search': 64, 'recall': 0.97, 'p50_ms': 2.0, 'p99_ms': 3.0},
+            {'ef_search': 256, 'recall': 0.99, 'p50_ms': 4.0, 'p99_ms': 6.0},
+        ]
+        self.assertEqual(pick_setting(results, 0.95)['ef_search'], 64)
+        self.assertEqual(pick_setting(results, 0.999)['ef_search'], 256)
+
+if __name__ == "__main__":
+    unittest.main()
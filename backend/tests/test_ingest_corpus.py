@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import chromadb
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.utils.document_extraction import extract_document
+from app.handlers.corpus_ingester import CorpusIngester, iter_corpus_files
+from scripts import ingest_corpus
+from test_document_reindex import StubEmbeddings
+
+NOTES = "# Rigging\n\nHang the truss before the fixtures.\n\n## Power\n\nRun power after the truss is up.\n"
+
+class TestIngestCorpus(unittest.TestCase):
+    """Test the resumable bulk ingestion pipeline."""
+
+    def setUp(self):
+        """Create a corpus directory, a registry and an in-memory collection."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.corpus = os.path.join(self.tmpdir.name, "corpus")
+        os.makedirs(os.path.join(self.corpus, "sub"))
+        with open(os.path.join(self.corpus, "sub", "notes.md"), "w") as outfile:
+            outfile.write(NOTES)
+        with open(os.path.join(self.corpus, "ignored.docx"), "w") as outfile:
+            outfile.write("not supported")
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        collection = chromadb.EphemeralClient().create_collection(f"test_{uuid.uuid4().hex[:8]}")
+        self.embedder = StubEmbeddings(collection)
+        self.pool = ThreadPoolExecutor(2)
+
+    def tearDown(self):
+        """Shut down the pool and remove temporary files."""
+        self.pool.shutdown()
+        self.registry._connection.close()
+        self.tmpdir.cleanup()
+
+    def ingest(self) -> CorpusIngester:
+        ingester = CorpusIngester(self.embedder, self.registry, self.pool, self.pool, batch_size=1)
+        for path in iter_corpus_files(self.corpus):
+            ingester.ingest_file(path, os.path.relpath(path, self.corpus))
+        return ingester
+
+    def test_text_files_are_chunked_by_heading(self):
+        """Markdown headings start chunks and are repeated at their top."""
+        chunks, metadatas, total_pages = extract_document(os.path.join(self.corpus, "sub", "notes.md"), "notes.md")
+        self.assertEqual(chunks, ["Rigging\n\nHang the truss before the fixtures.",
+                                  "Power\n\nRun power after the truss is up."])
+        self.assertEqual(metadatas[1], {"source": "notes.md", "section": "Power"})
+        self.assertEqual(total_pages, 0)
+        with self.assertRaises(ValueError):
+            extract_document(os.path.join(self.corpus, "ignored.docx"))
+
+    def test_completed_files_are_skipped_on_rerun(self):
+        """A checkpointed file is not extracted or embedded again."""
+        first = self.ingest()
+        self.assertEqual((first.stats["files"], first.stats["chunks"]), (1, 2))
+        second = self.ingest()
+        self.assertEqual((second.stats["skipped"], second.stats["chunks"]), (1, 0))
+        self.assertEqual(self.embedder.client.calls, 2)
+
+    def test_interrupted_file_resumes_without_re_embedding(self):
+        """Chunks stored before a crash are not embedded again."""
+        self.embedder.create_embeddings_batch(["Rigging\n\nHang the truss before the fixtures."],
+                                              metadatas=[{"source": os.path.join("sub", "notes.md")}])
+        ingester = self.ingest()
+        self.assertEqual((ingester.stats["chunks"], ingester.stats["already_stored"]), (1, 1))
+        self.assertEqual(self.embedder.collection.count(), 2)
+
+    def test_interrupted_run_closes_resources(self):
+        """An interrupted run still flushes and closes the resources it opened."""
+        resources = mock.MagicMock()
+        ingester = mock.MagicMock()
+        ingester.return_value.ingest_file.side_effect = KeyboardInterrupt
+        with mock.patch.object(ingest_corpus.AppResources, "create", return_value=resources), \
+                mock.patch.object(ingest_corpus, "CorpusIngester", ingester):
+            with self.assertRaises(KeyboardInterrupt):
+                ingest_corpus.main([self.corpus, "--extract-workers", "1", "--embed-workers", "1"])
+        resources.close.assert_called_once()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from app.handlers.ingestion_registry import IngestionRegistry
+
+class TestIngestionRegistry(unittest.TestCase):
+    """Test the file fingerprint registry used to skip repeat uploads."""
+
+    def setUp(self):
+        """Create a registry in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+
+    def tearDown(self):
+        """Remove the temporary registry."""
+        self.registry._connection.close()
+        self.tmpdir.cleanup()
+
+    def test_record_and_lookup(self):
+        """A recorded fingerprint is found in its collection only."""
+        self.assertIsNone(self.registry.get("abc", "vault_embeddings"))
+        self.registry.record("abc", "vault_embeddings", "manual.pdf", 1024, 12, 3, "embed-model")
+        record = self.registry.get("abc", "vault_embeddings")
+        self.assertEqual(record["source"], "manual.pdf")
+        self.assertEqual(record["chunks"], 12)
+        self.assertIsNone(self.registry.get("abc", "other_collection"))
+
+    def test_remove_source(self):
+        """Removing a source forgets all of its fingerprints."""
+        self.registry.record("abc", "vault_embeddings", "manual.pdf", 1024, 12, 3)
+        self.registry.record("def", "vault_embeddings", "other.pdf", 2048, 5, 1)
+        self.assertEqual(self.registry.remove_source("manual.pdf", "vault_embeddings"), 1)
+        self.assertEqual([r["source"] for r in self.registry.list_records()], ["other.pdf"])
+
+    def test_find_near_duplicate(self):
+        """Fingerprints within the distance match across sources unless their source is excluded."""
+        self.registry.add_fingerprints("vault_embeddings", "manual.pdf", [("doc_a", 0xF0F0), ("doc_b", 1 << 63)])
+        match = self.registry.find_near_duplicate("vault_embeddings", 0xF0F1, 3)
+        self.assertEqual((match["chunk_id"], match["source"], match["distance"]), ("doc_a", "manual.pdf", 1))
+        self.assertIsNone(self.registry.find_near_duplicate("vault_embeddings", 0xFFFF, 3))
+        self.assertIsNone(self.registry.find_near_duplicate("vault_embeddings", 0xF0F1, 3, exclude_source="manual.pdf"))
+        self.assertIsNone(self.registry.find_near_duplicate("other_collection", 0xF0F0, 3))
+        self.registry.remove_source("manual.pdf", "vault_embeddings")
+        self.assertIsNone(self.registry.find_near_duplicate("vault_embeddings", 0xF0F0, 3))
+
+if __name__ == "__main__":
+    unittest.main()
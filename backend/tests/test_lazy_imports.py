@@ -0,0 +1,37 @@
+import json
+import subprocess
+import sys
+import unittest
+from app.LLMs.llm_factory import LLM_PROVIDERS, LLMFactory
+from app.LLMs.ollama_chat import OllamaChat
+from app.utils.lazy_registry import LazyRegistry
+
+HEAVY_MODULES = ("google.generativeai", "openai", "groq", "fitz", "PyPDF2")
+
+class TestLazyImports(unittest.TestCase):
+    """Test that provider SDKs and PDF libraries are imported on first use only."""
+
+    def test_app_import_skips_heavy_modules(self):
+        """Importing the app loads none of the provider SDKs or PDF libraries."""
+        probe = f"import sys, app.main; print([name for name in {HEAVY_MODULES!r} if name in sys.modules])"
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", probe], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip().splitlines()[-1], "[]")
+
+    def test_registry_resolves_once(self):
+        """Entries resolve to the attribute or the module, and unknown names raise ValueError."""
+        registry = LazyRegistry("codec", {"json": "json", "dumps": "json:dumps"})
+        self.assertIs(registry.resolve("json"), json)
+        self.assertIs(registry.resolve("dumps"), json.dumps)
+        with self.assertRaisesRegex(ValueError, "Unsupported codec: yaml"):
+            registry.resolve("yaml")
+
+    def test_missing_sdk_falls_back_to_ollama(self):
+        """A hosted provider whose SDK is not installed falls back to Ollama like a failed initialization."""
+        self.addCleanup(LLM_PROVIDERS.register, "groq", "app.LLMs.groq_chat:GroqChat")
+        LLM_PROVIDERS.register("groq", "missing_groq_sdk:GroqChat")
+        self.assertIsInstance(LLMFactory.create_llm("groq"), OllamaChat)
+        with self.assertRaises(ValueError):
+            LLMFactory.create_llm("unknown")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import unittest
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import document_chat_api
+from app.models import MetadataFilter
+
+class TestMetadataFilter(unittest.TestCase):
+    """Test conversion of metadata filters into ChromaDB where clauses."""
+
+    def test_empty_filter(self):
+        """An empty filter should not restrict the search."""
+        self.assertIsNone(MetadataFilter().to_where())
+
+    def test_single_condition(self):
+        """A single field should not be wrapped in $and."""
+        self.assertEqual(MetadataFilter(source="manual.pdf").to_where(), {"source": "manual.pdf"})
+
+    def test_page_range_and_tags(self):
+        """Multiple fields should be combined with $and."""
+        where = MetadataFilter(source="manual.pdf", page_from=10, page_to=20, tags=["network"]).to_where()
+        self.assertEqual(where, {"$and": [
+            {"source": "manual.pdf"},
+            {"page": {"$gte": 10}},
+            {"page": {"$lte": 20}},
+            {"tags": {"$contains": "network"}},
+        ]})
+
+class TestStreamFilterParameter(unittest.TestCase):
+    """Test the JSON `filters` query parameter of the streaming document chat."""
+
+    def setUp(self):
+        app = FastAPI()
+        app.state.resources = SimpleNamespace()
+        app.include_router(document_chat_api.router)
+        self.client = TestClient(app)
+
+    def stream(self, filters):
+        messages = json.dumps([{"role": "user", "content": "question"}])
+        return self.client.get("/api/v1/document-chat/stream", params={"messages": messages, "filters": filters})
+
+    def test_invalid_filter_shape_is_rejected(self):
+        """Valid JSON that is not a valid filter is a client error, not a server error."""
+        for filters in ('{"page_from": "first"}', '["manual.pdf"]', '"manual.pdf"'):
+            with self.subTest(filters=filters):
+                self.assertEqual(self.stream(filters).status_code, 400)
+
+    def test_invalid_json_is_rejected(self):
+        self.assertEqual(self.stream('{"source": ').status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
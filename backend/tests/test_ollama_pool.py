@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+import ollama
+from app.LLMs.ollama_pool import OllamaHost, OllamaPool
+
+class FakeHostClient:
+    """Stand-in for ollama.Client that can be made unreachable or slow."""
+
+    def __init__(self, name):
+        self.name = name
+        self.down = False
+        self.calls = 0
+        self.release = None  # Event a request waits for, when set
+
+    def _answer(self, kind):
+        if self.down:
+            raise ConnectionError(f"{self.name} unreachable")
+        self.calls += 1
+        if self.release:
+            self.release.wait(5)
+        return {"host": self.name, "kind": kind}
+
+    def embeddings(self, model, prompt, keep_alive=None):
+        return self._answer("embeddings")
+
+    def chat(self, model, messages, stream=False):
+        if stream:
+            return iter([{"host": self.name, "part": index} for index in range(3)])
+        return self._answer("chat")
+
+    def list(self):
+        if self.down:
+            raise ConnectionError(f"{self.name} unreachable")
+        return {"models": []}
+
+class TestOllamaPool(unittest.TestCase):
+    """Test spreading requests over several Ollama hosts."""
+
+    def setUp(self):
+        """Create a pool of two fake hosts."""
+        self.clients = [FakeHostClient("a"), FakeHostClient("b")]
+        self.pool = OllamaPool([OllamaHost(f"http://{client.name}", client) for client in self.clients], max_failures=2)
+
+    def test_least_outstanding_requests(self):
+        """A host busy with a slow request does not get the next one."""
+        self.clients[0].release = threading.Event()
+        worker = threading.Thread(target=self.pool.embeddings, kwargs={"model": "m", "prompt": "slow"})
+        worker.start()
+        while self.pool.hosts[0].outstanding == 0:
+            time.sleep(0.01)
+        self.assertEqual([self.pool.embeddings(model="m", prompt="x")["host"] for _ in range(3)], ["b"] * 3)
+        self.clients[0].release.set()
+        worker.join()
+        stats = self.pool.stats()
+        self.assertEqual([host["requests"] for host in stats], [1, 3])
+        self.assertGreaterEqual(stats[0]["latency_ms"]["p95"], stats[1]["latency_ms"]["p50"])
+
+    def test_unhealthy_host_is_ejected_and_reprobed(self):
+        """Failed connections are retried elsewhere, eject the host, and a good probe brings it back."""
+        self.clients[0].down = True
+        for _ in range(4):
+            self.assertEqual(self.pool.chat(model="m", messages=[])["host"], "b")
+        self.assertFalse(self.pool.hosts[0].healthy)
+        self.assertEqual(self.pool.hosts[0].errors, 2)  # Not tried again once ejected
+
+        self.clients[0].down = False
+        self.pool.eject_seconds = 0.0
+        self.pool.hosts[0].ejected_until = time.monotonic()
+        self.pool.chat(model="m", messages=[])  # Starts the probe
+        deadline = time.monotonic() + 5
+        while not self.pool.hosts[0].healthy and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self.pool.hosts[0].healthy)
+
+    def test_request_errors_do_not_eject(self):
+        """An error answered by the host (e.g. unknown model) is raised without retrying or ejecting."""
+        def missing_model(**kwargs):
+            raise ollama.ResponseError("model not found", 404)
+
+        self.clients[0].embeddings = missing_model
+        self.clients[1].embeddings = missing_model
+        for _ in range(3):
+            with self.assertRaises(ollama.ResponseError):
+                self.pool.embeddings(model="missing", prompt="x")
+        self.assertTrue(all(host.healthy for host in self.pool.hosts))
+
+    def test_all_hosts_down_raises(self):
+        """With every host unreachable the connection error reaches the caller."""
+        for client in self.clients:
+            client.down = True
+        with self.assertRaises(ConnectionError):
+            self.pool.embeddings(model="m", prompt="x")
+
+    def test_stream_holds_its_slot(self):
+        """A streaming request counts as outstanding until the stream is closed."""
+        stream = self.pool.chat(model="m", messages=[], stream=True)
+        first = next(stream)
+        host = next(host for host in self.pool.hosts if host.url.endswith(first["host"]))
+        self.assertEqual(host.outstanding, 1)
+        stream.close()
+        self.assertEqual(host.outstanding, 0)
+
+    def test_stream_latency_is_time_to_first_chunk(self):
+        """A long generation does not count as a slow host."""
+        def slow_generation(model, messages, stream=False):
+            for index in range(3):
+                if index:
+                    time.sleep(0.1)
+                yield {"host": "a", "part": index}
+
+        self.pool.hosts = self.pool.hosts[:1]
+        self.clients[0].chat = slow_generation
+        self.assertEqual(len(list(self.pool.chat(model="m", messages=[], stream=True))), 3)
+        self.assertLess(self.pool.stats()[0]["latency_ms"]["p50"], 100)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.LLMs.base_llm import BaseLLM
+from app.LLMs.llm_factory import LLMFactory
+from app.LLMs.provider_router import CircuitBreaker, ProviderRouter, RoutedLLM
+
+def fake_provider(name, delay=0.0, failing=False):
+    """Chat provider class answering after `delay`, or failing while `failing` is set."""
+    class FakeChat(BaseLLM):
+        settings = {'delay': delay, 'failing': failing, 'calls': 0}
+
+        def __init__(self):
+            self.model = f"{name}-model"
+
+        def generate_response(self, prompt, system_prompt=None, model=None, max_tokens=None):
+            FakeChat.settings['calls'] += 1
+            time.sleep(FakeChat.settings['delay'])
+            if FakeChat.settings['failing']:
+                raise ConnectionError(f"{name} unavailable")
+            return name
+
+        def generate_streaming_response(self, prompt, system_prompt=None, model=None, max_tokens=None):
+            yield self.generate_response(prompt)
+            yield " more"
+
+        def generate_autocomplete(self, partial_prompt, max_tokens=50, model=None):
+            return self.generate_response(partial_prompt)
+
+    return FakeChat
+
+class TestProviderRouter(unittest.TestCase):
+    """Test routing provider=auto requests to the fastest healthy provider."""
+
+    def setUp(self):
+        """Route over a slow and a fast provider."""
+        self.providers = {"slow": fake_provider("slow", delay=0.03), "fast": fake_provider("fast")}
+        self.router = ProviderRouter(["slow", "fast"], self.providers.__getitem__, open_seconds=0.05)
+
+    def ask(self):
+        llm = RoutedLLM(self.router)
+        return llm.generate_response("question"), llm
+
+    def test_routes_to_fastest_after_measuring_each(self):
+        """Each provider is measured once, then requests go to the faster one."""
+        answers = [self.ask()[0] for _ in range(5)]
+        self.assertEqual(answers[:2], ["slow", "fast"])
+        self.assertEqual(answers[2:], ["fast"] * 3)
+        self.assertEqual(self.router.ranked(), ["fast", "slow"])
+        stats = {entry['provider']: entry for entry in self.router.stats()}
+        self.assertEqual((stats['fast']['model'], stats['fast']['requests'], stats['slow']['requests']), ("fast-model", 4, 1))
+
+    def test_failing_provider_opens_circuit_and_recovers(self):
+        """Failures fall through to the next provider, open the circuit, and a successful trial closes it."""
+        self.providers["fast"].settings['failing'] = True
+        self.router.record("slow", 0.03, ok=True)
+        self.router.handler("fast")
+        self.router.record("fast", 0.001, ok=False)
+        self.assertEqual(self.router.ranked(), ["slow", "fast"])  # Only failing: tried last
+        for _ in range(2):
+            self.router.record("fast", 0.001, ok=False)
+        self.assertEqual(self.router.ranked(), ["slow"])
+        answer, llm = self.ask()
+        self.assertEqual((answer, llm.provider, llm.model), ("slow", "slow", "slow-model"))
+        self.assertEqual(self.providers["fast"].settings['calls'], 0)
+
+        self.providers["fast"].settings['failing'] = False
+        self.providers["slow"].settings['failing'] = True
+        time.sleep(0.06)
+        self.assertEqual(self.ask()[0], "fast")  # Half-open trial after the slow provider fails
+        self.assertEqual({entry['provider']: entry['circuit'] for entry in self.router.stats()}["fast"], "closed")
+
+    def test_every_provider_failing_raises(self):
+        """The caller gets an error naming each provider's failure."""
+        for provider in self.providers.values():
+            provider.settings['failing'] = True
+        with self.assertRaisesRegex(RuntimeError, "slow: slow unavailable; fast: fast unavailable"):
+            self.ask()
+
+    def test_stream_falls_back_before_first_chunk(self):
+        """A provider failing before its first chunk is replaced; the chunks come from one provider."""
+        self.providers["slow"].settings['failing'] = True
+        llm = RoutedLLM(self.router)
+        self.assertEqual(llm.provider, "slow")  # Expected before the stream starts
+        self.assertEqual("".join(llm.generate_streaming_response("question")), "fast more")
+        self.assertEqual(llm.provider, "fast")
+
+    def test_only_the_tried_provider_is_claimed(self):
+        """A long trial on one half-open provider leaves the others free to be probed."""
+        for provider in ("slow", "fast"):
+            for _ in range(3):
+                self.router.record(provider, 0.001, ok=False)
+        time.sleep(0.06)
+        self.providers["slow"].settings['delay'] = 0.3
+        trial = threading.Thread(target=self.ask)
+        trial.start()
+        while self.providers["slow"].settings['calls'] == 0:
+            time.sleep(0.01)
+        self.assertEqual(self.ask()[0], "fast")
+        trial.join()
+        self.assertEqual({entry['provider']: entry['circuit'] for entry in self.router.stats()},
+                         {"slow": "closed", "fast": "closed"})
+
+    def test_stats_keep_one_key_per_provider(self):
+        """Outcomes recorded before the handler exists stay with the provider's later ones."""
+        self.router.record("fast", 0.001, ok=True)
+        self.router.record("slow", 1.0, ok=True)
+        self.assertEqual(self.ask()[0], "fast")
+        stats = {entry['provider']: entry for entry in self.router.stats()}
+        self.assertEqual(len(self.router.stats()), 2)
+        self.assertEqual((stats['fast']['model'], stats['fast']['requests']), ("fast-model", 2))
+
+    def test_half_open_allows_one_trial(self):
+        """Only one request at a time probes a half-open circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.0)
+        breaker.record(False, 1.0, 1)
+        self.assertEqual((breaker.allow(), breaker.allow()), (True, False))
+        breaker.release()
+        self.assertTrue(breaker.allow())
+        breaker.record(True, 0.0, 2)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_auto_provider(self):
+        """provider=auto returns a routed handler."""
+        self.assertIsInstance(LLMFactory.create_llm("auto"), RoutedLLM)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+import chromadb
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import ollama_embedding_api
+from app.dependencies import AppResources
+from app.handlers.db_handler import DatabaseHandler, model_collection_name
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.handlers.reembedder import MAX_CATCH_UP_PASSES, ReembedJob
+from test_document_reindex import StubEmbeddings
+
+def stub_embedder(collection, model: str) -> StubEmbeddings:
+    embedder = StubEmbeddings(collection)
+    embedder.model = model
+    return embedder
+
+class TestModelCollections(unittest.TestCase):
+    """Test that each embedding model gets its own collection."""
+
+    def setUp(self):
+        """Open a database in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_handler = DatabaseHandler(self.tmpdir.name)
+
+    def tearDown(self):
+        """Stop the write buffers and remove the database."""
+        self.db_handler.close()
+        self.tmpdir.cleanup()
+
+    def test_first_model_claims_empty_collection(self):
+        """The original collection goes to the first model and later models get their own."""
+        self.assertIs(self.db_handler.collection_for_model("model-a"), self.db_handler.collection)
+        other = self.db_handler.collection_for_model("model-b:latest")
+        self.assertEqual(other.name, "vault_embeddings__model-b_latest")
+        self.assertIs(self.db_handler.collection_for_model("model-b:latest"), other)
+        models = {entry['model'] for entry in self.db_handler.list_model_collections()}
+        self.assertEqual(models, {"model-a", "model-b:latest"})
+
+    def test_original_collection_keeps_its_model(self):
+        """An unclaimed collection belongs to the model its chunks were embedded with."""
+        self.db_handler.collection.add(ids=["doc_1"], embeddings=[[0.1, 0.2]], documents=["alpha"],
+                                       metadatas=[{"embedding_model": "old-model"}])
+        self.assertEqual(self.db_handler.collection_for_model("new-model").name, model_collection_name("new-model"))
+        self.assertIs(self.db_handler.collection_for_model("old-model"), self.db_handler.collection)
+
+class TestReembedJob(unittest.TestCase):
+    """Test building a new model's collection from the current one."""
+
+    def setUp(self):
+        """Create source and target collections and a registry."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        client = chromadb.EphemeralClient()
+        self.source = stub_embedder(client.create_collection(f"source_{uuid.uuid4().hex[:8]}"), "old-model")
+        self.target = stub_embedder(client.create_collection(f"target_{uuid.uuid4().hex[:8]}"), "new-model")
+        self.source.create_embeddings_batch(["alpha", "beta", "gamma"], metadatas=[{"source": "a.txt"}] * 3)
+        self.registry.record("abc", self.source.collection.name, "a.txt", 10, 3, 1, "old-model")
+
+    def tearDown(self):
+        """Remove the temporary registry."""
+        self.registry.close()
+        self.tmpdir.cleanup()
+
+    def test_copies_chunks_under_same_ids(self):
+        """Every chunk is embedded with the new model and keeps its ID, source and registry record."""
+        job = ReembedJob(self.source, self.target, self.registry, batch_size=2)
+        job.run()
+        self.assertEqual(job.status['state'], 'completed')
+        self.assertEqual(job.status['embedded'], 3)
+        source = self.source.collection.get(include=['metadatas'])
+        target = self.target.collection.get(ids=source['ids'], include=['metadatas'])
+        self.assertEqual(sorted(target['ids']), sorted(source['ids']))
+        self.assertEqual({metadata['embedding_model'] for metadata in target['metadatas']}, {"new-model"})
+        self.assertEqual({metadata['source'] for metadata in target['metadatas']}, {"a.txt"})
+        record = self.registry.get("abc", self.target.collection.name)
+        self.assertEqual(record['embedding_model'], "new-model")
+
+    def test_rerun_resumes_and_removes_deleted(self):
+        """A second run embeds only new chunks and deletes chunks removed from the source."""
+        ReembedJob(self.source, self.target, self.registry).run()
+        calls = self.target.client.calls
+        self.source.replace_document("a.txt", ["alpha", "delta"])
+        job = ReembedJob(self.source, self.target, self.registry)
+        job.run()
+        self.assertEqual(self.target.client.calls - calls, 1)
+        self.assertEqual((job.status['embedded'], job.status['removed']), (1, 2))
+        self.assertEqual(sorted(self.target.collection.get(include=['documents'])['documents']), ["alpha", "delta"])
+
+    def test_not_activated_while_writes_continue(self):
+        """A job whose every pass still finds new chunks ends not caught up and never activates."""
+        collection = self.source.collection
+
+        class WrittenDuringPasses:
+            """The source collection, gaining a chunk whenever a pass starts reading it."""
+
+            def __getattr__(self, name):
+                return getattr(collection, name)
+
+            def get(self, **kwargs):
+                if kwargs.get('offset') == 0 and 'limit' in kwargs:
+                    chunk = f"chunk {uuid.uuid4().hex}"
+                    collection.add(ids=[chunk], documents=[chunk], embeddings=[[0.5] * 8], metadatas=[{"source": "b.txt"}])
+                return collection.get(**kwargs)
+
+        self.source.collection = WrittenDuringPasses()
+        activated = []
+        job = ReembedJob(self.source, self.target, self.registry, on_complete=activated.append)
+        job.run()
+        self.assertEqual(job.status['state'], 'not_caught_up')
+        self.assertEqual(job.status['passes'], MAX_CATCH_UP_PASSES)
+        self.assertEqual(activated, [])
+
+        self.source.collection = collection
+        job = ReembedJob(self.source, self.target, self.registry, on_complete=activated.append)
+        job.run()
+        self.assertEqual(job.status['state'], 'completed')
+        self.assertEqual(activated, [job])
+        self.assertEqual(self.target.collection.count(), collection.count())
+
+class TestModelIsolation(unittest.TestCase):
+    """Test that selecting a model per request does not affect other requests."""
+
+    def setUp(self):
+        """Mount the embedding router on resources whose embedders are stubs."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_handler = DatabaseHandler(os.path.join(self.tmpdir.name, "db"))
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "registry.db"))
+        default = stub_embedder(self.db_handler.collection_for_model("default-model"), "default-model")
+        self.resources = AppResources(self.db_handler, default, self.registry)
+        patcher = mock.patch(
+            "app.dependencies.EmbeddingFactory.create_embedder",
+            side_effect=lambda provider, collection, model: stub_embedder(collection, model)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+        app.state.resources = self.resources
+        app.include_router(ollama_embedding_api.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """Stop the write buffers and remove the temporary files."""
+        self.resources.close()
+        self.tmpdir.cleanup()
+
+    def test_model_override_uses_its_own_collection(self):
+        """Embedding with another model leaves the default embedder and collection untouched."""
+        response = self.client.post("/api/v1/ollama-embeddings/embed", json={"contents": ["alpha"], "model": "other-model"})
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.resources.embedder.model, "default-model")
+        self.assertEqual(self.resources.embedder.collection.count(), 0)
+        self.assertEqual(self.resources.embedder_for("other-model").collection.count(), 1)
+
+    def test_reembed_activates_new_model(self):
+        """A completed re-embed makes the new model the default."""
+        self.client.post("/api/v1/ollama-embeddings/embed", json={"contents": ["alpha", "beta"]})
+        response = self.client.post("/api/v1/ollama-embeddings/reembed", json={"model": "next-model"})
+        self.assertEqual(response.status_code, 200)
+        self.resources._reembed_thread.join()
+        status = self.client.get("/api/v1/ollama-embeddings/reembed").json()
+        self.assertEqual((status['state'], status['embedded']), ('completed', 2))
+        self.assertEqual(self.resources.default_model, "next-model")
+        self.assertEqual(self.resources.embedder.collection.count(), 2)
+        response = self.client.post("/api/v1/ollama-embeddings/reembed", json={"model": "next-model"})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from app.utils.simhash import FingerprintIndex, band_groups, hamming_distance, simhash
+
+SAFETY_NOTE = ("Warning: disconnect mains power before opening the fixture housing. "
+               "Only qualified personnel may service this unit. Allow the lamp to cool "
+               "for at least 15 minutes before touching it. Page 12")
+
+class TestSimHash(unittest.TestCase):
+    """Test SimHash fingerprints and the band index used for near-duplicate detection."""
+
+    def test_repeated_boilerplate_is_near(self):
+        """Boilerplate differing only in a page number fingerprints identically; unrelated text does not."""
+        other_page = SAFETY_NOTE.replace("Page 12", "Page 47")
+        unrelated = "The DMX start address is set with the four buttons on the rear panel of the fixture."
+        self.assertEqual(simhash(SAFETY_NOTE), simhash(other_page))
+        self.assertGreater(hamming_distance(simhash(SAFETY_NOTE), simhash(unrelated)), 10)
+
+    def test_band_groups_partition_bands(self):
+        """Every distance splits the bands into distance + 1 disjoint groups."""
+        for distance in range(8):
+            groups = band_groups(distance)
+            self.assertEqual(len(groups), distance + 1)
+            self.assertEqual(sorted(band for group in groups for band in group), list(range(8)))
+
+    def test_index_finds_every_fingerprint_within_distance(self):
+        """The band lookup finds all fingerprints within the distance and none beyond it."""
+        base = simhash(SAFETY_NOTE)
+        index = FingerprintIndex(3)
+        index.add(base)
+        for bits in ([0], [5, 20], [1, 30, 63]):
+            flipped = base
+            for bit in bits:
+                flipped ^= 1 << bit
+            self.assertEqual(index.find(flipped), base)
+        self.assertIsNone(index.find(base ^ 0b1111))
+
+if __name__ == '__main__':
+    unittest.main()
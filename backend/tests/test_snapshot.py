@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from app.handlers.db_handler import DatabaseHandler
+from app.handlers.ingestion_registry import IngestionRegistry
+from app.handlers.snapshot import EMBEDDINGS_FILE, RECORDS_FILE, export_snapshot, import_snapshot, read_manifest
+
+class TestSnapshot(unittest.TestCase):
+    """Test exporting a collection and loading it into another database."""
+
+    def setUp(self):
+        """Fill a ChromaDB collection and a registry in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = DatabaseHandler(os.path.join(self.tmpdir.name, "source"), backend="chroma")
+        self.registry = IngestionRegistry(os.path.join(self.tmpdir.name, "source_registry.db"))
+        self.collection = self.source.collection_for_model("model-a")
+        self.vectors = np.random.default_rng(5).standard_normal((30, 8)).astype(np.float32)
+        self.collection.add(
+            ids=[f"doc_{index}" for index in range(30)],
+            embeddings=self.vectors,
+            documents=[f"chunk {index}" for index in range(30)],
+            metadatas=[{"source": "a.txt" if index < 20 else "b.txt", "chunk_index": index} for index in range(30)],
+        )
+        self.registry.record("abc", self.collection.name, "a.txt", 100, 20, 2, "model-a")
+        self.registry.add_fingerprints(self.collection.name, "a.txt", [("doc_0", 0x1234)])
+        self.snapshot_path = os.path.join(self.tmpdir.name, "snapshot")
+
+    def tearDown(self):
+        """Close the handlers and remove the files."""
+        self.source.close()
+        self.registry.close()
+        self.tmpdir.cleanup()
+
+    def test_round_trip_into_numpy_store(self):
+        """An imported replica answers queries like the original and keeps its registry records."""
+        manifest = export_snapshot(self.collection, self.snapshot_path, registry=self.registry, batch_size=7)
+        self.assertEqual((manifest['count'], manifest['dimension'], manifest['embedding_model']), (30, 8, "model-a"))
+        self.assertEqual(np.load(os.path.join(self.snapshot_path, EMBEDDINGS_FILE), mmap_mode='r').shape, (30, 8))
+
+        replica = DatabaseHandler(os.path.join(self.tmpdir.name, "replica"), backend="numpy")
+        replica_registry = IngestionRegistry(os.path.join(self.tmpdir.name, "replica_registry.db"))
+        try:
+            collection = replica.collection_for_model("model-a")
+            import_snapshot(collection, self.snapshot_path, registry=replica_registry, batch_size=8)
+            import_snapshot(collection, self.snapshot_path, batch_size=8)  # Idempotent
+            self.assertEqual(collection.count(), 30)
+            query = self.vectors[3].tolist()
+            expected = self.collection.query(query_embeddings=[query], n_results=4, where={"source": "a.txt"})
+            actual = collection.query(query_embeddings=[query], n_results=4, where={"source": "a.txt"})
+            self.assertEqual(actual['ids'], expected['ids'])
+            self.assertEqual(actual['metadatas'], expected['metadatas'])
+            np.testing.assert_allclose(actual['distances'], expected['distances'], atol=1e-4)
+            self.assertEqual(replica_registry.get("abc", collection.name)['chunks'], 20)
+            self.assertEqual(replica_registry.dump_collection(collection.name)['fingerprints'],
+                             [["a.txt", "doc_0", "0000000000001234"]])
+        finally:
+            replica.close()
+            replica_registry.close()
+
+    def test_rejects_tampered_or_mismatched_snapshots(self):
+        """Checksums and the embedding model are verified before anything is loaded."""
+        export_snapshot(self.collection, self.snapshot_path)
+        with self.assertRaises(ValueError):
+            export_snapshot(self.collection, self.snapshot_path)  # Directory not empty
+        other = self.source.collection_for_model("model-b")
+        with self.assertRaises(ValueError):
+            import_snapshot(other, self.snapshot_path)
+        with open(os.path.join(self.snapshot_path, RECORDS_FILE), 'a', encoding='utf-8') as outfile:
+            outfile.write(json.dumps({"id": "extra", "document": None, "metadata": None}) + "\n")
+        with self.assertRaises(ValueError):
+            read_manifest(self.snapshot_path)
+        self.assertEqual(other.count(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
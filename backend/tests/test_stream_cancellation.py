@@ -0,0 +1,226 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from fastapi import FastAPI
+from app.LLMs.gemini_embedding import GeminiEmbeddings
+from app.api.v1.endpoints import document_chat_api
+from app.handlers.context_handler import ContextHandler
+from app.utils.streaming import GenerationCancelled, iterate_in_thread, stream_stats
+
+class EndlessChat:
+    """Chat provider streaming tokens until closed, recording whether it was closed early."""
+
+    def __init__(self, interval=0.02, tokens=200):
+        self.model = "endless-model"
+        self.provider = "endless"
+        self.interval = interval
+        self.tokens = tokens
+        self.produced = 0
+        self.closed_early = threading.Event()
+
+    def generate_streaming_response(self, prompt, system_prompt=None, model=None, max_tokens=None):
+        finished = False
+        try:
+            for _ in range(self.tokens):
+                time.sleep(self.interval)
+                self.produced += 1
+                yield f"token{self.produced} "
+            finished = True
+        finally:
+            if not finished:
+                self.closed_early.set()
+
+class SlowSearcher:
+    """Searcher taking `delay` seconds per query and recording the queries searched."""
+
+    def __init__(self, delay=0.0, on_search=None):
+        self.delay = delay
+        self.on_search = on_search
+        self.searched = []
+
+    def get_relevant_context(self, queries, top_k=2, where=None):
+        contexts = []
+        for query in queries:
+            time.sleep(self.delay)
+            self.searched.append(query)
+            if self.on_search:
+                self.on_search()
+            contexts.extend([f"passage about {query}", "shared passage"])
+        seen = set()
+        return [context for context in contexts if not (context in seen or seen.add(context))]
+
+def collect(make_iterator, cancelled, stop_after=None):
+    """Drain iterate_in_thread, closing it after `stop_after` items."""
+    async def run():
+        items = []
+        stream = iterate_in_thread(make_iterator, cancelled)
+        async for item in stream:
+            items.append(item)
+            if stop_after is not None and len(items) == stop_after:
+                await stream.aclose()
+                break
+        return items
+    return asyncio.run(run())
+
+class TestIterateInThread(unittest.TestCase):
+    """Test iterating a blocking generator off the event loop."""
+
+    def test_yields_every_item(self):
+        """A finished iteration yields everything and leaves the event unset."""
+        cancelled = threading.Event()
+        self.assertEqual(collect(lambda: iter(["a", "b", "c"]), cancelled), ["a", "b", "c"])
+        self.assertFalse(cancelled.is_set())
+
+    def test_closing_stops_upstream(self):
+        """Closing the async iterator closes the blocking generator at its next item."""
+        chat = EndlessChat()
+        cancelled = threading.Event()
+        self.assertEqual(len(collect(lambda: chat.generate_streaming_response("q"), cancelled, stop_after=3)), 3)
+        self.assertTrue(cancelled.is_set())
+        self.assertTrue(chat.closed_early.wait(1))
+        self.assertLess(chat.produced, 10)
+
+    def test_event_stops_upstream(self):
+        """Setting the event ends the iteration and closes the blocking generator."""
+        chat = EndlessChat()
+        cancelled = threading.Event()
+        threading.Timer(0.1, cancelled.set).start()
+        items = collect(lambda: chat.generate_streaming_response("q"), cancelled)
+        self.assertTrue(chat.closed_early.wait(1))
+        self.assertLess(len(items), chat.tokens)
+
+    def test_runs_on_the_stream_executor(self):
+        """Streams do not take threads from the default executor used by asyncio.to_thread."""
+        def thread_names():
+            yield threading.current_thread().name
+        self.assertTrue(collect(thread_names, threading.Event())[0].startswith("stream"))
+
+    def test_errors_propagate(self):
+        """An error of the blocking generator is raised to the consumer."""
+        def failing():
+            yield "a"
+            raise ConnectionError("host down")
+        with self.assertRaises(ConnectionError):
+            collect(failing, threading.Event())
+
+class TestCancellableRetrieval(unittest.TestCase):
+    """Test abandoning retrieval between searches."""
+
+    QUERY = "How do I store a cue in a sequence with the store command?"
+
+    def test_same_context_as_one_search(self):
+        """Searching query by query finds the same contexts as searching all at once."""
+        handler = ContextHandler(SlowSearcher())
+        queries = handler.get_multiple_queries(self.QUERY)
+        self.assertEqual(
+            handler.get_relevant_context(queries, 2, cancelled=threading.Event()),
+            SlowSearcher().get_relevant_context(queries, 2)
+        )
+
+    def test_gemini_keeps_first_seen_order(self):
+        """Gemini's contexts are deduplicated in order, so searching query by query gives the same list."""
+        embedder = GeminiEmbeddings.__new__(GeminiEmbeddings)
+        embedder.search = lambda query, top_k=2, where=None: SlowSearcher().get_relevant_context([query])
+        queries = ContextHandler(SlowSearcher()).get_multiple_queries(self.QUERY)
+        expected = SlowSearcher().get_relevant_context(queries)
+        self.assertEqual(embedder.get_relevant_context(queries), expected)
+        self.assertEqual(ContextHandler(embedder).get_relevant_context(queries, 2, cancelled=threading.Event()), expected)
+
+    def test_cancel_between_searches(self):
+        """No search starts after the event is set."""
+        cancelled = threading.Event()
+        searcher = SlowSearcher(on_search=cancelled.set)
+        handler = ContextHandler(searcher)
+        self.assertGreater(len(handler.get_multiple_queries(self.QUERY)), 1)
+        with self.assertRaises(GenerationCancelled):
+            handler.get_document_context(self.QUERY, cancelled=cancelled)
+        self.assertEqual(len(searcher.searched), 1)
+
+class TestStreamDisconnect(unittest.TestCase):
+    """Test the document chat stream when its client disconnects."""
+
+    def setUp(self):
+        """Mount the document chat router on a stub searcher."""
+        self.searcher = SlowSearcher()
+        self.app = FastAPI()
+        self.app.state.resources = SimpleNamespace(searcher_for=lambda collections=None: self.searcher)
+        self.app.include_router(document_chat_api.router)
+        self.chat = EndlessChat()
+        patcher = mock.patch.object(document_chat_api.LLMFactory, "create_llm", return_value=self.chat)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, disconnect_after_tokens):
+        """POST a stream request over raw ASGI, disconnecting after some tokens; return the events sent."""
+        body = json.dumps({"messages": [{"role": "user", "content": TestCancellableRetrieval.QUERY}]}).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/api/v1/document-chat/stream", "raw_path": b"/api/v1/document-chat/stream",
+            "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        }
+        events = []
+
+        async def run():
+            disconnected = asyncio.Event()
+            requested = False
+            if disconnect_after_tokens == 0:
+                disconnected.set()
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.body" and message.get("body"):
+                    events.append(message["body"].decode())
+                    if sum('"token"' in event for event in events) >= disconnect_after_tokens:
+                        disconnected.set()
+
+            await asyncio.wait_for(self.app(scope, receive, send), timeout=5)
+        asyncio.run(run())
+        return events
+
+    def test_disconnect_cancels_generation(self):
+        """The upstream generation is closed soon after the client leaves, and counted as cancelled."""
+        before = stream_stats.summary()
+        events = self.stream(disconnect_after_tokens=3)
+        self.assertTrue(self.chat.closed_early.wait(1))
+        self.assertLess(self.chat.produced, 20)
+        self.assertFalse(any('"done"' in event for event in events))
+        after = stream_stats.summary()
+        self.assertEqual(after['cancelled'] - before['cancelled'], 1)
+        self.assertEqual(after['cancelled_during']['generation'] - before['cancelled_during']['generation'], 1)
+        self.assertEqual(after['completed'], before['completed'])
+
+    def test_disconnect_cancels_retrieval(self):
+        """A client leaving during retrieval stops the remaining searches and generation never starts."""
+        self.searcher.delay = 0.2
+        before = stream_stats.summary()
+        self.stream(disconnect_after_tokens=0)
+        time.sleep(0.5)  # Let the retrieval thread reach its next check
+        queries = ContextHandler(self.searcher).get_multiple_queries(TestCancellableRetrieval.QUERY)
+        self.assertLess(len(self.searcher.searched), len(queries))
+        self.assertEqual(self.chat.produced, 0)
+        after = stream_stats.summary()
+        self.assertEqual(after['cancelled_during']['retrieval'] - before['cancelled_during']['retrieval'], 1)
+
+    def test_completed_stream(self):
+        """A stream read to the end is counted as completed."""
+        self.chat.tokens = 3
+        before = stream_stats.summary()
+        events = self.stream(disconnect_after_tokens=100)
+        self.assertTrue(any('"done"' in event for event in events))
+        self.assertFalse(self.chat.closed_early.is_set())
+        self.assertEqual(stream_stats.summary()['completed'] - before['completed'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from app.utils.text_chunker import chunk_blocks, chunk_statistics, estimate_tokens, is_heading_block, split_sentences
+
+class TestStructuredChunker(unittest.TestCase):
+    """Test the structure-aware, token-sized chunker."""
+
+    def test_chunks_respect_token_budget(self):
+        """No chunk exceeds the token budget, even for oversized blocks."""
+        blocks = [{'text': 'Heading', 'page': 1, 'is_heading': True},
+                  {'text': 'A sentence with several words. ' * 60, 'page': 1}]
+        for chunk in chunk_blocks(blocks, max_tokens=50):
+            self.assertLessEqual(estimate_tokens(chunk['text']), 50)
+
+    def test_overlap_respects_token_budget(self):
+        """Carried overlap is trimmed so heading, overlap and the next piece stay within the budget."""
+        sentences = ' '.join(f"Sentence {i} has a {'long ' * (i % 4 * 4)}tail." for i in range(40))
+        blocks = [{'text': 'Store Cues', 'page': 1, 'is_heading': True}, {'text': sentences, 'page': 1}]
+        chunks = chunk_blocks(blocks, max_tokens=30, overlap_tokens=15)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk['text']), 30)
+            self.assertEqual(chunk['tokens'], estimate_tokens(chunk['text']))
+        self.assertTrue(any(chunk['text'].split('\n\n')[1].split('.')[0] in previous['text']
+                            for previous, chunk in zip(chunks, chunks[1:])))
+
+    def test_heading_starts_new_chunk_and_prefixes_it(self):
+        """Each section's chunks start with its heading and never mix sections."""
+        blocks = [{'text': 'Patching', 'page': 1, 'is_heading': True},
+                  {'text': 'Patch fixtures first.', 'page': 1},
+                  {'text': 'Networking', 'page': 2, 'is_heading': True},
+                  {'text': 'Connect the switch.', 'page': 2}]
+        chunks = chunk_blocks(blocks, max_tokens=200)
+        self.assertEqual([chunk['text'] for chunk in chunks],
+                         ['Patching\n\nPatch fixtures first.', 'Networking\n\nConnect the switch.'])
+        self.assertEqual([chunk['page'] for chunk in chunks], [1, 2])
+
+    def test_blocks_are_kept_whole(self):
+        """A block that fits the budget moves to the next chunk instead of being split."""
+        blocks = [{'text': 'one two three four five six', 'page': 1},
+                  {'text': 'seven eight nine ten eleven', 'page': 1}]
+        chunks = chunk_blocks(blocks, max_tokens=8)
+        self.assertEqual([chunk['text'] for chunk in chunks],
+                         ['one two three four five six', 'seven eight nine ten eleven'])
+
+    def test_split_sentences_keeps_list_items(self):
+        """List items on separate lines stay separate sentences."""
+        self.assertEqual(split_sentences("Do this. Then that.\n1. Step one\n2. Step two"),
+                         ["Do this.", "Then that.", "1. Step one", "2. Step two"])
+
+    def test_heading_detection(self):
+        """Large or bold short blocks are headings; list items and sentences are not."""
+        self.assertTrue(is_heading_block("Network Setup", 16, 10, 0.0))
+        self.assertTrue(is_heading_block("Network Setup", 10, 10, 1.0))
+        self.assertFalse(is_heading_block("1. Press Setup", 16, 10, 1.0))
+        self.assertFalse(is_heading_block("Press the key.", 10, 10, 1.0))
+
+    def test_statistics(self):
+        """Statistics summarize chunk sizes."""
+        stats = chunk_statistics([10, 20, 30])
+        self.assertEqual(stats['chunks'], 3)
+        self.assertEqual(stats['total_tokens'], 60)
+        self.assertEqual(stats['max_tokens'], 30)
+
+if __name__ == "__main__":
+    unittest.main()
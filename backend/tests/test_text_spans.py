@@ -0,0 +1,57 @@
+import unittest
+from hypothesis import given, settings, strategies as st
+from app.utils.text_chunker import iter_text_chunks, iter_text_spans
+
+WORDS = st.text(alphabet="abc xyz\n", max_size=2000)
+
+class TestStreamingChunker(unittest.TestCase):
+    """Property tests of the linear-time character chunker."""
+
+    @settings(max_examples=300, deadline=None)
+    @given(text=WORDS, chunk_size=st.integers(1, 300), overlap=st.integers(0, 400))
+    def test_windows_make_progress_and_cover_text(self, text, chunk_size, overlap):
+        """Starts strictly increase, windows fit the size, leave no gap and reach the end."""
+        spans = list(iter_text_spans(text, chunk_size, overlap))
+        if not text:
+            self.assertEqual(spans, [])
+            return
+        self.assertEqual(spans[0][0], 0)
+        self.assertEqual(spans[-1][1], len(text))
+        for start, end in spans:
+            self.assertLess(start, end)
+            self.assertLessEqual(end - start, chunk_size)
+        for (start, end), (next_start, _) in zip(spans, spans[1:]):
+            self.assertLess(start, next_start)
+            self.assertLessEqual(next_start, end)
+
+    @settings(max_examples=300, deadline=None)
+    @given(text=WORDS, chunk_size=st.integers(1, 300), overlap=st.integers(0, 400))
+    def test_emitted_text_is_linear_in_input(self, text, chunk_size, overlap):
+        """The chunker never emits more than about four times the input."""
+        emitted = sum(end - start for start, end in iter_text_spans(text, chunk_size, overlap))
+        self.assertLessEqual(emitted, 4 * len(text) + chunk_size)
+
+    @settings(max_examples=100, deadline=None)
+    @given(text=WORDS, chunk_size=st.integers(10, 300))
+    def test_no_overlap_partitions_text(self, text, chunk_size):
+        """Without overlap the windows tile the text exactly."""
+        spans = list(iter_text_spans(text, chunk_size, 0))
+        self.assertEqual(''.join(text[start:end] for start, end in spans), text)
+
+    def test_pathological_inputs_terminate(self):
+        """One huge token or an overlap as large as the window still advances."""
+        self.assertEqual(len(list(iter_text_spans('x' * 10000, 100, 100))), 199)
+        self.assertEqual(list(iter_text_spans('a ' * 3, 1, 5)), [(i, i + 1) for i in range(6)])
+
+    def test_chunks_are_lazy(self):
+        """Chunks are produced on demand."""
+        chunks = iter_text_chunks('word ' * 1000, 50, 10)
+        self.assertEqual(next(chunks), ('word ' * 10).strip())
+
+    def test_rejects_empty_window(self):
+        """A non-positive chunk size is an error rather than an endless loop."""
+        with self.assertRaises(ValueError):
+            next(iter_text_spans('text', 0))
+
+if __name__ == '__main__':
+    unittest.main()
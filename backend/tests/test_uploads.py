@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.utils.uploads import (
+    InvalidArchiveError, UploadSizeLimitMiddleware, UploadTooLargeError, extract_archive, remove_spool_file,
+    spool_upload
+)
+
+class TestSpoolUpload(unittest.TestCase):
+    """Test streaming uploads to a spool file."""
+
+    def test_spool_matches_content(self):
+        """The spool file holds the upload and its hash and size are reported."""
+        payload = os.urandom(3 * 1024 * 1024 + 17)
+        upload = UploadFile(io.BytesIO(payload), filename="manual.pdf")
+        path, size, sha256 = asyncio.run(spool_upload(upload, max_bytes=len(payload), suffix=".pdf"))
+        try:
+            self.assertEqual(size, len(payload))
+            self.assertEqual(sha256, hashlib.sha256(payload).hexdigest())
+            with open(path, "rb") as spooled:
+                self.assertEqual(spooled.read(), payload)
+        finally:
+            remove_spool_file(path)
+
+    def test_streamed_size_rejected(self):
+        """An upload of unknown size is rejected once it crosses the limit."""
+        upload = UploadFile(io.BytesIO(b"x" * (2 * 1024 * 1024)), filename="manual.pdf")
+        with self.assertRaises(UploadTooLargeError):
+            asyncio.run(spool_upload(upload, max_bytes=1024))
+
+class TestUploadSizeLimitMiddleware(unittest.TestCase):
+    """Test rejecting oversized uploads from their declared size."""
+
+    def setUp(self):
+        """Mount an upload endpoint behind a 1 MB limit, recording whether it ran."""
+        self.handled = []
+        app = FastAPI()
+        app.add_middleware(UploadSizeLimitMiddleware, max_bytes=1024 * 1024)
+
+        @app.post("/upload")
+        async def upload(file: UploadFile = File(...)):
+            self.handled.append(file.filename)
+            return {"size": len(await file.read())}
+
+        self.client = TestClient(app)
+
+    def test_declared_size_rejected_before_reading(self):
+        """A request declaring a body over the limit gets a 413 and never reaches form parsing."""
+        response = self.client.post("/upload", files={"file": ("manual.pdf", b"x" * (2 * 1024 * 1024))})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.handled, [])
+
+    def test_upload_within_limit(self):
+        response = self.client.post("/upload", files={"file": ("manual.pdf", b"x" * 1000)})
+        self.assertEqual(response.json(), {"size": 1000})
+        self.assertEqual(self.handled, ["manual.pdf"])
+
+class TestExtractArchive(unittest.TestCase):
+    """Test extracting supported files from uploaded archives."""
+
+    def setUp(self):
+        """Create a scratch directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.destination = os.path.join(self.tmpdir.name, "out")
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        self.tmpdir.cleanup()
+
+    def test_zip_keeps_supported_files_and_rejects_escapes(self):
+        """Only supported files inside the extraction directory are extracted."""
+        path = os.path.join(self.tmpdir.name, "manuals.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("manuals/spot.pdf", b"%PDF-1.4")
+            archive.writestr("notes.md", "# Notes")
+            archive.writestr("image.png", b"png")
+            archive.writestr("../escape.txt", "outside")
+        self.assertEqual(extract_archive(path, self.destination, (".pdf", ".md", ".txt")), ["manuals/spot.pdf", "notes.md"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "escape.txt")))
+
+    def test_tar_content_limit(self):
+        """Extraction stops once the uncompressed content crosses the limit."""
+        path = os.path.join(self.tmpdir.name, "manuals.tar.gz")
+        payload = b"x" * 4096
+        with tarfile.open(path, "w:gz") as archive:
+            info = tarfile.TarInfo("big.txt")
+            info.size = len(payload)
+            archive.addfile(info, io.BytesIO(payload))
+        with self.assertRaises(UploadTooLargeError):
+            extract_archive(path, self.destination, (".txt",), max_bytes=1024)
+
+    def test_rejects_non_archive(self):
+        """A file that is not an archive is rejected."""
+        path = os.path.join(self.tmpdir.name, "manual.zip")
+        with open(path, "wb") as outfile:
+            outfile.write(b"not an archive")
+        with self.assertRaises(InvalidArchiveError):
+            extract_archive(path, self.destination, (".pdf",))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+import os
+import tempfile
+import unittest
+import weakref
+from unittest import mock
+import numpy as np
+from app.handlers import vector_store
+from app.handlers.db_handler import DatabaseHandler, storage_configuration
+from app.handlers.vector_store import NumpyVectorStore, where_to_sql
+
+class TestNumpyVectorStore(unittest.TestCase):
+    """Test the memory-mapped flat vector store."""
+
+    def setUp(self):
+        """Open a store in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = NumpyVectorStore(os.path.join(self.tmpdir.name, "store"), "test_store", {"embedding_model": "m"})
+
+    def tearDown(self):
+        """Close the store and remove its files."""
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def add_sources(self):
+        self.store.add(
+            ids=["a1", "a2", "b1"],
+            embeddings=[[1.0, 0.0], [0.8, 0.6], [0.0, 1.0]],
+            documents=["alpha", "beta", "gamma"],
+            metadatas=[{"source": "a.txt", "tags": ["x"]}, {"source": "a.txt", "tags": ["y"]}, {"source": "b.txt"}],
+        )
+
+    def test_add_ignores_existing_and_upsert_replaces(self):
+        """Existing IDs are skipped by add and replaced by upsert, like ChromaDB."""
+        self.add_sources()
+        self.store.add(ids=["a1"], embeddings=[[0.0, 1.0]], documents=["changed"])
+        self.assertEqual(self.store.get(ids=["a1"])['documents'], ["alpha"])
+        self.store.upsert(ids=["a1"], embeddings=[[0.0, 1.0]], documents=["changed"])
+        self.assertEqual(self.store.get(ids=["a1"])['documents'], ["changed"])
+        self.assertEqual(self.store.count(), 3)
+        with self.assertRaises(ValueError):
+            self.store.add(ids=["c1", "c1"], embeddings=[[1.0, 0.0], [1.0, 0.0]])
+        with self.assertRaises(ValueError):
+            self.store.add(ids=["c2"], embeddings=[[1.0, 0.0, 0.0]])
+
+    def test_update_merges_metadata(self):
+        """update merges metadata like ChromaDB: None removes a key and unknown IDs are ignored."""
+        self.add_sources()
+        self.store.update(ids=["a1", "missing"], metadatas=[{"page": 2, "tags": None}, {"page": 3}])
+        self.assertEqual(self.store.get(ids=["a1"])['metadatas'], [{"source": "a.txt", "page": 2}])
+        self.assertEqual(self.store.get(where={"page": 2})['ids'], ["a1"])
+        self.assertEqual(self.store.count(), 3)
+
+    def test_query_is_exact_and_filtered(self):
+        """Results are ordered by cosine distance and restricted by where clauses."""
+        self.add_sources()
+        result = self.store.query(query_embeddings=[[2.0, 0.0]], n_results=2)
+        self.assertEqual(result['ids'], [["a1", "a2"]])
+        np.testing.assert_allclose(result['distances'][0], [0.0, 0.2], atol=1e-6)
+        self.assertEqual(result['documents'], [["alpha", "beta"]])
+        filtered = self.store.query(query_embeddings=[[1.0, 0.0]], n_results=5, where={"source": "b.txt"})
+        self.assertEqual(filtered['ids'], [["b1"]])
+        tagged = self.store.query(query_embeddings=[[1.0, 0.0]], n_results=5, where={"tags": {"$contains": "y"}})
+        self.assertEqual(tagged['ids'], [["a2"]])
+
+    def test_get_pages_in_insertion_order(self):
+        """get supports limit/offset, filters and embeddings."""
+        self.add_sources()
+        self.assertEqual(self.store.get(limit=2, offset=1)['ids'], ["a2", "b1"])
+        self.assertEqual(self.store.get(where={"source": "a.txt"}, include=[])['ids'], ["a1", "a2"])
+        embeddings = self.store.get(ids=["b1"], include=['embeddings'])['embeddings']
+        np.testing.assert_allclose(embeddings, [[0.0, 1.0]])
+
+    def test_delete_compact_and_reopen(self):
+        """Deleted records disappear, compaction keeps the rest, and the store persists."""
+        self.add_sources()
+        self.store.delete(where={"source": "a.txt"})
+        self.assertEqual(self.store.count(), 1)
+        self.assertEqual(self.store.query(query_embeddings=[[1.0, 0.0]], n_results=3)['ids'], [["b1"]])
+        self.store.compact()
+        self.store.add(ids=["c1"], embeddings=[[0.6, 0.8]], documents=["delta"])
+        self.store.modify(metadata={"embedding_model": "n"})
+        self.store.close()
+
+        self.store = NumpyVectorStore(os.path.join(self.tmpdir.name, "store"), "test_store")
+        self.assertEqual(self.store.metadata, {"embedding_model": "n"})
+        self.assertEqual(self.store.get()['ids'], ["b1", "c1"])
+        self.assertEqual(self.store.query(query_embeddings=[[0.0, 1.0]], n_results=1)['documents'], [["gamma"]])
+        with self.assertRaises(ValueError):
+            self.store.delete()
+
+    def test_compacts_after_many_deletes(self):
+        """The vector file is rewritten once deleted rows outnumber live ones."""
+        vectors = np.random.default_rng(1).standard_normal((40, 4))
+        self.store.add(ids=[f"doc_{index}" for index in range(40)], embeddings=vectors)
+        with mock.patch.object(vector_store, "COMPACT_MIN_DEAD_ROWS", 10):
+            self.store.delete(ids=[f"doc_{index}" for index in range(0, 40, 2)])
+        self.assertEqual(os.path.getsize(self.store._vectors_path), 20 * 4 * 4)
+        result = self.store.query(query_embeddings=[vectors[1].tolist()], n_results=1)
+        self.assertEqual(result['ids'], [["doc_1"]])
+
+    def test_writes_update_the_mask_incrementally(self):
+        """Adds extend the live-row mask without re-reading every record, and it matches a full reload."""
+        vectors = np.random.default_rng(2).standard_normal((30, 4))
+        with mock.patch.object(self.store, "_load", side_effect=AssertionError("records re-read on write")):
+            for start in range(0, 30, 3):
+                self.store.add(ids=[f"doc_{index}" for index in range(start, start + 3)], embeddings=vectors[start:start + 3])
+            self.store.upsert(ids=["doc_4"], embeddings=[vectors[4]])
+            self.store.delete(ids=["doc_7"])
+        self.assertEqual(self.store.count(), 29)
+        alive = self.store._alive.copy()
+        self.store._load()
+        np.testing.assert_array_equal(alive, self.store._alive)
+        self.assertEqual(self.store.query(query_embeddings=[vectors[4].tolist()], n_results=1)['ids'], [["doc_4"]])
+
+    def test_files_are_unmapped_before_replacement(self):
+        """Compaction drops every reference to the old memory maps before replacing their files."""
+        self.add_sources()
+        self.store.delete(ids=["a1"])
+        old_map = weakref.ref(self.store._full)
+        replaced = []
+
+        def replace(source, target):
+            replaced.append(old_map() is None)
+            os.rename(source, target)
+
+        with mock.patch.object(vector_store.os, "replace", side_effect=replace):
+            self.store.compact()
+        self.assertEqual(replaced, [True])
+        self.assertEqual(self.store.get()['ids'], ["a2", "b1"])
+
+class TestCompressedStorage(unittest.TestCase):
+    """Test quantized and truncated vector storage."""
+
+    def setUp(self):
+        """Random vectors whose leading dimensions carry most of the variance, as with Matryoshka models."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(3)
+        self.vectors = (rng.standard_normal((500, 32)) * np.linspace(3, 0.1, 32)).astype(np.float32)
+        self.ids = [f"doc_{index}" for index in range(len(self.vectors))]
+
+    def tearDown(self):
+        """Remove the stores."""
+        self.tmpdir.cleanup()
+
+    def open_store(self, name: str, storage: dict) -> NumpyVectorStore:
+        store = NumpyVectorStore(os.path.join(self.tmpdir.name, name), name, storage=storage_configuration(storage))
+        self.addCleanup(store.close)
+        store.add(ids=self.ids, embeddings=self.vectors)
+        return store
+
+    def top_ids(self, store, row: int, k: int = 5) -> list:
+        return store.query(query_embeddings=[self.vectors[row].tolist()], n_results=k, include=[])['ids'][0]
+
+    def test_int8_and_truncation_shrink_the_index(self):
+        """int8 stores a quarter of the bytes and truncation shrinks it further."""
+        full = self.open_store("full", {"dtype": "float32", "rescore": 0})
+        int8 = self.open_store("int8", {"dtype": "int8", "rescore": 0})
+        truncated = self.open_store("truncated", {"dtype": "float16", "dimensions": 8, "rescore": 0})
+        self.assertEqual(full.index_bytes, 500 * 32 * 4)
+        self.assertEqual(int8.index_bytes, 500 * 32 + 500 * 4)
+        self.assertEqual(truncated.index_bytes, 500 * 8 * 2)
+        self.assertFalse(os.path.exists(os.path.join(int8.path, "vectors.f32")))
+        self.assertEqual(self.top_ids(int8, 0)[0], "doc_0")
+        self.assertEqual(int8.get(ids=["doc_1"], include=['embeddings'])['embeddings'].shape, (1, 32))
+
+    def test_rescoring_restores_exact_results(self):
+        """Re-scoring a candidate shortlist with full vectors gives the exact top-k and distances."""
+        full = self.open_store("full", {"dtype": "float32", "rescore": 0})
+        rescored = self.open_store("rescored", {"dtype": "int8", "dimensions": 16, "rescore": 10})
+        for row in range(0, 500, 50):
+            self.assertEqual(self.top_ids(rescored, row), self.top_ids(full, row))
+        exact = full.query(query_embeddings=[self.vectors[7].tolist()], n_results=3)
+        result = rescored.query(query_embeddings=[self.vectors[7].tolist()], n_results=3)
+        np.testing.assert_allclose(result['distances'][0], exact['distances'][0], atol=1e-5)
+
+    def test_set_storage_converts_in_place(self):
+        """A store keeping full vectors can be re-encoded, but not once they are dropped."""
+        store = self.open_store("store", {"dtype": "float32", "rescore": 0})
+        store.delete(ids=["doc_1"])
+        maps = []
+
+        def replace(source, target):
+            maps.append(store._full is None and store._coarse is None)
+            os.rename(source, target)
+
+        with mock.patch.object(vector_store.os, "replace", side_effect=replace):
+            store.set_storage(storage_configuration({"dtype": "int8", "rescore": 0}))
+        self.assertTrue(maps and all(maps))
+        self.assertEqual((store.count(), store.storage['dtype']), (499, "int8"))
+        self.assertEqual(self.top_ids(store, 2)[0], "doc_2")
+        with self.assertRaises(ValueError):
+            store.set_storage(storage_configuration({"dtype": "float32"}))
+        store.close()
+        reopened = NumpyVectorStore(store.path, "store")
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.storage, store.storage)
+        self.assertEqual(self.top_ids(reopened, 3)[0], "doc_3")
+
+    def test_storage_configuration(self):
+        """Environment defaults are overridden per collection and invalid settings are rejected."""
+        with mock.patch.dict(os.environ, {"VECTOR_STORAGE_DTYPE": "float16", "VECTOR_STORAGE_DIMENSIONS": "256"}):
+            self.assertEqual(storage_configuration({"rescore": 2}), {"dtype": "float16", "dimensions": 256, "rescore": 2})
+            self.assertEqual(storage_configuration({"dimensions": 0})['dimensions'], None)
+        for overrides in ({"dtype": "int4"}, {"dimensions": -1}, {"rescore": -1}, {"bits": 8}):
+            with self.assertRaises(ValueError):
+                storage_configuration(overrides)
+
+class TestWhereToSQL(unittest.TestCase):
+    """Test translating ChromaDB where clauses into SQL."""
+
+    def test_operators(self):
+        """Nested clauses become parameterized conditions on the metadata JSON."""
+        sql, params = where_to_sql({"$and": [{"source": "a.txt"}, {"page": {"$gte": 2}}]})
+        self.assertEqual(sql, "(((json_extract(metadata, ?) = ?) AND (json_extract(metadata, ?) >= ?)))")
+        self.assertEqual(params, ['$."source"', "a.txt", '$."page"', 2])
+        sql, params = where_to_sql({"source": {"$in": ["a", "b"]}})
+        self.assertEqual(sql, "(json_extract(metadata, ?) IN (?, ?))")
+        with self.assertRaises(ValueError):
+            where_to_sql({"source": {"$like": "a%"}})
+
+class TestNumpyBackend(unittest.TestCase):
+    """Test DatabaseHandler with VECTOR_STORE=numpy."""
+
+    def test_model_collections(self):
+        """Per-model collections are numpy stores and have no HNSW settings."""
+        with tempfile.TemporaryDirectory() as path:
+            db_handler = DatabaseHandler(path, backend="numpy")
+            try:
+                self.assertIs(db_handler.collection_for_model("model-a"), db_handler.collection)
+                other = db_handler.collection_for_model("model-b")
+                other.add(ids=["doc_1"], embeddings=[[0.1, 0.2]], documents=["alpha"])
+                collections = {entry['model']: entry for entry in db_handler.list_model_collections()}
+                self.assertEqual(collections["model-b"]['count'], 1)
+                self.assertEqual(collections["model-a"]['hnsw']['ef_search'], None)
+                with self.assertRaises(ValueError):
+                    db_handler.set_search_ef(other, 64)
+                self.assertEqual(db_handler.set_storage(other, {"dtype": "float16"})['dtype'], "float16")
+            finally:
+                db_handler.close()
+        with self.assertRaises(ValueError):
+            DatabaseHandler("unused", backend="faiss")
+
+    def test_chroma_rejects_storage_settings(self):
+        """Quantized storage is only available with the numpy backend."""
+        with tempfile.TemporaryDirectory() as path:
+            db_handler = DatabaseHandler(path, backend="chroma")
+            try:
+                db_handler.collection_for_model("model-a")
+                with self.assertRaises(ValueError):
+                    db_handler.collection_for_model("model-b", storage={"dtype": "int8"})
+            finally:
+                db_handler.close()
+
+if __name__ == "__main__":
+    unittest.main()
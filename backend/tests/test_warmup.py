@@ -0,0 +1,79 @@
+import unittest
+import uuid
+from unittest import mock
+import chromadb
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import health_api
+from app.handlers.warmup import Warmup
+from app.LLMs.ollama_chat import OllamaChat
+from test_document_reindex import StubEmbeddings
+
+class RecordingChat:
+    """Chat provider stand-in recording warm-up calls."""
+
+    def __init__(self):
+        self.keep_alive = None
+
+    def warm_up(self, keep_alive=None):
+        self.keep_alive = keep_alive
+
+class TestWarmup(unittest.TestCase):
+    """Test loading the index and models before the first request."""
+
+    def setUp(self):
+        """Create an embedder over a small in-memory collection."""
+        collection = chromadb.EphemeralClient().create_collection(
+            f"test_{uuid.uuid4().hex[:8]}", metadata={"hnsw:space": "cosine"}
+        )
+        self.embedder = StubEmbeddings(collection)
+        self.embedder.create_embeddings_batch(["store cue", "patch fixture", "network setup"])
+        self.embedder.client.calls = 0
+
+    def test_runs_every_step(self):
+        """The index, both models and the synthetic queries are warmed, in that order."""
+        chat = RecordingChat()
+        warmup = Warmup(self.embedder, chat_handler_factory=lambda: chat, queries=["cue", "dmx"], keep_alive="30m")
+        self.assertFalse(warmup.ready)
+        warmup.run()
+        self.assertTrue(warmup.ready)
+        self.assertEqual(warmup.status['state'], 'completed')
+        self.assertEqual(list(warmup.status['steps']), ['index', 'embedding_model', 'chat_model', 'queries'])
+        self.assertEqual(self.embedder.client.calls, 3)  # Model load plus one per query
+        self.assertEqual(chat.keep_alive, "30m")
+
+    def test_failed_step_does_not_block_readiness(self):
+        """A provider that cannot be reached is reported, and the remaining steps still run."""
+        def unavailable():
+            raise ConnectionError("provider unreachable")
+
+        warmup = Warmup(self.embedder, chat_handler_factory=unavailable, queries=["cue"])
+        warmup.run()
+        self.assertTrue(warmup.ready)
+        self.assertEqual(warmup.status['state'], 'failed')
+        self.assertEqual(warmup.status['steps']['chat_model']['error'], "provider unreachable")
+        self.assertIsNone(warmup.status['steps']['queries']['error'])
+
+    def test_ollama_chat_preloads_with_keep_alive(self):
+        """The Ollama chat model is loaded with an empty prompt and the requested keep_alive."""
+        chat = OllamaChat("llama3")
+        chat.client = mock.Mock()
+        chat.warm_up(keep_alive="1h")
+        chat.client.generate.assert_called_once_with(model="llama3", prompt="", keep_alive="1h")
+
+    def test_readiness_follows_warmup(self):
+        """The readiness endpoint reports 503 until warm-up finishes, and 200 when it is disabled."""
+        app = FastAPI()
+        app.include_router(health_api.router)
+        client = TestClient(app)
+        app.state.warmup = None
+        self.assertEqual(client.get("/api/v1/ready").status_code, 200)
+        app.state.warmup = Warmup(self.embedder, queries=[])
+        response = client.get("/api/v1/ready")
+        self.assertEqual((response.status_code, response.json()["warmup"]["state"]), (503, "pending"))
+        app.state.warmup.run()
+        response = client.get("/api/v1/ready")
+        self.assertEqual((response.status_code, response.json()["ready"]), (200, True))
+
+if __name__ == "__main__":
+    unittest.main()
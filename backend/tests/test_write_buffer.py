@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+import unittest
+import uuid
+from types import SimpleNamespace
+import chromadb
+import httpx
+from fastapi import FastAPI
+from app.api.v1.endpoints import ollama_embedding_api
+from app.handlers.write_buffer import BufferedCollection, WriteBuffer
+from test_document_reindex import StubEmbeddings
+
+class RecordingCollection:
+    """Collection stand-in that records the size of every add."""
+
+    def __init__(self, fail_on: str = None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.name = "recording"
+
+    def add(self, ids, embeddings=None, documents=None, metadatas=None):
+        if self.fail_on in ids:
+            raise ValueError(f"bad record {self.fail_on}")
+        self.batches.append(list(ids))
+
+class TestWriteBuffer(unittest.TestCase):
+    """Test the group-commit write buffer for ChromaDB adds."""
+
+    def add_concurrently(self, collection, producers: int, records: int):
+        """Run producers that each add `records` records through the collection."""
+        barrier = threading.Barrier(producers)
+
+        def produce(producer: int):
+            barrier.wait()
+            ids = [f"p{producer}_{index}" for index in range(records)]
+            collection.add(ids=ids, embeddings=[[0.1, 0.2]] * records, documents=ids)
+
+        threads = [threading.Thread(target=produce, args=(producer,)) for producer in range(producers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_adds_are_coalesced(self):
+        """Adds from concurrent producers are written in fewer, larger batches."""
+        recording = RecordingCollection()
+        buffer = WriteBuffer(recording, max_batch_size=1000, max_delay=0.2)
+        self.add_concurrently(BufferedCollection(recording, buffer), producers=8, records=5)
+        buffer.close()
+        self.assertEqual(sum(len(batch) for batch in recording.batches), 40)
+        self.assertLess(len(recording.batches), 8)
+
+    def test_batches_respect_max_batch_size(self):
+        """No write exceeds the client's max batch size, even for one large add."""
+        recording = RecordingCollection()
+        buffer = WriteBuffer(recording, max_batch_size=7, max_delay=0.05)
+        buffer.submit([f"id{index}" for index in range(20)], embeddings=[[0.0]] * 20).result()
+        buffer.close()
+        self.assertEqual([len(batch) for batch in recording.batches], [7, 7, 6])
+
+    def test_failed_add_only_fails_its_producer(self):
+        """A bad add is retried alone, so other producers' records are still written."""
+        recording = RecordingCollection(fail_on="bad")
+        buffer = WriteBuffer(recording, max_batch_size=100, max_delay=0.2)
+        good = buffer.submit(["good"], embeddings=[[0.0]])
+        bad = buffer.submit(["bad"], embeddings=[[0.0]])
+        self.assertIsNone(good.result(timeout=5))
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        buffer.close()
+        self.assertIn(["good"], recording.batches)
+
+    def test_writes_to_chroma_with_duplicate_ids(self):
+        """Coalesced adds of the same ID do not fail the batch and the data is readable once acknowledged."""
+        client = chromadb.EphemeralClient()
+        collection = client.create_collection(f"test_{uuid.uuid4().hex[:8]}")
+        buffer = WriteBuffer(collection, max_batch_size=client.get_max_batch_size(), max_delay=0.1)
+        buffered = BufferedCollection(collection, buffer)
+        first = buffer.submit(["shared", "a"], embeddings=[[0.1, 0.2], [0.3, 0.4]], documents=["shared", "a"])
+        second = buffer.submit(["shared", "b"], embeddings=[[0.1, 0.2], [0.5, 0.6]], documents=["shared", "b"])
+        first.result(timeout=5)
+        second.result(timeout=5)
+        self.assertEqual(buffered.count(), 3)
+        started = time.monotonic()
+        buffer.close()
+        self.assertLess(time.monotonic() - started, 1)
+
+class TestEmbedEndpointGroupCommit(unittest.TestCase):
+    """Test that concurrent /embed requests share a write."""
+
+    def test_concurrent_requests_share_one_commit(self):
+        """Requests in flight together are written with a single add, without blocking each other."""
+        recording = RecordingCollection()
+        buffer = WriteBuffer(recording, max_batch_size=1000, max_delay=0.5)
+        embedder = StubEmbeddings(BufferedCollection(recording, buffer))
+        app = FastAPI()
+        app.state.resources = SimpleNamespace(embedder_for=lambda model=None, collection=None: embedder)
+        app.include_router(ollama_embedding_api.router)
+
+        async def post_concurrently():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await asyncio.gather(*[
+                    client.post("/api/v1/ollama-embeddings/embed", json={"contents": [f"text {index}", f"more {index}"]})
+                    for index in range(4)
+                ])
+
+        started = time.monotonic()
+        responses = asyncio.run(post_concurrently())
+        elapsed = time.monotonic() - started
+        buffer.close()
+        self.assertTrue(all(response.json()["success"] for response in responses))
+        self.assertEqual([len(batch) for batch in recording.batches], [8])
+        self.assertLess(elapsed, 1.0)  # One linger, not one per request
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,8 @@ interface Document {
     content: string;
 }
 
+const DOCUMENTS_PAGE_SIZE = 500; // Documents requested per page
+
 export const databaseService = {
     uploadDocument: async ({ title, content }: DocumentUpload) => {
         const response = await api.post('/ollama-embeddings/embed', {
@@ -59,13 +61,21 @@ export const databaseService = {
     },
 
     /**
-     * Fetches all documents from the backend.
+     * Fetches all documents from the backend, following the X-Next-Offset pagination header.
      * @returns A promise that resolves to an array of documents.
      */
     async listDocuments(): Promise<Document[]> { // Add return type
         try {
-            const response = await api.get('/documents'); // Replace with your actual endpoint
-            return response.data; // Return the data
+            const documents: Document[] = [];
+            let offset: string | undefined = '0';
+            while (offset !== undefined) {
+                const response = await api.get('/documents/', {
+                    params: { limit: DOCUMENTS_PAGE_SIZE, offset },
+                });
+                documents.push(...response.data);
+                offset = response.headers['x-next-offset']; // Absent on the last page
+            }
+            return documents; // Return the data
         } catch (error) {
             console.error('Error fetching documents:', error); // Log the error
             throw error; // Propagate the error